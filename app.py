@@ -1,3 +1,7 @@
+import os
+import shlex
+import tempfile
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -6,6 +10,26 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from fmwai.beta import beta_table
+from fmwai.budgeting import evaluate_candidates, load_candidates, sample_candidates, select_projects
+from fmwai.cache import DEFAULT_CACHE_DIR, ResultCache
+from fmwai.compact import compact_frame, compact_model
+from fmwai.event_study import DEFAULT_ESTIMATION, DEFAULT_WINDOW, parse_event_dates, study_series
+from fmwai.capital_structure import FirmInputs, relever_beta, solve_capital_structure, target_wacc, unlever_beta
+from fmwai.charts import scatter
+from fmwai.export import MAX_DOWNLOAD_BYTES, MIME_TYPES, available_formats, export, grid_chunks, scenario_chunks
+from fmwai.frontier import efficient_frontier, load_price_panel, returns_panel
+from fmwai.model import FREQUENCIES, SchemaError, load_model
+from fmwai.project_model import ProjectDrivers, build_financials, terminal_value
+from fmwai.project_model import npv as project_npv
+from fmwai.quality import clean_prices
+from fmwai.range_index import MIN_OBSERVATIONS, PrefixSumIndex
+from fmwai.real_options import value_real_options
+from fmwai.scenarios import MarketInputs, Scenario, ScenarioStore, growth_path
+from fmwai.scenarios import compare as compare_scenarios
+from fmwai.sensitivity import DRIVER_LABELS, DRIVERS, SensitivityBase, spider, tornado, two_way
+from fmwai.stress import PRESETS, SHOCK_SCOPE, StressScenario, episode_scenarios, run_stress, worst_windows
+
 # -----------------------
 # PAGE CONFIG
 # -----------------------
@@ -62,44 +86,71 @@ st.markdown('<p class="sub-header">HCL Technologies Limited • Comprehensive Fi
 # -----------------------
 # LOAD DATA
 # -----------------------
-@st.cache_data
+# Opt-in compact mode for memory-bound hosts: float32 returns and exports, one shared date axis
+COMPACT = os.environ.get("FMWAI_COMPACT", "").lower() in ("1", "true", "yes")
+
+@st.cache_resource
 def load_data():
-    try:
-        prices = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Data", index_col=0, parse_dates=True)
-        rd = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Returns_Daily", index_col=0, parse_dates=True)
-        rw = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Returns_Weekly", index_col=0, parse_dates=True)
-        rm = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Returns_Monthly", index_col=0, parse_dates=True)
-        risk_summary = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Risk_Return_Summary", index_col=0)
-        capm = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="CAPM_Regression", index_col=0)
-        capm_expected = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="CAPM_Expected_Returns", index_col=0)
-        wacc = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Capital_Structure_WACC")
-        beta_adj = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Beta_Adjustments", index_col=0)
-        project = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Project_Financials", index_col=0)
-        project_risk = pd.read_excel("FMWAI_Analysis.xlsx", sheet_name="Project_Risk")
-        return prices, rd, rw, rm, risk_summary, capm, capm_expected, wacc, beta_adj, project, project_risk
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return None, None, None, None, None, None, None, None, None, None, None
+    # Built once per process; the model is immutable so sessions share it
+    model = load_model("FMWAI_Analysis.xlsx")
+    return compact_model(model) if COMPACT else model
+
+@st.cache_resource
+def load_result_cache():
+    # On disk, so derived results survive restarts and are shared by worker processes
+    return ResultCache(os.environ.get("FMWAI_CACHE_DIR", DEFAULT_CACHE_DIR))
 
-prices, rd, rw, rm, risk_summary, capm, capm_expected, wacc, beta_adj, project, project_risk = load_data()
+@st.cache_resource
+def load_range_indexes(_model):
+    # Prefix sums over each return series; any date window is then O(1)
+    return {f.name: PrefixSumIndex.build(f.returns, f.periods_per_year) for f in _model.frequencies}
 
-if prices is None:
+@st.cache_resource
+def load_scenario_store():
+    # SQLite file next to the app; connections are opened per call, so sessions share it
+    return ScenarioStore()
+
+@st.cache_resource
+def load_quality_report(_model):
+    return load_result_cache().call(clean_prices, _model.prices.to_frame())[1]
+
+try:
+    model = load_data()
+except (SchemaError, FileNotFoundError) as e:
+    st.error(f"Error loading data: {e}")
     st.stop()
 
+results = load_result_cache()
+
 # -----------------------
 # SIDEBAR CONTROLS
 # -----------------------
 st.sidebar.image("https://via.placeholder.com/250x80/1e3a8a/ffffff?text=HCL+Technologies", use_container_width=True)
 st.sidebar.markdown("### 📊 Analysis Controls")
 
-# Analysis period info
-st.sidebar.info("**Analysis Period**\n\n01 April 2022 to 28 March 2025\n\n739 daily observations")
+# Analysis period
+# Weekly and monthly returns are stamped at period end, which can fall after the last price
+first_day = pd.Timestamp(model.prices.dates[0]).date()
+last_day = pd.Timestamp(max(s.dates[-1] for s in [model.prices] + [f.returns for f in model.frequencies])).date()
+period_start, period_end = st.sidebar.slider(
+    "Analysis Period", min_value=first_day, max_value=last_day, value=(first_day, last_day),
+    format="DD MMM YYYY", help="Every metric and chart covers only this window"
+)
+prices = model.prices.between(period_start, period_end)
+if not len(prices):
+    st.warning("No trading days fall in the selected period.")
+    st.stop()
+first_obs, last_obs = pd.Timestamp(prices.dates[0]), pd.Timestamp(prices.dates[-1])
+st.sidebar.info(f"**Analysis Period**\n\n{first_obs:%d %B %Y} to {last_obs:%d %B %Y}\n\n"
+                f"{len(prices)} daily observations")
 
 # Navigation
 page = st.sidebar.radio(
     "Navigate to:",
-    ["🏠 Executive Summary", "📈 Market Analysis", "⚖️ Risk & Return", "💰 Capital Structure", "🚀 Project Valuation"],
-    label_visibility="visible"
+    ["🏠 Executive Summary", "📈 Market Analysis", "⚖️ Risk & Return", "💰 Capital Structure", "🚀 Project Valuation",
+     "🗂️ Scenarios", "📦 Capital Budgeting", "🌩️ Stress Testing"],
+    label_visibility="visible",
+    key="page"
 )
 
 st.sidebar.markdown("---")
@@ -109,43 +160,170 @@ freq = st.sidebar.selectbox("Return Frequency", ["Daily", "Weekly", "Monthly"],
 
 st.sidebar.markdown("---")
 
-# What-if controls
-st.sidebar.markdown("### 🎯 What-If Scenarios")
-debt_pct = st.sidebar.slider("Target Debt %", 0, 40, 25, step=5, help="Adjust target capital structure")
-kd_pre_tax = st.sidebar.slider("Cost of Debt (pre-tax, %)", 4.0, 12.0, 7.5, step=0.25, help="Pre-tax cost of borrowing")
+# What-if inputs. The sliders are drawn inside the fragments that depend on them
+# (Capital Structure, Project Valuation), so moving one reruns only that fragment.
+# Their values, and the project drivers', live in session state and carry over
+# between pages; loading a saved scenario writes them there.
+WHAT_IF_DEFAULTS = {"debt_pct": 25, "kd_pre_tax": 7.5}
+PROJECT_DEFAULTS = {
+    "revenue_year1": 150.0, "growth_early": 30, "growth_late": 30, "margin_range": (20, 40),
+    "da_pct": 5.0, "capex_pct": 8.0, "nwc_pct": 0.0, "use_terminal": False, "terminal_growth": 3.0,
+    "initial_investment": 18.0,
+}
+for _key, _default in {**WHAT_IF_DEFAULTS, **PROJECT_DEFAULTS}.items():
+    # Re-assigning keeps the value on pages that do not draw the widget
+    st.session_state[_key] = st.session_state.get(_key, _default)
 tax_rate = 0.25
 
+
+def what_if_controls():
+    """Target debt and pre-tax cost of debt sliders; returns ``(debt %, Kd %)``."""
+    st.markdown("#### 🎯 What-If Scenarios")
+    col_wi1, col_wi2 = st.columns(2)
+    with col_wi1:
+        debt_pct = st.slider("Target Debt %", 0, 40, step=5, key="debt_pct",
+                             help="Adjust target capital structure")
+    with col_wi2:
+        kd_pre_tax = st.slider("Cost of Debt (pre-tax, %)", 4.0, 12.0, step=0.25, key="kd_pre_tax",
+                               help="Pre-tax cost of borrowing")
+    return debt_pct, kd_pre_tax
+
+
+def load_scenario(name):
+    """Write a saved scenario into the what-if and driver widgets and open its valuation."""
+    s = load_scenario_store().load(name)
+    d = s.drivers
+    path = growth_path(d)
+    st.session_state.update({
+        "debt_pct": int(round(s.debt_pct * 100)),
+        "kd_pre_tax": round(s.kd_pre_tax * 100, 2),
+        "revenue_year1": float(d.revenue_year1),
+        "growth_early": int(round(path[0] * 100)),
+        "growth_late": int(round(path[-1] * 100)),
+        "margin_range": (int(round(d.ebitda_margin_start * 100)), int(round(d.ebitda_margin_end * 100))),
+        "da_pct": d.da_pct * 100,
+        "capex_pct": d.capex_pct * 100,
+        "nwc_pct": d.nwc_pct * 100,
+        "use_terminal": d.terminal_growth is not None,
+        "terminal_growth": (d.terminal_growth if d.terminal_growth is not None else 0.03) * 100,
+        "initial_investment": float(d.initial_investment),
+        "page": "🚀 Project Valuation",
+    })
+
+
+def session_drivers():
+    """Project drivers from the driver widgets' state, which persists on pages that do not draw them."""
+    s = st.session_state
+    return ProjectDrivers(
+        revenue_year1=s.revenue_year1,
+        revenue_growth=[[s.growth_early / 100] * 2 + [s.growth_late / 100] * 2],
+        ebitda_margin_start=s.margin_range[0] / 100,
+        ebitda_margin_end=s.margin_range[1] / 100,
+        da_pct=s.da_pct / 100,
+        tax_rate=tax_rate,
+        capex_pct=s.capex_pct / 100,
+        nwc_pct=s.nwc_pct / 100,
+        terminal_growth=s.terminal_growth / 100 if s.use_terminal else None,
+        initial_investment=s.initial_investment,
+    )
+
+
+def export_dir():
+    """This session's export directory, removed (``shutil.rmtree``) when the session ends or the server stops."""
+    if "export_dir" not in st.session_state:
+        st.session_state.export_dir = tempfile.TemporaryDirectory(prefix="fmwai-export-")
+    return st.session_state.export_dir.name
+
+
+def export_controls(key, stem, make_chunks, signature, command):
+    """Format picker and a button that streams ``make_chunks()`` to a file, then offers it for download.
+    
+    ``signature`` identifies the inputs; an export built for other inputs is not offered. Exports over
+    ``MAX_DOWNLOAD_BYTES`` are left on the server, with ``command`` (the ``fmwai.export`` arguments
+    without the output file) to write the same table locally.
+    """
+    col_ex1, col_ex2 = st.columns([1, 2])
+    with col_ex1:
+        fmt = st.selectbox("Format", available_formats(), key=f"{key}_format")
+    with col_ex2:
+        st.write("")
+        build = st.button("Build export", key=f"{key}_build")
+    previous = st.session_state.get(f"{key}_export")
+    if build:
+        if previous is not None and os.path.exists(previous[1].path):
+            os.remove(previous[1].path)
+        path = os.path.join(export_dir(), f"{stem}.{fmt}")
+        chunks = map(compact_frame, make_chunks()) if COMPACT else make_chunks()
+        with st.spinner("Writing export..."):
+            previous = ((signature, fmt), export(chunks, path, fmt))
+        st.session_state[f"{key}_export"] = previous
+    if previous is not None and previous[0] == (signature, fmt) and os.path.exists(previous[1].path):
+        result = previous[1]
+        if result.bytes > MAX_DOWNLOAD_BYTES:
+            # A download button would hold the whole file in memory, twice
+            st.info(f"{result.rows:,} rows ({result.bytes / 1e6:.1f} MB, {result.format}) are too large to download "
+                    f"through the browser. The file is on the server at `{result.path}` until this session "
+                    "ends. To write it locally (over the workbook's full period, with default project drivers), run:")
+            st.code(f"python -m fmwai.export {command.replace('{out}', os.path.basename(result.path))}",
+                    language="bash")
+        else:
+            with open(result.path, "rb") as f:
+                st.download_button(f"⬇️ Download {result.rows:,} rows ({result.bytes / 1e6:.1f} MB, {result.format})",
+                                   f, file_name=os.path.basename(result.path), mime=MIME_TYPES[result.format],
+                                   key=f"{key}_download")
+
+
+# Project driver controls
+if page == "🚀 Project Valuation":
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 🧮 Project Drivers")
+    st.sidebar.number_input("Year 1 Revenue (INR Crore)", 50.0, 500.0, step=10.0, key="revenue_year1")
+    st.sidebar.slider("Revenue Growth, Years 2-3 (%)", 0, 60, step=1, key="growth_early")
+    st.sidebar.slider("Revenue Growth, Years 4-5 (%)", 0, 60, step=1, key="growth_late")
+    st.sidebar.slider("EBITDA Margin Ramp (%)", 0, 60, step=1, key="margin_range")
+    st.sidebar.slider("D&A (% of Revenue)", 0.0, 15.0, step=0.5, key="da_pct")
+    st.sidebar.slider("Capex Intensity (% of Revenue)", 0.0, 20.0, step=0.5, key="capex_pct")
+    st.sidebar.slider("Net Working Capital (% of Revenue)", 0.0, 25.0, step=1.0, key="nwc_pct")
+    use_terminal = st.sidebar.checkbox("Include Terminal Value", key="use_terminal")
+    st.sidebar.slider("Terminal Growth (%)", 0.0, 5.0, step=0.25, key="terminal_growth", disabled=not use_terminal)
+    st.sidebar.number_input("Initial Investment (INR Crore)", 0.0, 500.0, step=1.0, key="initial_investment")
+project_drivers = session_drivers()
+
 st.sidebar.markdown("---")
 st.sidebar.caption("**Analysis** | All insights validated using financial theory")
 
-# Map returns
-ret_map = {"Daily": rd, "Weekly": rw, "Monthly": rm}
-rets = ret_map[freq]
+# Metrics for the selected period, read off the prefix-sum indexes
+windows = {name: index.stats(period_start, period_end) for name, index in load_range_indexes(model).items()}
+window = windows[freq]
+rets = model.frequency(freq).returns.between(period_start, period_end)
+if window.observations < MIN_OBSERVATIONS:
+    st.warning(f"Only {window.observations} {freq.lower()} returns fall in the selected period. "
+               "Widen the period or choose a higher frequency.")
+    st.stop()
 
 # -----------------------
 # CALCULATE COMMON METRICS (used across multiple pages)
 # -----------------------
-# Calculate ke, kd_after_tax, wacc_target before page routing
-try:
-    ke = float(wacc.loc[wacc["Unnamed: 0"] == "Cost of Equity", "Value"].iloc[0])
-except:
-    ke = 0.1451  # Fallback value
+# Calculate ke and the target WACC before page routing
+rf = model.cost_of_capital.rf
+# CAPM Ke averaged over the frequencies with enough returns in the period
+ke = float(np.nanmean([rf + w.beta * (w.market_return - rf) for w in windows.values()]))
 
-kd_after_tax = (kd_pre_tax / 100) * (1 - tax_rate)
-wacc_current = ke  # Assuming all equity currently
-wacc_target = (1 - debt_pct/100) * ke + (debt_pct/100) * kd_after_tax
+# Target WACC at the last what-if selection; the fragments recompute it as the sliders move
+wacc_target = target_wacc(ke, st.session_state.debt_pct / 100, st.session_state.kd_pre_tax / 100, tax_rate)
 
 # Beta for current frequency
-beta_current = capm.loc[freq, "Beta"]
-r2_current = capm.loc[freq, "R_squared"]
+beta_current = window.beta
+r2_current = window.r_squared
+
+# CAPM inputs for relevering and sensitivity: the equity beta averaged over the same frequencies
+# as ke, and the market premium that gives back ke from it
+beta_ke = float(np.nanmean([w.beta for w in windows.values()]))
+market_premium = (ke - rf) / beta_ke
 
 # Risk metrics
-try:
-    ann_return = risk_summary.loc[freq, "Annualized_Return"] * 100 if "Annualized_Return" in risk_summary.columns else 17.51
-    ann_vol = risk_summary.loc[freq, "Annualized_StdDev"] * 100 if "Annualized_StdDev" in risk_summary.columns else 23.02
-except:
-    ann_return = 17.51
-    ann_vol = 23.02
+ann_return = window.ann_return * 100
+ann_vol = window.ann_vol * 100
 
 # ==============================================
 # PAGE 1: EXECUTIVE SUMMARY
@@ -158,8 +336,8 @@ if page == "🏠 Executive Summary":
     col1, col2, col3, col4, col5 = st.columns(5)
     
     # Use pre-calculated metrics
-    beta_daily = capm.loc["Daily", "Beta"]
-    r2_daily = capm.loc["Daily", "R_squared"]
+    beta_daily = windows["Daily"].beta
+    r2_daily = windows["Daily"].r_squared
     
     with col1:
         st.metric("Equity Beta (Daily)", f"{beta_daily:.2f}", "Defensive", delta_color="inverse")
@@ -225,11 +403,20 @@ if page == "🏠 Executive Summary":
     insight1, insight2, insight3 = st.columns(3)
     
     with insight1:
-        st.success("""
-        **🛡️ Risk Profile**
-        
-        Beta consistently below 1.0 across all frequencies (0.87 daily, 0.82 weekly, 0.71 monthly) confirms **defensive market behavior**. This reflects HCL's stable cash flows and operational resilience.
-        """)
+        period_betas = {name.lower(): w.beta for name, w in windows.items() if np.isfinite(w.beta)}
+        beta_text = ", ".join(f"{b:.2f} {name}" for name, b in period_betas.items())
+        if max(period_betas.values()) < 1:
+            st.success(f"""
+            **🛡️ Risk Profile**
+            
+            Beta below 1.0 across all frequencies in the selected period ({beta_text}) confirms **defensive market behavior**. This reflects HCL's stable cash flows and operational resilience.
+            """)
+        else:
+            st.warning(f"""
+            **🛡️ Risk Profile**
+            
+            Beta reaches 1.0 or more in the selected period ({beta_text}), so the stock has **not behaved defensively** at every frequency over this window.
+            """)
     
     with insight2:
         st.info("""
@@ -255,9 +442,9 @@ if page == "🏠 Executive Summary":
     with col_ctx1:
         # Price trend mini chart
         fig_mini = go.Figure()
-        fig_mini.add_trace(go.Scatter(
-            x=prices.index,
-            y=prices["Stock_Close"],
+        fig_mini.add_trace(scatter(
+            x=prices.dates,
+            y=prices.stock,
             mode='lines',
             name='HCL Stock',
             line=dict(color='#3b82f6', width=2),
@@ -265,7 +452,8 @@ if page == "🏠 Executive Summary":
             fillcolor='rgba(59, 130, 246, 0.1)'
         ))
         fig_mini.update_layout(
-            title="Stock Price Trend (Apr 2022 - Mar 2025)",
+            title=f"Stock Price Trend ({first_obs:%b %Y} - {last_obs:%b %Y})",
+            xaxis_type='date',
             height=300,
             hovermode='x unified',
             margin=dict(l=20, r=20, t=40, b=20)
@@ -273,20 +461,26 @@ if page == "🏠 Executive Summary":
         st.plotly_chart(fig_mini, use_container_width=True)
     
     with col_ctx2:
-        st.markdown("""
+        quality = load_quality_report(model)
+        checks = quality.to_frame().sum()
+        st.markdown(f"""
         **Analysis Period Characteristics:**
         
-        - **Duration:** 01 April 2022 to 28 March 2025 (3 years)
-        - **Observations:** 739 daily price points
+        - **Duration:** {first_obs:%d %B %Y} to {last_obs:%d %B %Y} ({(last_obs - first_obs).days / 365.25:.1f} years)
+        - **Observations:** {len(prices)} daily price points
         - **Market Environment:** Post-pandemic recovery, inflation concerns, rate hikes
         - **Sector Context:** Digital transformation acceleration, AI adoption
         
         **Data Quality:**
         - Adjusted closing prices (dividends & corporate actions)
         - Aligned stock and market data by date
-        - Zero missing values after cleaning
+        - Quality check on {quality.sessions} sessions: {checks['missing']} missing, {checks['stale']} stale, {checks['outliers']} outlier and {checks['corporate_actions']} corporate-action flags
         - Multiple frequency analysis (daily/weekly/monthly)
         """)
+        with st.expander("Data-quality report"):
+            st.dataframe(quality.to_frame(), use_container_width=True)
+            st.caption(f"Run {quality.run_at} • fill policy: {quality.config['fill']} "
+                       f"(max gap {quality.config['max_gap']} sessions)")
 
 
 # ==============================================
@@ -300,9 +494,9 @@ elif page == "📈 Market Analysis":
     fig_prices = make_subplots(specs=[[{"secondary_y": True}]])
     
     fig_prices.add_trace(
-        go.Scatter(
-            x=prices.index,
-            y=prices["Stock_Close"],
+        scatter(
+            x=prices.dates,
+            y=prices.stock,
             name="HCL Stock Price",
             line=dict(color='#3b82f6', width=2.5),
             hovertemplate='%{x|%d %b %Y}<br>HCL: ₹%{y:.2f}<extra></extra>'
@@ -311,9 +505,9 @@ elif page == "📈 Market Analysis":
     )
     
     fig_prices.add_trace(
-        go.Scatter(
-            x=prices.index,
-            y=prices["Market_Close"],
+        scatter(
+            x=prices.dates,
+            y=prices.market,
             name="NIFTY 50 Index",
             line=dict(color='#f59e0b', width=2.5, dash='dash'),
             hovertemplate='%{x|%d %b %Y}<br>NIFTY: %{y:.2f}<extra></extra>'
@@ -321,7 +515,7 @@ elif page == "📈 Market Analysis":
         secondary_y=True
     )
     
-    fig_prices.update_xaxes(title_text="Date", showgrid=True, gridwidth=1, gridcolor='lightgray')
+    fig_prices.update_xaxes(title_text="Date", type="date", showgrid=True, gridwidth=1, gridcolor='lightgray')
     fig_prices.update_yaxes(title_text="<b>HCL Stock Price (₹)</b>", secondary_y=False, showgrid=True)
     fig_prices.update_yaxes(title_text="<b>NIFTY 50 Index</b>", secondary_y=True)
     
@@ -345,7 +539,7 @@ elif page == "📈 Market Analysis":
         # Histogram with KDE
         fig_hist = go.Figure()
         fig_hist.add_trace(go.Histogram(
-            x=rets["Stock_Close"]*100,
+            x=rets.stock*100,
             nbinsx=50,
             name='Returns',
             marker_color='#3b82f6',
@@ -362,27 +556,28 @@ elif page == "📈 Market Analysis":
         )
         st.plotly_chart(fig_hist, use_container_width=True)
         
-        # Statistics
+        # Statistics (pandas for sample skewness and excess kurtosis)
+        stock_rets = pd.Series(rets.stock)
         st.markdown(f"""
         **Distribution Statistics:**
-        - Mean: {rets['Stock_Close'].mean()*100:.3f}%
-        - Median: {rets['Stock_Close'].median()*100:.3f}%
-        - Std Dev: {rets['Stock_Close'].std()*100:.3f}%
-        - Skewness: {rets['Stock_Close'].skew():.3f}
-        - Kurtosis: {rets['Stock_Close'].kurtosis():.3f}
+        - Mean: {stock_rets.mean()*100:.3f}%
+        - Median: {stock_rets.median()*100:.3f}%
+        - Std Dev: {stock_rets.std()*100:.3f}%
+        - Skewness: {stock_rets.skew():.3f}
+        - Kurtosis: {stock_rets.kurtosis():.3f}
         """)
     
     with col_ret2:
         # Box plot
         fig_box = go.Figure()
         fig_box.add_trace(go.Box(
-            y=rets["Stock_Close"]*100,
+            y=rets.stock*100,
             name='HCL Returns',
             marker_color='#8b5cf6',
             boxmean='sd'
         ))
         fig_box.add_trace(go.Box(
-            y=rets["Market_Close"]*100,
+            y=rets.market*100,
             name='Market Returns',
             marker_color='#f59e0b',
             boxmean='sd'
@@ -399,10 +594,10 @@ elif page == "📈 Market Analysis":
         # Comparison metrics
         st.markdown(f"""
         **Comparative Metrics:**
-        - Stock Volatility: {rets['Stock_Close'].std()*100:.3f}%
-        - Market Volatility: {rets['Market_Close'].std()*100:.3f}%
-        - Correlation: {rets['Stock_Close'].corr(rets['Market_Close']):.3f}
-        - Sharpe Approximation: {(rets['Stock_Close'].mean() / rets['Stock_Close'].std()):.3f}
+        - Stock Volatility: {rets.stock.std(ddof=1)*100:.3f}%
+        - Market Volatility: {rets.market.std(ddof=1)*100:.3f}%
+        - Correlation: {np.corrcoef(rets.stock, rets.market)[0, 1]:.3f}
+        - Sharpe Approximation: {(rets.stock.mean() / rets.stock.std(ddof=1)):.3f}
         """)
     
     st.markdown("---")
@@ -410,20 +605,20 @@ elif page == "📈 Market Analysis":
     # Cumulative returns
     st.markdown("### 📈 Cumulative Performance")
     
-    cum_stock = (1 + rets["Stock_Close"]).cumprod()
-    cum_market = (1 + rets["Market_Close"]).cumprod()
+    cum_stock = np.cumprod(1 + rets.stock)
+    cum_market = np.cumprod(1 + rets.market)
     
     fig_cum = go.Figure()
-    fig_cum.add_trace(go.Scatter(
-        x=rets.index,
+    fig_cum.add_trace(scatter(
+        x=rets.dates,
         y=(cum_stock - 1) * 100,
         name='HCL Technologies',
         line=dict(color='#3b82f6', width=3),
         fill='tozeroy',
         fillcolor='rgba(59, 130, 246, 0.1)'
     ))
-    fig_cum.add_trace(go.Scatter(
-        x=rets.index,
+    fig_cum.add_trace(scatter(
+        x=rets.dates,
         y=(cum_market - 1) * 100,
         name='NIFTY 50',
         line=dict(color='#f59e0b', width=3, dash='dash')
@@ -432,6 +627,7 @@ elif page == "📈 Market Analysis":
     fig_cum.update_layout(
         title=f"Cumulative Returns Comparison • {freq} Frequency",
         xaxis_title="Date",
+        xaxis_type='date',
         yaxis_title="Cumulative Return (%)",
         height=400,
         hovermode='x unified',
@@ -439,6 +635,119 @@ elif page == "📈 Market Analysis":
     )
     
     st.plotly_chart(fig_cum, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # Redraws on its own when the frontier options change
+    @st.fragment
+    def portfolio_frontier(prices, rf):
+        st.markdown("### 🧺 Portfolio Role: Efficient Frontier")
+        
+        col_pf1, col_pf2 = st.columns([2, 1])
+        with col_pf1:
+            peer_file = st.file_uploader(
+                "Peer and asset prices", type=["csv", "xlsx"],
+                help="Daily closes: a date column, then one column per asset. Joined with HCL and NIFTY 50 "
+                     "on common trading days"
+            )
+        with col_pf2:
+            allow_short = st.toggle("Allow short sales", value=False)
+            shrink = st.toggle("Ledoit-Wolf shrinkage", value=True,
+                               help="Shrink the sample covariance towards a scaled identity")
+        
+        panel = pd.DataFrame({"HCL Technologies": prices.stock, "NIFTY 50": prices.market},
+                             index=pd.DatetimeIndex(prices.dates))
+        if peer_file is not None:
+            try:
+                peers = load_price_panel(peer_file)
+            except (ValueError, KeyError) as e:
+                st.error(f"Could not read the price file: {e}")
+            else:
+                panel = panel.join(peers.drop(columns=panel.columns, errors="ignore"), how="left")
+        panel_returns = returns_panel(panel)
+        if "HCL Technologies" not in panel_returns or len(panel_returns) < 3:
+            st.warning("Too few common trading days in the selected period to estimate a frontier.")
+            return
+        
+        daily = model.frequency("Daily")
+        front = efficient_frontier(panel_returns, daily.periods_per_year, rf, shrink=shrink,
+                                   allow_short=allow_short)
+        weights = front.table()
+        hcl = front.assets.index("HCL Technologies")
+        vol = np.sqrt(np.diag(front.cov))
+        
+        col_pm1, col_pm2, col_pm3, col_pm4 = st.columns(4)
+        with col_pm1:
+            st.metric("Assets", f"{len(front.assets)}", f"{len(panel_returns)} daily returns", delta_color="off")
+        with col_pm2:
+            st.metric("Shrinkage Intensity", f"{front.shrinkage:.3f}", "Ledoit-Wolf" if shrink else "Sample",
+                      delta_color="off")
+        with col_pm3:
+            st.metric("HCL in Max-Sharpe", f"{weights['Max Sharpe'].iloc[hcl]*100:.1f}%")
+        with col_pm4:
+            st.metric("HCL in Min-Variance", f"{weights['Min Variance'].iloc[hcl]*100:.1f}%")
+        
+        fig_frontier = go.Figure()
+        fig_frontier.add_trace(go.Scatter(
+            x=front.vols * 100,
+            y=front.returns * 100,
+            mode='lines',
+            name='Efficient Frontier',
+            line=dict(color='#3b82f6', width=3)
+        ))
+        fig_frontier.add_trace(go.Scatter(
+            x=vol * 100,
+            y=front.mean * 100,
+            mode='markers+text' if len(front.assets) <= 20 else 'markers',
+            name='Assets',
+            text=list(front.assets),
+            textposition='top center',
+            marker=dict(size=np.where(np.arange(len(front.assets)) == hcl, 14, 8),
+                        color=np.where(np.arange(len(front.assets)) == hcl, '#ef4444', '#94a3b8')),
+            hovertemplate='<b>%{text}</b><br>Vol %{x:.2f}% • Return %{y:.2f}%<extra></extra>'
+        ))
+        for label, w, symbol in [("Min Variance", front.min_variance, 'diamond'),
+                                 ("Max Sharpe", front.max_sharpe, 'star')]:
+            p_ret, p_vol, p_sharpe = front.stats(w)
+            if np.isfinite(p_vol):
+                fig_frontier.add_trace(go.Scatter(
+                    x=[p_vol * 100],
+                    y=[p_ret * 100],
+                    mode='markers',
+                    name=f"{label} (Sharpe {p_sharpe:.2f})",
+                    marker=dict(size=16, symbol=symbol, color='#10b981', line=dict(width=1, color='white'))
+                ))
+        t_ret, t_vol, _ = front.stats(front.max_sharpe)
+        if np.isfinite(t_vol):
+            x_max = max(float(front.vols.max()), float(vol.max())) * 100
+            fig_frontier.add_trace(go.Scatter(
+                x=[0, x_max],
+                y=[rf * 100, (rf + (t_ret - rf) / t_vol * x_max / 100) * 100],
+                mode='lines',
+                name='Capital Market Line',
+                line=dict(color='#f59e0b', width=2, dash='dash')
+            ))
+        fig_frontier.update_layout(
+            title=f"Mean-Variance Frontier ({'short sales allowed' if allow_short else 'long only'})",
+            xaxis_title="Annualized Volatility (%)",
+            yaxis_title="Annualized Return (%)",
+            height=500,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_frontier, use_container_width=True)
+        
+        st.dataframe(
+            weights.reindex(weights['Max Sharpe'].abs().sort_values(ascending=False).index).head(20)
+            .style.format("{:.1%}", na_rep="–"),
+            use_container_width=True
+        )
+        st.caption("Means and covariances are annualized daily returns over the analysis period; rf is the "
+                   "workbook's risk-free rate. Historical means are noisy estimates of expected returns, so "
+                   "weights move a lot between periods. With short sales, the frontier and both portfolios are "
+                   "closed form. Long-only portfolios come from a batched projected-gradient QP, and the "
+                   "long-only max-Sharpe portfolio is the best point on the traced frontier.")
+    
+    portfolio_frontier(prices, rf)
 
 
 # ==============================================
@@ -449,26 +758,11 @@ elif page == "⚖️ Risk & Return":
     st.markdown("### ⚙️ Multi-Frequency Risk-Return Analysis")
     
     # Risk-Return comparison across frequencies
-    try:
-        risk_data = pd.DataFrame({
-            'Frequency': ['Daily', 'Weekly', 'Monthly'],
-            'Annualized Return (%)': [
-                risk_summary.loc["Daily", "Annualized_Return"] * 100,
-                risk_summary.loc["Weekly", "Annualized_Return"] * 100,
-                risk_summary.loc["Monthly", "Annualized_Return"] * 100
-            ],
-            'Annualized Volatility (%)': [
-                risk_summary.loc["Daily", "Annualized_StdDev"] * 100,
-                risk_summary.loc["Weekly", "Annualized_StdDev"] * 100,
-                risk_summary.loc["Monthly", "Annualized_StdDev"] * 100
-            ]
-        })
-    except:
-        risk_data = pd.DataFrame({
-            'Frequency': ['Daily', 'Weekly', 'Monthly'],
-            'Annualized Return (%)': [17.51, 17.16, 19.70],
-            'Annualized Volatility (%)': [23.02, 22.85, 22.54]
-        })
+    risk_data = pd.DataFrame({
+        'Frequency': list(windows),
+        'Annualized Return (%)': [w.ann_return * 100 for w in windows.values()],
+        'Annualized Volatility (%)': [w.ann_vol * 100 for w in windows.values()]
+    })
     
     col_rr1, col_rr2 = st.columns(2)
     
@@ -522,17 +816,16 @@ elif page == "⚖️ Risk & Return":
     with col_capm1:
         # Enhanced scatter plot with regression
         fig_capm = px.scatter(
-            rets.reset_index(),
-            x="Market_Close",
-            y="Stock_Close",
+            x=rets.market,
+            y=rets.stock,
             trendline="ols",
             title=f"Security Market Line • {freq} Returns",
-            labels={"Market_Close": "Market Excess Returns", "Stock_Close": "Stock Excess Returns"}
+            labels={"x": "Market Excess Returns", "y": "Stock Excess Returns"}
         )
         
         # Get regression results
-        beta = capm.loc[freq, "Beta"]
-        alpha = capm.loc[freq, "Alpha"]
+        beta = window.beta
+        alpha = window.alpha
         
         # Update traces
         fig_capm.data[0].update(
@@ -551,9 +844,9 @@ elif page == "⚖️ Risk & Return":
         st.markdown("#### CAPM Regression Results")
         
         # Metrics display
-        beta_val = capm.loc[freq, "Beta"]
-        alpha_val = capm.loc[freq, "Alpha"]
-        r2_val = capm.loc[freq, "R_squared"]
+        beta_val = window.beta
+        alpha_val = window.alpha
+        r2_val = window.r_squared
         
         st.metric("Beta (β)", f"{beta_val:.4f}", 
                  "Defensive" if beta_val < 1 else "Aggressive")
@@ -581,16 +874,8 @@ elif page == "⚖️ Risk & Return":
     
     beta_comparison = pd.DataFrame({
         'Frequency': ['Daily', 'Weekly', 'Monthly'],
-        'Equity Beta': [
-            capm.loc["Daily", "Beta"],
-            capm.loc["Weekly", "Beta"],
-            capm.loc["Monthly", "Beta"]
-        ],
-        'R²': [
-            capm.loc["Daily", "R_squared"],
-            capm.loc["Weekly", "R_squared"],
-            capm.loc["Monthly", "R_squared"]
-        ]
+        'Equity Beta': [w.beta for w in windows.values()],
+        'R²': [w.r_squared for w in windows.values()]
     })
     
     fig_beta = go.Figure()
@@ -602,23 +887,52 @@ elif page == "⚖️ Risk & Return":
         line=dict(color='#3b82f6', width=3),
         marker=dict(size=12)
     ))
-    fig_beta.add_hline(y=1.0, line_dash="dash", line_color="red", 
+    
+    # Nonsynchronous-trading corrected estimators
+    period_returns = {f.name: f.returns.between(period_start, period_end) for f in model.frequencies}
+    beta_nonsync = results.call(
+        beta_table, {name: r for name, r in period_returns.items() if len(r) > 4}
+    ).reindex(list(FREQUENCIES))
+    for col, name, color in [("Dimson_Beta", "Dimson Beta", '#10b981'),
+                             ("Scholes_Williams_Beta", "Scholes-Williams Beta", '#f59e0b')]:
+        fig_beta.add_trace(go.Scatter(
+            x=beta_comparison['Frequency'],
+            y=beta_nonsync.loc[beta_comparison['Frequency'], col],
+            mode='lines+markers',
+            name=name,
+            line=dict(color=color, width=2, dash='dot'),
+            marker=dict(size=10)
+        ))
+    fig_beta.add_hline(y=1.0, line_dash="dash", line_color="red",
                       annotation_text="Market Beta = 1.0")
     
     fig_beta.update_layout(
         title="Beta Estimates Across Time Horizons",
         yaxis_title="Beta",
-        height=400
+        height=400,
+        hovermode='x unified'
     )
     st.plotly_chart(fig_beta, use_container_width=True)
     
+    st.dataframe(
+        beta_nonsync.style.format({
+            'OLS_Beta': "{:.4f}", 'Dimson_Beta': "{:.4f}", 'Scholes_Williams_Beta': "{:.4f}",
+            'Market_Autocorr': "{:.4f}", 'R_squared': "{:.4f}", 'Observations': "{:.0f}"
+        }, na_rep="–"),
+        use_container_width=True
+    )
+    st.caption("Dimson (sum of lag, contemporaneous and lead slopes) and Scholes-Williams estimators correct for "
+               "nonsynchronous closes between HCLTECH.NS and ^NSEI. Table OLS uses the same trimmed sample.")
+    
     col_beta1, col_beta2, col_beta3 = st.columns(3)
     
     with col_beta1:
         st.success(f"""
         **Daily Beta: {beta_comparison.loc[0, 'Equity Beta']:.3f}**
         
-        Captures short-term market noise and trading dynamics. Higher beta reflects intraday volatility.
+        Captures short-term market noise and trading dynamics. Part of the gap to the monthly beta is
+        nonsynchronous trading bias rather than volatility: Dimson {beta_nonsync.loc['Daily', 'Dimson_Beta']:.3f},
+        Scholes-Williams {beta_nonsync.loc['Daily', 'Scholes_Williams_Beta']:.3f}.
         """)
     
     with col_beta2:
@@ -634,6 +948,108 @@ elif page == "⚖️ Risk & Return":
         
         Long-term systematic risk. Lower beta indicates fundamental stability dominates.
         """)
+    
+    st.markdown("---")
+    
+    # Market-model event study
+    st.markdown("### 📅 Event Study: Abnormal Returns Around Corporate Events")
+    
+    col_ev1, col_ev2 = st.columns([1, 2])
+    with col_ev1:
+        event_text = st.text_area("Event dates", height=150, placeholder="2024-01-12\n2024-04-26\n...",
+                                  help="Earnings, dividend or deal announcement dates, one per line")
+    with col_ev2:
+        event_window = st.slider("Event window (trading days)", -20, 20, DEFAULT_WINDOW)
+        estimation_window = st.slider("Estimation window (trading days)", -500, -2, DEFAULT_ESTIMATION,
+                                      help="Market-model alpha and beta are fitted on this window before each event")
+    
+    try:
+        event_dates = parse_event_dates(event_text)
+    except (ValueError, TypeError) as e:
+        st.error(f"Could not read the event dates: {e}")
+        event_dates = None
+    
+    if event_dates is None or not len(event_dates):
+        st.info("Enter event dates to estimate abnormal (AR) and cumulative abnormal returns (CAR) around them.")
+    elif estimation_window[1] >= event_window[0]:
+        st.error("The estimation window must end before the event window starts.")
+    else:
+        # Full daily history: estimation windows usually reach back before the analysis period
+        study = results.call(study_series, model.frequency("Daily").returns, event_dates,
+                             estimation_window, event_window)
+        event_summary = study.summary()
+        n_valid = int(study.valid.sum())
+        
+        if not n_valid:
+            daily_dates = model.frequency("Daily").returns.dates
+            st.warning(f"None of the {len(event_dates)} entered events could be studied: each needs a full "
+                       f"estimation window ({estimation_window[0]} to {estimation_window[1]} trading days) and "
+                       f"event window inside the daily history "
+                       f"({pd.Timestamp(daily_dates[0]):%Y-%m-%d} to {pd.Timestamp(daily_dates[-1]):%Y-%m-%d}). "
+                       "Enter later dates or shorten the estimation window.")
+        else:
+            col_es1, col_es2, col_es3, col_es4 = st.columns(4)
+            with col_es1:
+                st.metric("Events Studied", f"{n_valid}", f"of {len(event_dates)} entered", delta_color="off")
+            with col_es2:
+                st.metric("Day-0 AAR", f"{event_summary.loc[0, 'AAR']*100:.2f}%" if 0 in event_summary.index else "–",
+                          f"t = {event_summary.loc[0, 'AAR t']:.2f}" if 0 in event_summary.index else None,
+                          delta_color="off")
+            with col_es3:
+                st.metric(f"CAAR [{event_window[0]}, {event_window[1]}]",
+                          f"{event_summary['CAAR'].iloc[-1]*100:.2f}%",
+                          f"t = {event_summary['CAAR t'].iloc[-1]:.2f}", delta_color="off")
+            with col_es4:
+                st.metric("Positive CARs", f"{event_summary['Positive CAR %'].iloc[-1]*100:.0f}%")
+            
+            # 95% band from the pooled estimation-window variance
+            band = 1.96 * event_summary['CAAR'] / event_summary['CAAR t']
+            fig_event = make_subplots(specs=[[{"secondary_y": True}]])
+            fig_event.add_trace(go.Bar(
+                x=event_summary.index,
+                y=event_summary['AAR'] * 100,
+                name='AAR',
+                marker_color='#94a3b8'
+            ), secondary_y=True)
+            fig_event.add_trace(go.Scatter(
+                x=np.concatenate([event_summary.index, event_summary.index[::-1]]),
+                y=np.concatenate([band, -band[::-1]]) * 100,
+                fill='toself',
+                fillcolor='rgba(59, 130, 246, 0.15)',
+                line=dict(width=0),
+                name='95% band',
+                hoverinfo='skip'
+            ))
+            fig_event.add_trace(go.Scatter(
+                x=event_summary.index,
+                y=event_summary['CAAR'] * 100,
+                mode='lines+markers',
+                name='CAAR',
+                line=dict(color='#3b82f6', width=3)
+            ))
+            fig_event.add_vline(x=0, line_dash="dash", line_color="red")
+            fig_event.update_layout(
+                title="Average Abnormal and Cumulative Abnormal Returns",
+                xaxis_title="Trading days relative to event",
+                height=420,
+                hovermode='x unified'
+            )
+            fig_event.update_yaxes(title_text="CAAR (%)", secondary_y=False)
+            fig_event.update_yaxes(title_text="AAR (%)", secondary_y=True, showgrid=False)
+            st.plotly_chart(fig_event, use_container_width=True)
+        
+        st.dataframe(
+            study.events.drop(columns="Ticker").style.format({
+                'Event Date': '{:%Y-%m-%d}', 'Day 0': '{:%Y-%m-%d}', 'Alpha': '{:.5f}', 'Beta': '{:.3f}',
+                'Residual Vol': '{:.2%}', 'AR Day 0': '{:.2%}', 'CAR': '{:.2%}', 'CAR t': '{:.2f}',
+            }, na_rep="–"),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Market model fitted on each event's estimation window from the full daily history, "
+                   "independent of the analysis period. Events whose windows fall outside the data are not "
+                   "studied. t-statistics use the estimation-window residual variance; the cross-sectional "
+                   "CAAR t-statistic is in `fmwai.event_study`.")
 
 
 # ==============================================
@@ -643,193 +1059,256 @@ elif page == "💰 Capital Structure":
     
     st.markdown("### 🏦 Capital Structure & Cost of Capital Analysis")
     
-    # Use pre-calculated metrics
-    col_cs1, col_cs2, col_cs3 = st.columns(3)
-    
-    with col_cs1:
-        st.metric("Cost of Equity (Ke)", f"{ke*100:.2f}%", "CAPM-based")
-    with col_cs2:
-        st.metric("After-tax Cost of Debt (Kd)", f"{kd_after_tax*100:.2f}%", 
-                 f"Pre-tax: {kd_pre_tax:.2f}%")
-    with col_cs3:
-        st.metric("Tax Shield Benefit", f"{(kd_pre_tax/100 - kd_after_tax)*100:.2f}%", 
-                 f"Tax Rate: {tax_rate*100:.0f}%")
-    
-    st.markdown("---")
-    
-    # WACC Comparison
-    st.markdown("### 📉 WACC Analysis: Current vs Target Structure")
-    
-    wacc_df = pd.DataFrame({
-        'Structure': ['Current\n(All Equity)', f'Target\n({debt_pct}% Debt)'],
-        'WACC (%)': [wacc_current*100, wacc_target*100],
-        'Debt %': [0, debt_pct],
-        'Equity %': [100, 100-debt_pct]
-    })
-    
-    col_w1, col_w2 = st.columns(2)
-    
-    with col_w1:
-        fig_wacc = go.Figure(data=[
-            go.Bar(
-                x=wacc_df['Structure'],
-                y=wacc_df['WACC (%)'],
-                text=wacc_df['WACC (%)'].round(2),
-                textposition='outside',
-                marker_color=['#3b82f6', '#10b981'],
-                width=0.5
-            )
-        ])
-        fig_wacc.update_layout(
-            title="WACC Comparison",
-            yaxis_title="WACC (%)",
-            height=400
-        )
-        st.plotly_chart(fig_wacc, use_container_width=True)
+    # Everything below depends on the what-if sliders and reruns on its own when they move
+    @st.fragment
+    def capital_structure(ke, rf, beta_ke, market_premium, windows):
+        debt_pct, kd_pre_tax = what_if_controls()
+        kd_after_tax = (kd_pre_tax / 100) * (1 - tax_rate)
+        wacc_current = ke  # Assuming all equity currently
+        wacc_target = target_wacc(ke, debt_pct / 100, kd_pre_tax / 100, tax_rate)
         
-        wacc_reduction = (wacc_current - wacc_target) * 100
-        st.success(f"""
-        **💡 Value Creation Opportunity**
+        col_cs1, col_cs2, col_cs3 = st.columns(3)
         
-        Target capital structure reduces WACC by **{wacc_reduction:.2f} basis points** 
-        ({wacc_reduction/100:.2f}%), indicating potential for value enhancement through 
-        moderate leverage.
-        """)
-    
-    with col_w2:
-        # Capital structure pie charts
-        fig_pie = make_subplots(
-            rows=1, cols=2,
-            specs=[[{'type':'pie'}, {'type':'pie'}]],
-            subplot_titles=('Current Structure', 'Target Structure')
-        )
+        with col_cs1:
+            st.metric("Cost of Equity (Ke)", f"{ke*100:.2f}%", "CAPM-based")
+        with col_cs2:
+            st.metric("After-tax Cost of Debt (Kd)", f"{kd_after_tax*100:.2f}%", 
+                     f"Pre-tax: {kd_pre_tax:.2f}%")
+        with col_cs3:
+            st.metric("Tax Shield Benefit", f"{(kd_pre_tax/100 - kd_after_tax)*100:.2f}%", 
+                     f"Tax Rate: {tax_rate*100:.0f}%")
         
-        fig_pie.add_trace(go.Pie(
-            labels=['Equity'],
-            values=[100],
-            marker_colors=['#3b82f6'],
-            hole=0.4
-        ), 1, 1)
+        st.markdown("---")
         
-        fig_pie.add_trace(go.Pie(
-            labels=['Equity', 'Debt'],
-            values=[100-debt_pct, debt_pct],
-            marker_colors=['#3b82f6', '#f59e0b'],
-            hole=0.4
-        ), 1, 2)
+        # WACC Comparison
+        st.markdown("### 📉 WACC Analysis: Current vs Target Structure")
         
-        fig_pie.update_layout(height=400, showlegend=True)
-        st.plotly_chart(fig_pie, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Beta adjustments
-    st.markdown("### 🔄 Asset Beta & Relevering Analysis")
-    
-    st.markdown("""
-    To isolate **business risk** from **financial risk**, equity betas are unlevered to obtain 
-    asset betas, then relevered using the target capital structure.
-    """)
-    
-    try:
-        beta_data = pd.DataFrame({
-            'Frequency': ['Daily', 'Weekly', 'Monthly'],
-            'Equity Beta': [
-                beta_adj.loc["Daily", "Equity_Beta"],
-                beta_adj.loc["Weekly", "Equity_Beta"],
-                beta_adj.loc["Monthly", "Equity_Beta"]
-            ],
-            'Asset Beta': [
-                beta_adj.loc["Daily", "Asset_Beta"],
-                beta_adj.loc["Weekly", "Asset_Beta"],
-                beta_adj.loc["Monthly", "Asset_Beta"]
-            ],
-            'Relevered Beta': [
-                beta_adj.loc["Daily", "Relevered_Beta"],
-                beta_adj.loc["Weekly", "Relevered_Beta"],
-                beta_adj.loc["Monthly", "Relevered_Beta"]
-            ]
+        wacc_df = pd.DataFrame({
+            'Structure': ['Current\n(All Equity)', f'Target\n({debt_pct}% Debt)'],
+            'WACC (%)': [wacc_current*100, wacc_target*100],
+            'Debt %': [0, debt_pct],
+            'Equity %': [100, 100-debt_pct]
         })
-    except:
-        # Fallback calculations
+        
+        col_w1, col_w2 = st.columns(2)
+        
+        with col_w1:
+            fig_wacc = go.Figure(data=[
+                go.Bar(
+                    x=wacc_df['Structure'],
+                    y=wacc_df['WACC (%)'],
+                    text=wacc_df['WACC (%)'].round(2),
+                    textposition='outside',
+                    marker_color=['#3b82f6', '#10b981'],
+                    width=0.5
+                )
+            ])
+            fig_wacc.update_layout(
+                title="WACC Comparison",
+                yaxis_title="WACC (%)",
+                height=400
+            )
+            st.plotly_chart(fig_wacc, use_container_width=True)
+            
+            wacc_reduction = (wacc_current - wacc_target) * 100
+            st.success(f"""
+            **💡 Value Creation Opportunity**
+            
+            Target capital structure reduces WACC by **{wacc_reduction:.2f} basis points** 
+            ({wacc_reduction/100:.2f}%), indicating potential for value enhancement through 
+            moderate leverage.
+            """)
+        
+        with col_w2:
+            # Capital structure pie charts
+            fig_pie = make_subplots(
+                rows=1, cols=2,
+                specs=[[{'type':'pie'}, {'type':'pie'}]],
+                subplot_titles=('Current Structure', 'Target Structure')
+            )
+            
+            fig_pie.add_trace(go.Pie(
+                labels=['Equity'],
+                values=[100],
+                marker_colors=['#3b82f6'],
+                hole=0.4
+            ), 1, 1)
+            
+            fig_pie.add_trace(go.Pie(
+                labels=['Equity', 'Debt'],
+                values=[100-debt_pct, debt_pct],
+                marker_colors=['#3b82f6', '#f59e0b'],
+                hole=0.4
+            ), 1, 2)
+            
+            fig_pie.update_layout(height=400, showlegend=True)
+            st.plotly_chart(fig_pie, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Beta adjustments
+        st.markdown("### 🔄 Asset Beta & Relevering Analysis")
+        
+        st.markdown("""
+        To isolate **business risk** from **financial risk**, equity betas are unlevered to obtain 
+        asset betas, then relevered using the target capital structure.
+        """)
+        
         beta_data = pd.DataFrame({
-            'Frequency': ['Daily', 'Weekly', 'Monthly'],
-            'Equity Beta': [0.87, 0.82, 0.71],
-            'Asset Beta': [0.84, 0.79, 0.68],
-            'Relevered Beta': [1.05, 0.99, 0.85]
+            'Frequency': list(windows),
+            'Equity Beta': [w.beta for w in windows.values()],
+            # Unlevered at the workbook's 25% D/V, relevered at the target debt ratio
+            'Asset Beta': [unlever_beta(w.beta, 0.25, tax_rate) for w in windows.values()],
+            'Relevered Beta': [relever_beta(unlever_beta(w.beta, 0.25, tax_rate), debt_pct / 100, tax_rate)
+                               for w in windows.values()]
         })
-    
-    fig_beta_adj = go.Figure()
-    
-    for col, color in zip(['Equity Beta', 'Asset Beta', 'Relevered Beta'], 
-                          ['#3b82f6', '#10b981', '#f59e0b']):
-        fig_beta_adj.add_trace(go.Scatter(
-            x=beta_data['Frequency'],
-            y=beta_data[col],
-            mode='lines+markers',
-            name=col,
-            line=dict(width=3, color=color),
-            marker=dict(size=10)
+        
+        fig_beta_adj = go.Figure()
+        
+        for col, color in zip(['Equity Beta', 'Asset Beta', 'Relevered Beta'], 
+                              ['#3b82f6', '#10b981', '#f59e0b']):
+            fig_beta_adj.add_trace(go.Scatter(
+                x=beta_data['Frequency'],
+                y=beta_data[col],
+                mode='lines+markers',
+                name=col,
+                line=dict(width=3, color=color),
+                marker=dict(size=10)
+            ))
+        
+        fig_beta_adj.update_layout(
+            title="Beta Transformation: Equity → Asset → Relevered",
+            yaxis_title="Beta",
+            height=450,
+            hovermode='x unified'
+        )
+        st.plotly_chart(fig_beta_adj, use_container_width=True)
+        
+        # Display table
+        st.dataframe(beta_data.set_index('Frequency').style.format("{:.4f}"), use_container_width=True)
+        
+        st.info("""
+        **🔍 Strategic Interpretation:**
+        - **Asset Beta** represents pure business risk (operations, industry, competitive position)
+        - **Relevering** at target structure increases equity beta but reduces overall WACC
+        - HCL's stable asset betas across frequencies indicate consistent underlying business risk
+        - Current conservative leverage suggests room for value creation through moderate debt
+        """)
+        
+        st.markdown("---")
+        
+        # Sensitivity Analysis
+        st.markdown("### 🎯 WACC Sensitivity Analysis")
+        
+        st.markdown("Explore how WACC changes with different capital structure assumptions:")
+        
+        with st.expander("Optimal capital structure assumptions (INR Crore)"):
+            col_a1, col_a2, col_a3 = st.columns(3)
+            with col_a1:
+                firm_ebit = st.number_input("EBIT", value=21400.0, step=500.0)
+                firm_value = st.number_input("Current Firm Value", value=426000.0, step=5000.0)
+            with col_a2:
+                firm_fcff = st.number_input("FCFF (current year)", value=22000.0, step=500.0)
+                firm_growth = st.slider("Perpetual FCFF Growth (%)", 0.0, 8.0, 4.5, step=0.25) / 100
+            with col_a3:
+                distress_cost = st.slider("Distress Cost (% of firm value)", 0, 50, 25, step=5) / 100
+        
+        cs = results.call(solve_capital_structure, FirmInputs(
+            asset_beta=beta_ke,  # firm is effectively unlevered today, so WACC at 0% debt is ke
+            rf=rf,
+            market_premium=market_premium,
+            tax_rate=tax_rate,
+            ebit=firm_ebit,
+            firm_value=firm_value,
+            fcff=firm_fcff,
+            growth=firm_growth,
+            distress_cost=distress_cost,
         ))
-    
-    fig_beta_adj.update_layout(
-        title="Beta Transformation: Equity → Asset → Relevered",
-        yaxis_title="Beta",
-        height=450,
-        hovermode='x unified'
-    )
-    st.plotly_chart(fig_beta_adj, use_container_width=True)
-    
-    # Display table
-    st.dataframe(beta_data.set_index('Frequency').style.format("{:.4f}"), use_container_width=True)
-    
-    st.info("""
-    **🔍 Strategic Interpretation:**
-    - **Asset Beta** represents pure business risk (operations, industry, competitive position)
-    - **Relevering** at target structure increases equity beta but reduces overall WACC
-    - HCL's stable asset betas across frequencies indicate consistent underlying business risk
-    - Current conservative leverage suggests room for value creation through moderate debt
-    """)
-    
-    st.markdown("---")
-    
-    # Sensitivity Analysis
-    st.markdown("### 🎯 WACC Sensitivity Analysis")
-    
-    st.markdown("Explore how WACC changes with different capital structure assumptions:")
-    
-    debt_range = np.arange(0, 41, 5)
-    wacc_range = [(1 - d/100) * ke + (d/100) * kd_after_tax for d in debt_range]
-    
-    fig_sens = go.Figure()
-    fig_sens.add_trace(go.Scatter(
-        x=debt_range,
-        y=np.array(wacc_range)*100,
-        mode='lines+markers',
-        line=dict(color='#3b82f6', width=3),
-        marker=dict(size=8),
-        fill='tozeroy',
-        fillcolor='rgba(59, 130, 246, 0.1)'
-    ))
-    
-    # Highlight current selection
-    fig_sens.add_trace(go.Scatter(
-        x=[debt_pct],
-        y=[wacc_target*100],
-        mode='markers',
-        marker=dict(size=15, color='red', symbol='star'),
-        name='Current Selection'
-    ))
-    
-    fig_sens.update_layout(
-        title="WACC vs Debt Percentage",
-        xaxis_title="Debt %",
-        yaxis_title="WACC (%)",
-        height=400,
-        showlegend=True
-    )
-    st.plotly_chart(fig_sens, use_container_width=True)
+        if not cs.converged:
+            st.warning("The cost of debt and interest coverage did not settle on a fixed point at every debt "
+                       "ratio; ratings shown follow the last iteration's cost of debt.")
+        
+        col_opt1, col_opt2, col_opt3 = st.columns(3)
+        with col_opt1:
+            st.metric("WACC-Minimizing Debt %", f"{cs.min_wacc_debt_ratio*100:.1f}%",
+                      f"WACC {cs.wacc[cs.min_wacc_idx]*100:.2f}% • {cs.rating[cs.min_wacc_idx]}", delta_color="off")
+        # Short periods can give a WACC at or below FCFF growth, where firm value is undefined
+        has_value = bool(np.isfinite(cs.firm_value).any())
+        if has_value:
+            with col_opt2:
+                st.metric("Value-Maximizing Debt %", f"{cs.max_value_debt_ratio*100:.1f}%",
+                          f"₹{cs.firm_value[cs.max_value_idx]:,.0f} Cr", delta_color="off")
+            with col_opt3:
+                st.metric("Value Gain vs All-Equity", f"₹{cs.firm_value[cs.max_value_idx] - cs.firm_value[0]:,.0f} Cr",
+                          f"{(cs.firm_value[cs.max_value_idx] / cs.firm_value[0] - 1)*100:.2f}%")
+        else:
+            with col_opt2:
+                st.warning("WACC does not exceed FCFF growth at any debt level in this period, "
+                           "so firm value is undefined.")
+        
+        debt_range = np.arange(0, 41, 5)
+        wacc_range = target_wacc(ke, debt_range / 100, kd_pre_tax / 100, tax_rate)
+        
+        fig_sens = make_subplots(specs=[[{"secondary_y": True}]])
+        fig_sens.add_trace(go.Scatter(
+            x=cs.debt_ratio*100,
+            y=cs.wacc*100,
+            mode='lines',
+            name='WACC (relevered Ke, rated Kd)',
+            line=dict(color='#3b82f6', width=3),
+            customdata=np.stack([cs.rating, cs.kd_pre_tax*100, cs.ke*100], axis=-1),
+            hovertemplate='Debt %{x:.1f}%<br>WACC %{y:.2f}%<br>Rating %{customdata[0]}'
+                          '<br>Kd %{customdata[1]:.2f}% • Ke %{customdata[2]:.2f}%<extra></extra>'
+        ), secondary_y=False)
+        fig_sens.add_trace(go.Scatter(
+            x=debt_range,
+            y=wacc_range*100,
+            mode='lines+markers',
+            name='WACC (constant Ke & Kd)',
+            line=dict(color='#94a3b8', width=2, dash='dash'),
+            marker=dict(size=6)
+        ), secondary_y=False)
+        fig_sens.add_trace(go.Scatter(
+            x=cs.debt_ratio*100,
+            y=cs.firm_value,
+            mode='lines',
+            name='Firm Value net of Distress',
+            line=dict(color='#10b981', width=2)
+        ), secondary_y=True)
+        fig_sens.add_vline(x=cs.min_wacc_debt_ratio*100, line_dash="dot", line_color="#3b82f6",
+                           annotation_text="Min WACC")
+        if has_value:
+            fig_sens.add_vline(x=cs.max_value_debt_ratio*100, line_dash="dot", line_color="#10b981",
+                               annotation_text="Max Value", annotation_position="bottom right")
+        
+        # Highlight current selection
+        fig_sens.add_trace(go.Scatter(
+            x=[debt_pct],
+            y=[wacc_target*100],
+            mode='markers',
+            marker=dict(size=15, color='red', symbol='star'),
+            name='Current Selection'
+        ), secondary_y=False)
+        
+        fig_sens.update_xaxes(title_text="Debt %")
+        fig_sens.update_yaxes(title_text="WACC (%)", secondary_y=False)
+        fig_sens.update_yaxes(title_text="Firm Value (INR Crore)", secondary_y=True)
+        fig_sens.update_layout(
+            title="WACC and Firm Value vs Debt Percentage",
+            height=450,
+            showlegend=True,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_sens, use_container_width=True)
 
+        st.info("""
+        **🔍 Optimal Structure:** Ke rises with the relevered beta and Kd steps up as interest coverage
+        falls through the synthetic rating bands, so WACC is U-shaped rather than falling linearly with debt.
+        The value-maximizing ratio also nets off expected distress costs (default probability × distress cost).
+        """)
+
+    
+    capital_structure(ke, rf, beta_ke, market_premium, windows)
 
 # ==============================================
 # PAGE 5: PROJECT VALUATION
@@ -852,6 +1331,10 @@ elif page == "🚀 Project Valuation":
     # Financial Performance
     st.markdown("### 📊 Pro-Forma Financial Performance (5-Year Projection)")
     
+    # Statements generated from the sidebar drivers (defaults reproduce Project_Financials)
+    project_fin = build_financials(project_drivers)
+    project = project_fin.to_frame()
+    
     # Revenue and FCFF trends
     col_proj1, col_proj2 = st.columns(2)
     
@@ -900,7 +1383,7 @@ elif page == "🚀 Project Valuation":
     # Financial metrics table
     st.markdown("#### Detailed Financial Projections")
     
-    project_display = project[['Revenue', 'EBITDA', 'EBIT', 'NOPAT', 'Capex', 'FCFF']].copy()
+    project_display = project[['Revenue', 'EBITDA', 'D&A', 'EBIT', 'Tax', 'NOPAT', 'Capex', 'Change_NWC', 'FCFF']].copy()
     project_display = project_display.round(2)
     
     # Display with gradient styling if matplotlib is available, otherwise plain
@@ -1011,121 +1494,659 @@ elif page == "🚀 Project Valuation":
     
     st.markdown("---")
     
-    # NPV and Valuation
-    st.markdown("### 💎 Project Valuation & Investment Decision")
-    
-    # Discount rate
-    discount_rate = wacc_target
-    
-    # Calculate NPV
-    years = np.arange(1, len(project) + 1)
-    pv_fcff = project['FCFF'] / ((1 + discount_rate) ** years)
-    npv = pv_fcff.sum()
-    
-    # Initial investment (approximate)
-    initial_investment = project['Capex'].iloc[0] * 1.5  # Rough estimate
-    npv_net = npv - initial_investment
-    
-    col_npv1, col_npv2, col_npv3, col_npv4 = st.columns(4)
-    
-    with col_npv1:
-        st.metric("Discount Rate (WACC)", f"{discount_rate*100:.2f}%")
-    with col_npv2:
-        st.metric("PV of FCFFs", f"₹{npv:.2f} Cr")
-    with col_npv3:
-        st.metric("Est. Initial Investment", f"₹{initial_investment:.2f} Cr")
-    with col_npv4:
-        st.metric("Net NPV", f"₹{npv_net:.2f} Cr", 
-                 "Accept" if npv_net > 0 else "Reject")
-    
-    # Cash flow waterfall
-    fig_waterfall = go.Figure(go.Waterfall(
-        x=['Initial<br>Investment'] + [f'Year {i}' for i in project.index] + ['Net NPV'],
-        y=[-initial_investment] + pv_fcff.tolist() + [npv_net],
-        measure=['relative'] + ['relative']*len(project) + ['total'],
-        text=[f'{-initial_investment:.2f}'] + [f'{v:.2f}' for v in pv_fcff] + [f'{npv_net:.2f}'],
-        textposition='outside',
-        connector={'line': {'color': 'rgb(63, 63, 63)'}},
-    ))
-    
-    fig_waterfall.update_layout(
-        title="NPV Waterfall: Present Value Buildup",
-        yaxis_title="Present Value (INR Crore)",
-        height=500,
-        showlegend=False
-    )
-    st.plotly_chart(fig_waterfall, use_container_width=True)
-    
-    if npv_net > 0:
-        st.success(f"""
-        **✅ Investment Recommendation: ACCEPT**
+    # NPV and everything discounted at the target WACC rerun on their own when the what-if sliders move
+    @st.fragment
+    def valuation(project_fin, project_drivers, ke, rf, beta_ke):
+        project = project_fin.to_frame()
         
-        The project generates a positive Net Present Value of **₹{npv_net:.2f} Crore**, indicating 
-        it creates value above the required return (WACC = {discount_rate*100:.2f}%). The asset-light 
-        model, high operating leverage, and scalable SaaS economics support a favorable investment decision.
-        """)
-    else:
-        st.error(f"""
-        **❌ Investment Recommendation: REJECT**
+        # NPV and Valuation
+        st.markdown("### 💎 Project Valuation & Investment Decision")
+        
+        debt_pct, kd_pre_tax = what_if_controls()
+        
+        # Discount rate
+        discount_rate = target_wacc(ke, debt_pct / 100, kd_pre_tax / 100, tax_rate)
+        
+        # Calculate NPV
+        years = np.arange(1, len(project) + 1)
+        pv_fcff = project['FCFF'] / ((1 + discount_rate) ** years)
+        tv = terminal_value(project_fin.FCFF, discount_rate, project_drivers.terminal_growth)[0]
+        pv_terminal = tv / (1 + discount_rate) ** len(project)
+        npv = pv_fcff.sum() + pv_terminal
+        
+        initial_investment = project_drivers.initial_investment
+        npv_net = npv - initial_investment
+        
+        col_npv1, col_npv2, col_npv3, col_npv4 = st.columns(4)
+        
+        with col_npv1:
+            st.metric("Discount Rate (WACC)", f"{discount_rate*100:.2f}%")
+        with col_npv2:
+            st.metric("PV of FCFFs", f"₹{npv:.2f} Cr",
+                     f"Terminal: ₹{pv_terminal:.2f} Cr" if pv_terminal else None, delta_color="off")
+        with col_npv3:
+            st.metric("Initial Investment", f"₹{initial_investment:.2f} Cr")
+        with col_npv4:
+            st.metric("Net NPV", f"₹{npv_net:.2f} Cr", 
+                     "Accept" if npv_net > 0 else "Reject")
+        
+        # Cash flow waterfall
+        fig_waterfall = go.Figure(go.Waterfall(
+            x=['Initial<br>Investment'] + list(project.index) + ['Terminal<br>Value'] * bool(pv_terminal) + ['Net NPV'],
+            y=[-initial_investment] + pv_fcff.tolist() + [pv_terminal] * bool(pv_terminal) + [npv_net],
+            measure=['relative'] + ['relative']*len(project) + ['relative'] * bool(pv_terminal) + ['total'],
+            text=([f'{-initial_investment:.2f}'] + [f'{v:.2f}' for v in pv_fcff]
+                  + [f'{pv_terminal:.2f}'] * bool(pv_terminal) + [f'{npv_net:.2f}']),
+            textposition='outside',
+            connector={'line': {'color': 'rgb(63, 63, 63)'}},
+        ))
+        
+        fig_waterfall.update_layout(
+            title="NPV Waterfall: Present Value Buildup",
+            yaxis_title="Present Value (INR Crore)",
+            height=500,
+            showlegend=False
+        )
+        st.plotly_chart(fig_waterfall, use_container_width=True)
+        
+        if npv_net > 0:
+            st.success(f"""
+            **✅ Investment Recommendation: ACCEPT**
+            
+            The project generates a positive Net Present Value of **₹{npv_net:.2f} Crore**, indicating 
+            it creates value above the required return (WACC = {discount_rate*100:.2f}%). The asset-light 
+            model, high operating leverage, and scalable SaaS economics support a favorable investment decision.
+            """)
+        else:
+            st.error(f"""
+            **❌ Investment Recommendation: REJECT**
+            
+            The project generates a negative Net Present Value of **₹{npv_net:.2f} Crore**, indicating 
+            it fails to meet the required return threshold.
+            """)
+        
+        with st.expander("💾 Save as scenario"):
+            with st.form("save_scenario", clear_on_submit=True, border=False):
+                col_sv1, col_sv2 = st.columns(2)
+                with col_sv1:
+                    scenario_name = st.text_input("Name", placeholder="e.g. 30% debt, fast growth")
+                with col_sv2:
+                    scenario_tags = st.text_input("Tags (comma-separated)", placeholder="e.g. board, levered")
+                scenario_notes = st.text_area("Notes", height=68)
+                if st.form_submit_button("Save"):
+                    if scenario_name.strip():
+                        load_scenario_store().save(Scenario(
+                            name=scenario_name.strip(),
+                            debt_pct=debt_pct / 100,
+                            kd_pre_tax=kd_pre_tax / 100,
+                            drivers=project_drivers,
+                            tags=tuple(dict.fromkeys(t.strip() for t in scenario_tags.split(",") if t.strip())),
+                            notes=scenario_notes,
+                        ))
+                        st.toast(f"Saved scenario '{scenario_name.strip()}'")
+                    else:
+                        st.warning("Give the scenario a name.")
+        
+        st.markdown("---")
+        
+        # Real options
+        st.markdown("### 🧭 Real Options: Value of Strategic Flexibility")
+        
+        with st.expander("Option assumptions", expanded=False):
+            col_ro1, col_ro2, col_ro3 = st.columns(3)
+            with col_ro1:
+                ro_sigma = st.slider("Project Value Volatility (%)", 10, 80, 35, step=5) / 100
+                ro_maturity = st.slider("Option Life (years)", 1, 5, 3)
+            with col_ro2:
+                ro_expand = st.slider("Expansion Scale (% of value)", 0, 100, 30, step=5) / 100
+                ro_expand_cost = st.number_input("Expansion Cost (INR Crore)", 0.0, 1000.0, 40.0, step=5.0)
+            with col_ro3:
+                ro_salvage = st.number_input("Abandonment Salvage (INR Crore)", 0.0, 1000.0, 90.0, step=5.0)
+                ro_steps = st.select_slider("Lattice Steps", [100, 500, 1000, 5000, 10000], value=1000)
+            ro_method = st.radio("Lattice", ["binomial", "trinomial"], horizontal=True, format_func=str.title)
+        
+        # FCFF paid out while an option is held is value the holder forgoes
+        ro_yield = project['FCFF'].iloc[0] / npv if npv > 0 else 0.0
+        ro = results.call(
+            value_real_options,
+            project_value=npv,
+            investment=initial_investment,
+            sigma=ro_sigma,
+            rate=rf,
+            maturity=ro_maturity,
+            expansion_factor=ro_expand,
+            expansion_cost=ro_expand_cost,
+            salvage=ro_salvage,
+            dividend_yield=ro_yield,
+            steps=ro_steps,
+            method=ro_method,
+        )
+        
+        col_opt1, col_opt2, col_opt3, col_opt4, col_opt5 = st.columns(5)
+        with col_opt1:
+            st.metric("Static NPV", f"₹{ro.static_npv:.2f} Cr")
+        with col_opt2:
+            st.metric("Expansion Option", f"₹{ro.expansion:.2f} Cr")
+        with col_opt3:
+            st.metric("Abandonment Option", f"₹{ro.abandonment:.2f} Cr")
+        with col_opt4:
+            st.metric("Value of Deferral", f"₹{ro.deferral:.2f} Cr",
+                      "Wait" if ro.deferral > 0 else "Invest now", delta_color="off")
+        with col_opt5:
+            st.metric("Expanded NPV", f"₹{ro.expanded_npv:.2f} Cr", f"+₹{ro.combined:.2f} Cr options")
+        
+        st.caption(f"Expanded NPV = static NPV + value of holding the expansion and abandonment options together "
+                   f"(American, {ro_steps:,}-step {ro_method} lattice on the PV of FCFF, payout yield "
+                   f"{ro_yield*100:.1f}%). Deferral compares investing later against investing today.")
+        
+        st.markdown("---")
+        
+        # Project risk considerations
+        st.markdown("### ⚠️ Risk Considerations & Sensitivity")
         
-        The project generates a negative Net Present Value of **₹{npv_net:.2f} Crore**, indicating 
-        it fails to meet the required return threshold.
+        col_risk1, col_risk2 = st.columns(2)
+        
+        with col_risk1:
+            st.markdown("""
+            **Key Project Risks:**
+            - **Market Risk:** Enterprise adoption rate uncertainty
+            - **Technology Risk:** AI/ML model performance and accuracy
+            - **Competition Risk:** Emerging competitors in AIOps space
+            - **Execution Risk:** Talent acquisition and retention
+            - **Integration Risk:** Customer IT environment complexity
+            - **Regulatory Risk:** Data privacy and cybersecurity compliance
+            """)
+        
+        with col_risk2:
+            # Simple sensitivity on discount rate
+            rates = np.arange(0.06, 0.16, 0.01)
+            npvs = project_npv(project_fin.FCFF[0], rates, initial_investment, project_drivers.terminal_growth)
+            
+            fig_sens_npv = go.Figure()
+            fig_sens_npv.add_trace(go.Scatter(
+                x=rates*100,
+                y=npvs,
+                mode='lines',
+                line=dict(color='#3b82f6', width=3),
+                fill='tozeroy'
+            ))
+            fig_sens_npv.add_hline(y=0, line_dash="dash", line_color="red")
+            fig_sens_npv.add_vline(x=discount_rate*100, line_dash="dot", line_color="green",
+                                  annotation_text=f"Current WACC<br>{discount_rate*100:.2f}%")
+            
+            fig_sens_npv.update_layout(
+                title="NPV Sensitivity to Discount Rate",
+                xaxis_title="Discount Rate (%)",
+                yaxis_title="NPV (INR Crore)",
+                height=350
+            )
+            st.plotly_chart(fig_sens_npv, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Driver sensitivity
+        st.markdown("### 🌪️ Driver Sensitivity: Tornado, Spider & Two-Way Analysis")
+        
+        # Row 0 of every design matrix reproduces the discount rate and NPV above
+        sens_base = SensitivityBase.from_ke(
+            ke=ke,
+            beta=beta_ke,
+            rf=rf,
+            kd_pre_tax=kd_pre_tax / 100,
+            tax_rate=tax_rate,
+            debt_pct=debt_pct / 100,
+            drivers=project_drivers,
+        )
+        
+        col_so1, col_so2 = st.columns(2)
+        with col_so1:
+            sens_metric = st.radio("Output", ["NPV", "WACC"], horizontal=True)
+        with col_so2:
+            sens_rel = st.slider("Perturbation (± % of base value)", 5, 50, 20, step=5) / 100
+        sens_scale = 100 if sens_metric == "WACC" else 1
+        sens_unit = "WACC (%)" if sens_metric == "WACC" else "NPV (INR Crore)"
+        
+        tab_tornado, tab_spider, tab_heat = st.tabs(["Tornado", "Spider", "Two-Way Heatmap"])
+        
+        with tab_tornado:
+            tor = results.call(tornado, sens_base, sens_rel).sort_values(f"{sens_metric}_Swing")
+            tor_base = tor.attrs[f"base_{sens_metric.lower()}"] * sens_scale
+        
+            fig_tornado = go.Figure()
+            for side, color in [("Low", '#ef4444'), ("High", '#10b981')]:
+                fig_tornado.add_trace(go.Bar(
+                    y=tor['Driver'],
+                    x=tor[f'{sens_metric}_{side}'] * sens_scale - tor_base,
+                    base=tor_base,
+                    orientation='h',
+                    name=f"{'-' if side == 'Low' else '+'}{sens_rel:.0%} of base",
+                    marker_color=color
+                ))
+            fig_tornado.add_vline(x=tor_base, line_dash="dash", line_color="gray")
+            fig_tornado.update_layout(
+                title=f"Tornado Chart • {sens_metric} (base {tor_base:.2f})",
+                xaxis_title=sens_unit,
+                barmode='overlay',
+                height=450
+            )
+            st.plotly_chart(fig_tornado, use_container_width=True)
+        
+        with tab_spider:
+            spd = results.call(spider, sens_base, np.linspace(-sens_rel, sens_rel, 11))
+        
+            fig_spider = go.Figure()
+            for driver, grp in spd.groupby('Driver', sort=False):
+                fig_spider.add_trace(go.Scatter(
+                    x=grp['Change'] * 100,
+                    y=grp[sens_metric] * sens_scale,
+                    mode='lines+markers',
+                    name=driver
+                ))
+            fig_spider.update_layout(
+                title=f"Spider Plot • {sens_metric}",
+                xaxis_title="Change in Driver (% of base)",
+                yaxis_title=sens_unit,
+                height=450,
+                hovermode='x unified'
+            )
+            st.plotly_chart(fig_spider, use_container_width=True)
+        
+        with tab_heat:
+            col_h1, col_h2 = st.columns(2)
+            with col_h1:
+                heat_x = st.selectbox("X-axis driver", DRIVERS, index=DRIVERS.index("debt_pct"),
+                                      format_func=DRIVER_LABELS.get)
+            with col_h2:
+                heat_y = st.selectbox("Y-axis driver", DRIVERS, index=DRIVERS.index("ebitda_margin"),
+                                      format_func=DRIVER_LABELS.get)
+        
+            if heat_x == heat_y:
+                st.warning("Select two different drivers.")
+            else:
+                steps = 1 + np.linspace(-sens_rel, sens_rel, 21)
+                x_vals = getattr(sens_base, heat_x) * steps
+                y_vals = getattr(sens_base, heat_y) * steps
+                heat_wacc, heat_npv = results.call(two_way, sens_base, heat_x, heat_y, x_vals, y_vals)
+        
+                x_scale = 1 if heat_x == "beta" else 100
+                y_scale = 1 if heat_y == "beta" else 100
+        
+                fig_heat = go.Figure(go.Heatmap(
+                    x=x_vals * x_scale,
+                    y=y_vals * y_scale,
+                    z=(heat_npv if sens_metric == "NPV" else heat_wacc) * sens_scale,
+                    colorscale='RdYlGn' if sens_metric == "NPV" else 'RdYlGn_r',
+                    colorbar=dict(title=sens_unit)
+                ))
+                fig_heat.update_layout(
+                    title=f"{sens_metric}: {DRIVER_LABELS[heat_x]} × {DRIVER_LABELS[heat_y]}",
+                    xaxis_title=f"{DRIVER_LABELS[heat_x]} (%)" if heat_x != "beta" else DRIVER_LABELS[heat_x],
+                    yaxis_title=f"{DRIVER_LABELS[heat_y]} (%)" if heat_y != "beta" else DRIVER_LABELS[heat_y],
+                    height=500
+                )
+                st.plotly_chart(fig_heat, use_container_width=True)
+                
+                with st.expander("⬇️ Export the full grid"):
+                    export_points = st.select_slider("Grid points per axis", [21, 101, 501, 1001, 2001], value=101,
+                                                     help="2001 points per axis is about 4 million rows")
+                    export_steps = 1 + np.linspace(-sens_rel, sens_rel, export_points)
+                    st.caption(f"{export_points ** 2:,} rows of {DRIVER_LABELS[heat_x]}, {DRIVER_LABELS[heat_y]}, "
+                               "WACC and NPV, evaluated and written in chunks.")
+                    export_controls(
+                        "grid", f"grid_{heat_x}_{heat_y}",
+                        lambda: grid_chunks(sens_base, heat_x, heat_y, getattr(sens_base, heat_x) * export_steps,
+                                            getattr(sens_base, heat_y) * export_steps),
+                        (sens_base, heat_x, heat_y, export_points, sens_rel),
+                        f"grid {{out}} --x {heat_x} --y {heat_y} --points {export_points} --rel {sens_rel:g} "
+                        f"--debt-pct {debt_pct:g} --kd-pre-tax {kd_pre_tax:g}",
+                    )
+        
+        st.caption("The base case is the discount rate and NPV above. The asset beta is Ke's beta unlevered at the "
+                   "selected debt ratio, and is relevered at each perturbed debt ratio; growth and margin changes "
+                   "shift the whole growth path and margin ramp.")
+        
+        st.warning("""
+        **🎯 Management Considerations:**
+        While NPV is positive under base case assumptions, management must consider qualitative factors including 
+        strategic fit, option value of AI capabilities beyond the expansion and abandonment options valued above, 
+        competitive positioning, and alignment with digital 
+        transformation objectives. The analysis provides a **decision-support framework**, not a deterministic answer.
         """)
     
-    st.markdown("---")
+    valuation(project_fin, project_drivers, ke, rf, beta_ke)
+
+# ==============================================
+# PAGE 6: SCENARIOS
+# ==============================================
+elif page == "🗂️ Scenarios":
     
-    # Project risk considerations
-    st.markdown("### ⚠️ Risk Considerations & Sensitivity")
+    st.markdown("### 🗂️ Saved What-If Scenarios")
     
-    col_risk1, col_risk2 = st.columns(2)
+    st.markdown("""
+    Scenarios saved from the Project Valuation page are compared side by side. Every listed case is 
+    evaluated in one vectorized batch against the selected period's market inputs.
+    """)
     
-    with col_risk1:
-        st.markdown("""
-        **Key Project Risks:**
-        - **Market Risk:** Enterprise adoption rate uncertainty
-        - **Technology Risk:** AI/ML model performance and accuracy
-        - **Competition Risk:** Emerging competitors in AIOps space
-        - **Execution Risk:** Talent acquisition and retention
-        - **Integration Risk:** Customer IT environment complexity
-        - **Regulatory Risk:** Data privacy and cybersecurity compliance
-        """)
+    store = load_scenario_store()
+    tag_counts = store.tags()
     
-    with col_risk2:
-        # Simple sensitivity on discount rate
-        rates = np.arange(0.06, 0.16, 0.01)
-        npvs = []
+    col_sf1, col_sf2, col_sf3 = st.columns(3)
+    with col_sf1:
+        scenario_tag = st.selectbox("Tag", [None, *tag_counts],
+                                    format_func=lambda t: "All tags" if t is None else f"{t} ({tag_counts[t]})")
+    with col_sf2:
+        scenario_prefix = st.text_input("Name starts with")
+    with col_sf3:
+        scenario_limit = st.select_slider("Most recent", [20, 50, 200, 1000, "All"], value=50)
+    
+    saved = store.list(tag=scenario_tag, prefix=scenario_prefix.strip() or None,
+                       limit=None if scenario_limit == "All" else scenario_limit)
+    
+    if not saved:
+        st.info("No saved scenarios match. Save one from the Project Valuation page.")
+    else:
+        # Ke relevers the period beta at each scenario's debt ratio, as in the driver sensitivity
+        scenario_market = MarketInputs.from_ke(ke, beta_ke, rf, WHAT_IF_DEFAULTS["debt_pct"] / 100, tax_rate)
+        comparison = compare_scenarios(saved, scenario_market)
         
-        for rate in rates:
-            years = np.arange(1, len(project) + 1)
-            pv = (project['FCFF'] / ((1 + rate) ** years)).sum() - initial_investment
-            npvs.append(pv)
+        col_sm1, col_sm2, col_sm3, col_sm4 = st.columns(4)
+        with col_sm1:
+            st.metric("Scenarios", f"{len(comparison):,}", f"of {len(store):,} saved", delta_color="off")
+        with col_sm2:
+            st.metric("Lowest WACC", f"{comparison['WACC'].min()*100:.2f}%", comparison['WACC'].idxmin(),
+                      delta_color="off")
+        with col_sm3:
+            st.metric("Highest NPV", f"₹{comparison['NPV'].max():,.2f} Cr", comparison['NPV'].idxmax(),
+                      delta_color="off")
+        with col_sm4:
+            st.metric("Accepted (NPV > 0)", f"{(comparison['NPV'] > 0).sum():,}",
+                      f"{(comparison['NPV'] > 0).mean()*100:.0f}%", delta_color="off")
         
-        fig_sens_npv = go.Figure()
-        fig_sens_npv.add_trace(go.Scatter(
-            x=rates*100,
-            y=npvs,
-            mode='lines',
-            line=dict(color='#3b82f6', width=3),
-            fill='tozeroy'
+        fig_scenarios = go.Figure(go.Scatter(
+            x=comparison['WACC'] * 100,
+            y=comparison['NPV'],
+            mode='markers',
+            text=comparison.index,
+            customdata=np.stack([comparison['Debt %'] * 100, comparison['Ke'] * 100, comparison['IRR'] * 100], axis=-1),
+            hovertemplate='<b>%{text}</b><br>WACC %{x:.2f}% • NPV ₹%{y:,.2f} Cr<br>Debt %{customdata[0]:.0f}%'
+                          ' • Ke %{customdata[1]:.2f}% • IRR %{customdata[2]:.1f}%<extra></extra>',
+            marker=dict(size=12, color=comparison['Debt %'] * 100, colorscale='Viridis',
+                        colorbar=dict(title='Debt %'), line=dict(width=1, color='white'))
         ))
-        fig_sens_npv.add_hline(y=0, line_dash="dash", line_color="red")
-        fig_sens_npv.add_vline(x=discount_rate*100, line_dash="dot", line_color="green",
-                              annotation_text=f"Current WACC<br>{discount_rate*100:.2f}%")
-        
-        fig_sens_npv.update_layout(
-            title="NPV Sensitivity to Discount Rate",
-            xaxis_title="Discount Rate (%)",
-            yaxis_title="NPV (INR Crore)",
-            height=350
+        fig_scenarios.add_hline(y=0, line_dash="dash", line_color="red")
+        fig_scenarios.update_layout(
+            title="Scenario Map: Discount Rate vs Value Created",
+            xaxis_title="WACC (%)",
+            yaxis_title="Net NPV (INR Crore)",
+            height=450
+        )
+        st.plotly_chart(fig_scenarios, use_container_width=True)
+        
+        st.dataframe(
+            comparison.style.format({
+                'Debt %': '{:.0%}', 'Kd (pre-tax)': '{:.2%}', 'Ke': '{:.2%}', 'WACC': '{:.2%}',
+                'NPV': '₹{:,.2f} Cr', 'IRR': '{:.1%}', 'Terminal Growth': '{:.2%}',
+            }, na_rep="–"),
+            use_container_width=True
+        )
+        st.caption(f"Ke relevers the period's beta, unlevered at the {WHAT_IF_DEFAULTS['debt_pct']}% base debt "
+                   "ratio, at each scenario's debt ratio (as in the driver sensitivity). Scenarios at the base "
+                   "ratio match the Project Valuation page, which keeps Ke fixed as debt changes. "
+                   "IRR includes the terminal value where one is set.")
+        
+        with st.expander("⬇️ Export this comparison"):
+            export_controls("scenarios", "scenarios", lambda: scenario_chunks(saved, scenario_market),
+                            (tuple(s.name for s in saved), tuple(s.updated_at for s in saved), scenario_market),
+                            "scenarios {out}" + (f" --tag {shlex.quote(scenario_tag)}" if scenario_tag else ""))
+        
+        col_sa1, col_sa2, col_sa3 = st.columns([2, 1, 1])
+        with col_sa1:
+            scenario_pick = st.selectbox("Scenario", comparison.index)
+        with col_sa2:
+            st.button("Load into Project Valuation", on_click=load_scenario, args=(scenario_pick,),
+                      use_container_width=True)
+        with col_sa3:
+            if st.button("Delete", use_container_width=True):
+                store.delete(scenario_pick)
+                st.rerun()
+
+# ==============================================
+# PAGE 7: CAPITAL BUDGETING
+# ==============================================
+elif page == "📦 Capital Budgeting":
+    
+    st.markdown("### 📦 Capital Budgeting Across Candidate Projects")
+    
+    st.markdown("""
+    Candidate projects are ranked on NPV, IRR and profitability index in one vectorized pass, and the 
+    combination with the highest total NPV is picked under the capital budget: a 0/1 knapsack solved by 
+    dynamic programming for an up-front budget, or branch-and-bound when later years' capex is rationed too.
+    """)
+    
+    col_cb1, col_cb2 = st.columns([2, 1])
+    with col_cb1:
+        candidate_file = st.file_uploader(
+            "Candidate schedules", type=["xlsx", "csv"],
+            help="One sheet per project in the Project_Financials layout (a Year 0 row's Capex is the up-front "
+                 "investment), or a CSV with Project and Year columns"
+        )
+    with col_cb2:
+        sample_size = st.number_input("Sample candidates", 10, 500, 40, step=10, disabled=candidate_file is not None,
+                                      help="Variations on the AIOps case, used when no file is uploaded")
+    
+    try:
+        candidates = load_candidates(candidate_file) if candidate_file is not None else sample_candidates(sample_size)
+    except (SchemaError, KeyError, ValueError) as e:
+        st.error(f"Could not read the candidate schedules: {e}")
+        st.stop()
+    
+    col_cb3, col_cb4 = st.columns(2)
+    with col_cb3:
+        budget_rate = st.number_input("Discount Rate (%)", 0.0, 30.0, round(wacc_target * 100, 2), step=0.25,
+                                      help="Defaults to the target WACC") / 100
+    with col_cb4:
+        budget_years = st.selectbox("Rationed years", [1, 2, 3],
+                                    format_func=lambda n: "Year 0 only" if n == 1 else f"Years 0-{n - 1}")
+    
+    ranking = evaluate_candidates(candidates, budget_rate)
+    outlays = candidates.outlays(budget_years)
+    # Default budgets fund about 40% of what every positive-NPV project would need
+    wanted = outlays[ranking['NPV'].to_numpy() > 0].sum(axis=0)
+    budget_cols = st.columns(budget_years)
+    budgets = []
+    for t, col in enumerate(budget_cols):
+        with col:
+            budgets.append(st.number_input(f"Year {t} Budget (INR Crore)", 0.0, None,
+                                           float(np.round(wanted[t] * 0.4, 1)), step=10.0, key=f"budget_{t}"))
+    
+    npv_values = ranking['NPV'].to_numpy()
+    selection = select_projects(candidates, npv_values, budgets)
+    pi_ranking = select_projects(candidates, npv_values, budgets, method="greedy")
+    ranking['Selected'] = selection.chosen
+    
+    col_cbm1, col_cbm2, col_cbm3, col_cbm4 = st.columns(4)
+    with col_cbm1:
+        st.metric("Projects Selected", f"{selection.chosen.sum():,}", f"of {len(candidates):,} candidates",
+                  delta_color="off")
+    with col_cbm2:
+        st.metric("Portfolio NPV", f"₹{selection.value:,.2f} Cr",
+                  f"₹{selection.value - pi_ranking.value:,.2f} Cr vs PI ranking")
+    with col_cbm3:
+        st.metric("Year 0 Capital Used", f"₹{selection.spend[0]:,.1f} Cr", f"of ₹{budgets[0]:,.1f} Cr",
+                  delta_color="off")
+    with col_cbm4:
+        st.metric("Positive-NPV Projects", f"{(npv_values > 0).sum():,}",
+                  f"{(npv_values > 0).mean()*100:.0f}%", delta_color="off")
+    
+    col_cbc1, col_cbc2 = st.columns([2, 1])
+    
+    with col_cbc1:
+        fig_budget = go.Figure()
+        for chosen, label, color in [(True, 'Selected', '#10b981'), (False, 'Not selected', '#94a3b8')]:
+            subset = ranking[ranking['Selected'] == chosen]
+            fig_budget.add_trace(go.Scatter(
+                x=subset['Investment'],
+                y=subset['NPV'],
+                mode='markers',
+                name=label,
+                text=subset.index,
+                customdata=np.stack([subset['IRR'] * 100, subset['PI']], axis=-1),
+                hovertemplate='<b>%{text}</b><br>Investment ₹%{x:,.1f} Cr • NPV ₹%{y:,.2f} Cr'
+                              '<br>IRR %{customdata[0]:.1f}% • PI %{customdata[1]:.2f}<extra></extra>',
+                marker=dict(size=10, color=color, line=dict(width=1, color='white'))
+            ))
+        fig_budget.add_hline(y=0, line_dash="dash", line_color="red")
+        fig_budget.update_layout(
+            title="Candidate Map: Capital Required vs Value Created",
+            xaxis_title="Initial Investment (INR Crore)",
+            yaxis_title="Net NPV (INR Crore)",
+            height=450
+        )
+        st.plotly_chart(fig_budget, use_container_width=True)
+    
+    with col_cbc2:
+        periods = [f"Year {t}" for t in range(budget_years)]
+        fig_spend = go.Figure()
+        fig_spend.add_trace(go.Bar(x=periods, y=selection.budgets, name='Budget', marker_color='#cbd5e1'))
+        fig_spend.add_trace(go.Bar(x=periods, y=selection.spend, name='Optimal set', marker_color='#10b981'))
+        fig_spend.add_trace(go.Bar(x=periods, y=pi_ranking.spend, name='PI ranking', marker_color='#3b82f6'))
+        fig_spend.update_layout(
+            title="Capital Used vs Budget",
+            yaxis_title="INR Crore",
+            barmode='group',
+            height=450
         )
-        st.plotly_chart(fig_sens_npv, use_container_width=True)
+        st.plotly_chart(fig_spend, use_container_width=True)
+    
+    st.dataframe(
+        ranking.sort_values(['Selected', 'NPV'], ascending=False).style.format({
+            'Investment': '₹{:,.1f} Cr', 'Discount Rate': '{:.2%}', 'PV of FCFF': '₹{:,.2f} Cr',
+            'NPV': '₹{:,.2f} Cr', 'IRR': '{:.1%}', 'PI': '{:.2f}',
+        }, na_rep="–"),
+        use_container_width=True
+    )
+    solver = "dynamic programming" if selection.method == "dp" else f"branch-and-bound ({selection.nodes:,} nodes)"
+    st.caption(f"Selected by {solver}{'' if selection.optimal else ', stopped at the node limit'}. "
+               "PI ranking takes projects in order of NPV per crore of capital while they fit, the usual "
+               "rule of thumb; it can leave budget idle that a smaller project would have used. "
+               "Year 1+ budgets cover the projects' scheduled capex.")
+
+# ==============================================
+# PAGE 8: STRESS TESTING
+# ==============================================
+elif page == "🌩️ Stress Testing":
     
-    st.warning("""
-    **🎯 Management Considerations:**
-    While NPV is positive under base case assumptions, management must consider qualitative factors including 
-    strategic fit, option value of AI capabilities, competitive positioning, and alignment with digital 
-    transformation objectives. The analysis provides a **decision-support framework**, not a deterministic answer.
+    st.markdown("### 🌩️ Stress Testing: Share Price, WACC and AIOps NPV")
+    
+    st.markdown("""
+    Historical replays and user-defined shocks run through the same relevering, Ke, WACC and FCFF 
+    discounting as the driver sensitivity, all in one batch. The base case is the Project Valuation page's: 
+    the current what-if capital structure and project drivers, discounted at the period's Ke. Each shock moves 
+    only some outputs; hover a column header for its scope. The market move reprices the shares but leaves 
+    WACC and NPV unchanged.
     """)
+    
+    st.markdown("#### ✏️ Hypothetical Shocks")
+    stress_inputs = st.data_editor(
+        pd.DataFrame([{
+            "Scenario": s.name, "Market Move (%)": s.market_move * 100, "rf Shift (pp)": s.rf_shift * 100,
+            "Credit Spread (pp)": s.credit_spread * 100, "Volatility ×": s.vol_multiplier,
+            "Beta ×": s.beta_multiplier, "Growth Shift (pp)": s.growth_shift * 100,
+            "Margin Shift (pp)": s.margin_shift * 100,
+        } for s in PRESETS]),
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            column: st.column_config.NumberColumn(column, help=SHOCK_SCOPE[field])
+            for column, field in [("Market Move (%)", "market_move"), ("rf Shift (pp)", "rf_shift"),
+                                  ("Credit Spread (pp)", "credit_spread"), ("Volatility ×", "vol_multiplier"),
+                                  ("Beta ×", "beta_multiplier"), ("Growth Shift (pp)", "growth_shift"),
+                                  ("Margin Shift (pp)", "margin_shift")]
+        },
+        key="stress_editor"
+    )
+    
+    col_st1, col_st2 = st.columns(2)
+    with col_st1:
+        replay_length = st.slider("Historical replay window (trading days)", 5, 63, 21,
+                                  help="Length of the worst market windows replayed from the full daily history")
+    with col_st2:
+        replay_count = st.slider("Worst windows to replay", 0, 5, 3)
+    
+    stress_scenarios = [
+        StressScenario(
+            name=str(row["Scenario"]), market_move=row["Market Move (%)"] / 100, rf_shift=row["rf Shift (pp)"] / 100,
+            credit_spread=row["Credit Spread (pp)"] / 100, vol_multiplier=row["Volatility ×"],
+            beta_multiplier=row["Beta ×"], growth_shift=row["Growth Shift (pp)"] / 100,
+            margin_shift=row["Margin Shift (pp)"] / 100,
+        )
+        for row in stress_inputs.dropna(subset=["Scenario"]).fillna({
+            "Volatility ×": 1.0, "Beta ×": 1.0}).fillna(0.0).to_dict("records")
+    ]
+    daily = model.frequency("Daily")
+    stress_scenarios += episode_scenarios(daily.returns, daily.periods_per_year)
+    if replay_count:
+        stress_scenarios += worst_windows(daily.returns, daily.periods_per_year, replay_length, replay_count)
+    
+    stress_base = SensitivityBase.from_ke(
+        ke=ke,
+        beta=beta_ke,
+        rf=rf,
+        kd_pre_tax=st.session_state.kd_pre_tax / 100,
+        tax_rate=tax_rate,
+        debt_pct=st.session_state.debt_pct / 100,
+        drivers=project_drivers,
+    )
+    # On-disk result cache: a scenario set evaluated once is reused by every session
+    stress = results.call(run_stress, stress_base, float(prices.stock[-1]), tuple(stress_scenarios))
+    shocked = stress.iloc[1:]
+    
+    col_sm1, col_sm2, col_sm3, col_sm4 = st.columns(4)
+    with col_sm1:
+        st.metric("Share Price (period end)", f"₹{stress['Price'].iloc[0]:,.2f}")
+    with col_sm2:
+        st.metric("Worst Stressed Price", f"₹{shocked['Price'].min():,.2f}" if len(shocked) else "–",
+                  f"{shocked['Price Change'].min()*100:.1f}%" if len(shocked) else None)
+    with col_sm3:
+        st.metric("Highest Stressed WACC", f"{shocked['WACC'].max()*100:.2f}%" if len(shocked) else "–",
+                  f"{shocked['WACC Change'].max()*100:+.2f} pp" if len(shocked) else None, delta_color="inverse")
+    with col_sm4:
+        st.metric("Lowest Stressed NPV", f"₹{shocked['NPV'].min():,.2f} Cr" if len(shocked) else "–",
+                  f"₹{shocked['NPV Change'].min():,.2f} Cr" if len(shocked) else None)
+    
+    if len(shocked):
+        fig_stress = make_subplots(rows=1, cols=3, shared_yaxes=True, horizontal_spacing=0.04,
+                                   subplot_titles=("Share Price Change (%)", "WACC Change (pp)", "NPV Change (INR Cr)"))
+        kind_colors = shocked['Kind'].map({"hypothetical": '#f59e0b', "historical": '#8b5cf6'})
+        for col_idx, (column, scale) in enumerate([("Price Change", 100), ("WACC Change", 100), ("NPV Change", 1)], 1):
+            fig_stress.add_trace(go.Bar(
+                y=shocked.index,
+                x=shocked[column] * scale,
+                orientation='h',
+                marker_color=kind_colors,
+                showlegend=False,
+                hovertemplate='<b>%{y}</b><br>%{x:,.2f}<extra></extra>'
+            ), row=1, col=col_idx)
+        fig_stress.update_yaxes(autorange="reversed")
+        fig_stress.update_layout(
+            title="Stressed Outcomes vs Base Case (orange: hypothetical, purple: historical replay)",
+            height=max(350, 40 * len(shocked) + 120)
+        )
+        st.plotly_chart(fig_stress, use_container_width=True)
+    
+    st.dataframe(
+        stress.style.format({
+            'Market Move': '{:.1%}', 'Price': '₹{:,.2f}', 'Price Change': '{:.1%}', 'Ke': '{:.2%}',
+            'WACC': '{:.2%}', 'WACC Change': '{:+.2%}', 'NPV': '₹{:,.2f} Cr', 'NPV Change': '₹{:,.2f} Cr',
+        }),
+        use_container_width=True
+    )
+    st.caption("The stressed price moves with the market through the stressed equity beta. Historical replays take "
+               "the window's market move, volatility (relative to the full sample) and beta; the workbook has no "
+               "rate history, so their rate shocks are zero. Named episodes (2008, March 2020) are replayed once "
+               "the loaded history covers them; until then the \"-style\" presets approximate them. As in the "
+               "driver sensitivity, Ke relevers the period beta at the target debt ratio.")
 
 # Footer
 st.markdown("---")
@@ -1134,3 +2155,7 @@ st.caption("""
 in financial theory and validated assumptions. Users should exercise professional judgment and consider qualitative 
 factors beyond quantitative analysis. | **Academic Project** • HCL Technologies Limited • FY 2024-25
 """)
+
+cache_stats = results.stats()
+st.sidebar.caption(f"Result cache: {cache_stats.hits} hits • {cache_stats.misses} misses • "
+                   f"{cache_stats.entries} entries ({cache_stats.bytes / 1024 ** 2:.1f} MB)")
@@ -0,0 +1 @@
+"""Computation layer for the HCL Technologies financial dashboard."""
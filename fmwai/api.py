@@ -0,0 +1,506 @@
+"""Headless JSON API over the dashboard's computation layer.
+
+An asyncio HTTP/1.1 server (standard library only, keep-alive) serves the
+numbers the dashboard shows: risk summary, CAPM per frequency, WACC for a
+given debt ratio and cost of debt, and project NPV / IRR / sensitivity. Every
+endpoint reads the same workbook model, prefix-sum indexes and result cache
+as ``app.py``, and takes the same percent-valued inputs as its sliders.
+
+Responses are kept in an in-memory LRU keyed by path and normalised query.
+Each carries a strong ``ETag``; a request whose ``If-None-Match`` matches gets
+``304 Not Modified`` with no body. Computation runs in a thread pool, and
+concurrent requests for the same uncached resource share one computation.
+
+    python -m fmwai.api serve --port 8600
+    python -m fmwai.api loadtest --port 8600 --concurrency 32 --requests 20000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from fmwai.cache import ResultCache
+from fmwai.capital_structure import target_wacc
+from fmwai.model import FREQUENCIES, AnalysisModel, load_model
+from fmwai.project_model import ProjectDrivers, build_financials, irr, npv, terminal_value
+from fmwai.range_index import MIN_OBSERVATIONS, PrefixSumIndex
+from fmwai.sensitivity import SensitivityBase, tornado
+
+DEFAULT_PORT = 8600
+TAX_RATE = 0.25                 # as in the dashboard
+MAX_CACHED_RESPONSES = 4096
+MAX_HEADER_BYTES = 16 * 1024
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class BadRequest(ValueError):
+    """Invalid query parameters; answered with 400 and the message."""
+
+
+# -----------------------
+# Query parsing
+# -----------------------
+def _number(query: dict, name: str, default: Optional[float], lo: float, hi: float) -> Optional[float]:
+    if name not in query:
+        return default
+    try:
+        value = float(query[name])
+    except ValueError:
+        raise BadRequest(f"{name} must be a number, got {query[name]!r}") from None
+    if not lo <= value <= hi:
+        raise BadRequest(f"{name} must be between {lo} and {hi}, got {value}")
+    return value
+
+
+def _date(query: dict, name: str):
+    if name not in query:
+        return None
+    try:
+        return pd.Timestamp(query[name]).date()
+    except ValueError:
+        raise BadRequest(f"{name} must be an ISO date, got {query[name]!r}") from None
+
+
+def _frequency(query: dict) -> str:
+    freq = query.get("freq", "Daily").title()
+    if freq not in FREQUENCIES:
+        raise BadRequest(f"freq must be one of {FREQUENCIES}, got {query['freq']!r}")
+    return freq
+
+
+def _json_safe(obj):
+    """NumPy scalars to Python numbers and non-finite floats to null."""
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [_json_safe(v) for v in obj]
+    if isinstance(obj, (np.integer,)):
+        return int(obj)
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    return obj
+
+
+# -----------------------
+# Endpoints
+# -----------------------
+class MetricsService:
+    """The dashboard's metrics for a period, computed from the shared model."""
+
+    def __init__(self, model: AnalysisModel, results: Optional[ResultCache] = None):
+        self.model = model
+        self.results = results or ResultCache()
+        self.rf = model.cost_of_capital.rf
+        self.indexes = {f.name: PrefixSumIndex.build(f.returns, f.periods_per_year) for f in model.frequencies}
+        self.routes = {
+            "/": self.index,
+            "/risk": self.risk,
+            "/capm": self.capm,
+            "/wacc": self.wacc,
+            "/project": self.project,
+            "/project/sensitivity": self.sensitivity,
+        }
+
+    def _windows(self, query: dict) -> dict:
+        start, end = _date(query, "start"), _date(query, "end")
+        return {name: index.stats(start, end) for name, index in self.indexes.items()}
+
+    def _ke(self, windows: dict) -> float:
+        # CAPM Ke averaged over the frequencies with enough returns, as on the dashboard
+        return float(np.nanmean([self.rf + w.beta * (w.market_return - self.rf) for w in windows.values()]))
+
+    def _beta(self, windows: dict) -> float:
+        # Equity beta behind Ke, averaged over the same frequencies
+        return float(np.nanmean([w.beta for w in windows.values()]))
+
+    def _period(self, query: dict) -> dict:
+        return {"start": query.get("start"), "end": query.get("end")}
+
+    def index(self, query: dict) -> dict:
+        return {"endpoints": sorted(self.routes), "frequencies": list(FREQUENCIES)}
+
+    def risk(self, query: dict) -> dict:
+        freq = _frequency(query)
+        w = self._windows(query)[freq]
+        return {
+            "period": self._period(query),
+            "frequency": freq,
+            "observations": w.observations,
+            "ann_return": w.ann_return,
+            "ann_vol": w.ann_vol,
+            "beta_current": w.beta,
+            "r_squared": w.r_squared,
+            "cumulative_return": w.cumulative_return,
+            "market_cumulative_return": w.market_cumulative_return,
+        }
+
+    def capm(self, query: dict) -> dict:
+        windows = self._windows(query)
+        return {
+            "period": self._period(query),
+            "rf": self.rf,
+            "ke": self._ke(windows),
+            "frequencies": {
+                name: {
+                    "observations": w.observations,
+                    "beta": w.beta,
+                    "alpha": w.alpha,
+                    "r_squared": w.r_squared,
+                    "market_return": w.market_return,
+                    "expected_return": self.rf + w.beta * (w.market_return - self.rf),
+                    "enough_data": bool(w.observations >= MIN_OBSERVATIONS),
+                }
+                for name, w in windows.items()
+            },
+        }
+
+    def _wacc_inputs(self, query: dict) -> tuple:
+        debt_pct = _number(query, "debt_pct", 25.0, 0.0, 100.0)
+        kd_pre_tax = _number(query, "kd_pre_tax", 7.5, 0.0, 100.0)
+        return debt_pct, kd_pre_tax
+
+    def wacc(self, query: dict) -> dict:
+        debt_pct, kd_pre_tax = self._wacc_inputs(query)
+        ke = self._ke(self._windows(query))
+        return {
+            "period": self._period(query),
+            "debt_pct": debt_pct,
+            "kd_pre_tax": kd_pre_tax,
+            "tax_rate": TAX_RATE,
+            "ke": ke,
+            "kd_after_tax": kd_pre_tax / 100 * (1 - TAX_RATE),
+            "wacc_current": ke,
+            "wacc_target": target_wacc(ke, debt_pct / 100, kd_pre_tax / 100, TAX_RATE),
+        }
+
+    def _drivers(self, query: dict) -> ProjectDrivers:
+        d = ProjectDrivers()
+        growth_early = _number(query, "growth_early", d.revenue_growth * 100, -50.0, 200.0) / 100
+        growth_late = _number(query, "growth_late", d.revenue_growth * 100, -50.0, 200.0) / 100
+        terminal = _number(query, "terminal_growth", None, -5.0, 20.0)
+        return ProjectDrivers(
+            revenue_year1=_number(query, "revenue_year1", d.revenue_year1, 0.0, 1e7),
+            revenue_growth=[[growth_early, growth_early, growth_late, growth_late]],
+            ebitda_margin_start=_number(query, "margin_start", d.ebitda_margin_start * 100, -100.0, 100.0) / 100,
+            ebitda_margin_end=_number(query, "margin_end", d.ebitda_margin_end * 100, -100.0, 100.0) / 100,
+            da_pct=_number(query, "da_pct", d.da_pct * 100, 0.0, 100.0) / 100,
+            tax_rate=TAX_RATE,
+            capex_pct=_number(query, "capex_pct", d.capex_pct * 100, 0.0, 100.0) / 100,
+            nwc_pct=_number(query, "nwc_pct", d.nwc_pct * 100, 0.0, 100.0) / 100,
+            terminal_growth=None if terminal is None else terminal / 100,
+            initial_investment=_number(query, "initial_investment", d.initial_investment, 0.0, 1e7),
+        )
+
+    def project(self, query: dict) -> dict:
+        drivers = self._drivers(query)
+        wacc = self.wacc(query)
+        rate = wacc["wacc_target"]
+        fin = build_financials(drivers)
+        fcff = fin.FCFF[0]
+        years = np.arange(1, len(fcff) + 1)
+        tv = terminal_value(fin.FCFF, rate, drivers.terminal_growth)[0]
+        npv_net = npv(fin.FCFF, rate, drivers.initial_investment, drivers.terminal_growth)[0]
+        rates = np.arange(0.06, 0.16, 0.01)
+        return {
+            "period": wacc["period"],
+            "inputs": {"debt_pct": wacc["debt_pct"], "kd_pre_tax": wacc["kd_pre_tax"],
+                       "terminal_growth": drivers.terminal_growth,
+                       "initial_investment": drivers.initial_investment},
+            "discount_rate": rate,
+            "fcff": fcff,
+            "pv_fcff": float((fcff / (1 + rate) ** years).sum()),
+            "pv_terminal": tv / (1 + rate) ** len(fcff),
+            "npv_net": npv_net,
+            "irr": irr(fin.FCFF, drivers.initial_investment, drivers.terminal_growth)[0],
+            "decision": "accept" if npv_net > 0 else "reject",
+            "rate_sensitivity": {
+                "rates": rates,
+                "npv": npv(fin.FCFF[0], rates, drivers.initial_investment, drivers.terminal_growth),
+            },
+        }
+
+    def sensitivity(self, query: dict) -> dict:
+        debt_pct, kd_pre_tax = self._wacc_inputs(query)
+        rel = _number(query, "rel", 20.0, 1.0, 90.0) / 100
+        windows = self._windows(query)
+        # The base case of /wacc and /project, so base_wacc and base_npv match them
+        base = SensitivityBase.from_ke(
+            ke=self._ke(windows),
+            beta=self._beta(windows),
+            rf=self.rf,
+            kd_pre_tax=kd_pre_tax / 100,
+            tax_rate=TAX_RATE,
+            debt_pct=debt_pct / 100,
+            drivers=self._drivers(query),
+        )
+        # Same cache key as the dashboard's tornado, so either side can warm it
+        tor = self.results.call(tornado, base, rel)
+        return {
+            "period": self._period(query),
+            "perturbation": rel,
+            "base_wacc": tor.attrs["base_wacc"],
+            "base_npv": tor.attrs["base_npv"],
+            "drivers": tor.to_dict(orient="records"),
+        }
+
+
+# -----------------------
+# Response cache
+# -----------------------
+@dataclass(frozen=True)
+class CachedResponse:
+    status: int
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """LRU of encoded responses; used from the event loop thread only."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _encode(status: int, payload: dict) -> CachedResponse:
+    body = json.dumps(_json_safe(payload), allow_nan=False, separators=(",", ":")).encode()
+    return CachedResponse(status, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+# -----------------------
+# Server
+# -----------------------
+class ApiServer:
+    def __init__(self, service: MetricsService, cache: Optional[ResponseCache] = None):
+        self.service = service
+        self.cache = cache or ResponseCache()
+        self._inflight = {}
+        self.requests = 0
+
+    async def respond(self, target: str) -> CachedResponse:
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        key = (url.path.rstrip("/") or "/", tuple(sorted(query.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        # Requests arriving while the same resource is computed wait for that result
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compute(key[0], query))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        response = await asyncio.shield(pending)
+        if response.status == 200:
+            self.cache.put(key, response)
+        return response
+
+    async def _compute(self, path: str, query: dict) -> CachedResponse:
+        handler = self.service.routes.get(path)
+        if handler is None:
+            return _encode(404, {"error": f"no endpoint {path}", "endpoints": sorted(self.service.routes)})
+        loop = asyncio.get_running_loop()
+        try:
+            return _encode(200, await loop.run_in_executor(None, handler, query))
+        except BadRequest as e:
+            return _encode(400, {"error": str(e)})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._send(writer, _encode(400, {"error": "malformed request line or Content-Length"}),
+                                     close=True)
+                    return
+                # Request bodies are not used by any endpoint; drain them to keep the connection in sync
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        return
+                close = (headers.get("connection", "").lower() == "close"
+                         or version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive")
+                self.requests += 1
+
+                if method not in ("GET", "HEAD"):
+                    await self._send(writer, _encode(405, {"error": "only GET is supported"}), close=close)
+                else:
+                    try:
+                        response = await self.respond(target)
+                    except Exception as e:  # a failed computation must not kill the connection
+                        response = _encode(500, {"error": f"{type(e).__name__}: {e}"})
+                    not_modified = response.status == 200 and response.etag in {
+                        t.strip() for t in headers.get("if-none-match", "").split(",")}
+                    await self._send(writer, response, close=close, not_modified=not_modified,
+                                     head_only=method == "HEAD")
+                if close:
+                    return
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _send(self, writer: asyncio.StreamWriter, response: CachedResponse, close: bool,
+                    not_modified: bool = False, head_only: bool = False) -> None:
+        status = 304 if not_modified else response.status
+        body = b"" if not_modified or head_only else response.body
+        head = [f"HTTP/1.1 {status} {_REASONS[status]}",
+                "Connection: close" if close else "Connection: keep-alive"]
+        if response.status == 200:
+            # Clients may store the response but must revalidate it
+            head += [f"ETag: {response.etag}", "Cache-Control: no-cache"]
+        if not not_modified:
+            head += ["Content-Type: application/json", f"Content-Length: {len(response.body)}"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"serving on http://{host}:{port} ({', '.join(sorted(self.service.routes))})")
+        async with server:
+            await server.serve_forever()
+
+
+# -----------------------
+# LOAD TEST
+# -----------------------
+DEFAULT_LOAD_PATHS = [
+    "/risk",
+    "/risk?freq=Monthly",
+    "/capm",
+    "/wacc?debt_pct=25&kd_pre_tax=7.5",
+    "/wacc?debt_pct=35&kd_pre_tax=9",
+    "/project",
+    "/project?terminal_growth=3",
+    "/project/sensitivity",
+]
+
+
+async def _client(host: str, port: int, paths: list, n: int, revalidate: bool,
+                  latencies: list, statuses: Counter) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    try:
+        for i in range(n):
+            path = paths[i % len(paths)]
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            if revalidate and path in etags:
+                request += f"If-None-Match: {etags[path]}\r\n"
+            started = time.perf_counter()
+            writer.write((request + "\r\n").encode())
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            status = int(head[0].split(" ")[1])
+            headers = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+            if "Content-Length" in headers:
+                await reader.readexactly(int(headers["Content-Length"]))
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+            etags[path] = headers.get("ETag")
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def load_test(host: str = "127.0.0.1", port: int = DEFAULT_PORT, requests: int = 10_000,
+                    concurrency: int = 32, paths=DEFAULT_LOAD_PATHS, revalidate: bool = False) -> dict:
+    """Requests per second and latency percentiles over ``concurrency`` keep-alive connections."""
+    latencies, statuses = [], Counter()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, paths[i % len(paths):] + paths[:i % len(paths)], n,
+                                   revalidate, latencies, statuses)
+                           for i, n in enumerate(per_client) if n))
+    elapsed = time.perf_counter() - started
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "statuses": dict(statuses),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve dashboard metrics as JSON, or load-test the server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve")
+    serve.add_argument("--workbook", default="FMWAI_Analysis.xlsx")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    bench = commands.add_parser("loadtest")
+    bench.add_argument("--host", default="127.0.0.1")
+    bench.add_argument("--port", type=int, default=DEFAULT_PORT)
+    bench.add_argument("--requests", type=int, default=10_000)
+    bench.add_argument("--concurrency", type=int, default=32)
+    bench.add_argument("--revalidate", action="store_true", help="send If-None-Match with the last ETag seen")
+    bench.add_argument("paths", nargs="*", default=DEFAULT_LOAD_PATHS)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(ApiServer(MetricsService(load_model(args.workbook))).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+    report = asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency,
+                                   args.paths, args.revalidate))
+    print(f"{report['requests']:,} requests in {report['seconds']:.2f}s: "
+          f"{report['requests_per_second']:,.0f} req/s")
+    print(f"latency p50 {report['p50_ms']:.2f} ms  p95 {report['p95_ms']:.2f} ms  p99 {report['p99_ms']:.2f} ms")
+    print(f"statuses {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
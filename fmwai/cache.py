@@ -0,0 +1,219 @@
+"""Persistent, content-addressed cache for computed results.
+
+Results live on disk and survive Streamlit restarts and redeploys. A result is
+stored once under the SHA-256 of its pickled bytes (``objects/``); a lookup
+key, the hash of function, arguments and code version, points to it
+(``refs/``). Writes go to a temporary file and are moved into place with
+``os.replace``, so several worker processes can share one directory. Hits
+and repeated writes refresh an object's mtime, and the least recently used
+objects are evicted once the cache exceeds ``max_bytes``. Each instance keeps
+running byte and object counts (from one scan when it opens, plus its own
+writes) and only scans the directory again when the byte count crosses
+``max_bytes``; objects written by other processes are picked up at that scan.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = ".fmwai_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+_MISSING = object()
+
+
+def _package_digest() -> str:
+    h = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+# Any change to the computation layer invalidates every key
+CODE_VERSION = _package_digest()
+
+
+def digest(obj) -> str:
+    """Content hash of any picklable object (arrays, frames, dataclasses)."""
+    return hashlib.sha256(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    writes: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._objects = self.root / "objects"
+        self._refs = self.root / "refs"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._refs.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._counts = dict(hits=0, misses=0, writes=0, evictions=0)
+        entries = self._entries()
+        self._bytes, self._objects_count = sum(size for _, size, _ in entries), len(entries)
+
+    # -----------------------
+    # Keys and refs
+    # -----------------------
+    @staticmethod
+    def key(*parts) -> str:
+        """Lookup key for a computation: its name, inputs and parameters."""
+        return digest((CODE_VERSION, parts))
+
+    def ref(self, key: str) -> Optional[str]:
+        """Digest of the object stored under ``key``, if it is still on disk."""
+        try:
+            object_digest = (self._refs / key).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return object_digest if (self._objects / object_digest).exists() else None
+
+    # -----------------------
+    # Objects
+    # -----------------------
+    def load(self, object_digest: str):
+        path = self._objects / object_digest
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def get(self, key: str, default=None):
+        object_digest = self.ref(key)
+        if object_digest is not None:
+            try:
+                value = self.load(object_digest)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass  # evicted or unreadable; recompute
+            else:
+                self._count("hits")
+                return value
+        self._count("misses")
+        return default
+
+    def put(self, key: str, value) -> str:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        object_digest = hashlib.sha256(data).hexdigest()
+        path = self._objects / object_digest
+        try:
+            os.utime(path)  # already stored: mark it recently used so the new ref keeps it
+        except FileNotFoundError:
+            self._write(path, data)
+            with self._lock:
+                self._bytes += len(data)
+                self._objects_count += 1
+        self._write(self._refs / key, object_digest.encode())
+        self._count("writes")
+        if self._bytes > self.max_bytes:
+            self.evict()
+        return object_digest
+
+    def call(self, func, *args, **kwargs):
+        """``func(*args, **kwargs)``, computed once per distinct input."""
+        key = self.key(func.__module__, func.__qualname__, args, kwargs)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            self.put(key, value)
+        return value
+
+    # -----------------------
+    # Housekeeping
+    # -----------------------
+    def _entries(self) -> list:
+        """(mtime, size, path) of every stored object."""
+        entries = []
+        for entry in os.scandir(self._objects):
+            if entry.name.startswith("."):
+                continue  # a write in progress
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        """Drop least recently used objects until the cache fits ``max_bytes``."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker got there first
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes, self._objects_count = total, len(entries) - removed
+        if removed:
+            self._count("evictions", removed)
+            self._prune_refs()
+        return removed
+
+    def stats(self) -> CacheStats:
+        """Counters and size from the running counts; cheap enough to call on every rerun."""
+        with self._lock:
+            return CacheStats(entries=self._objects_count, bytes=self._bytes, **self._counts)
+
+    def clear(self) -> None:
+        for directory in (self._objects, self._refs):
+            for entry in os.scandir(directory):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._bytes = self._objects_count = 0
+
+    def _prune_refs(self) -> None:
+        for entry in os.scandir(self._refs):
+            if not entry.name.startswith(".") and self.ref(entry.name) is None:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += n
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
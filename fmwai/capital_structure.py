@@ -0,0 +1,159 @@
+"""Optimal capital structure over a fine leverage grid.
+
+At each debt ratio the equity beta is relevered (Hamada), Ke follows from
+CAPM, and Kd from a synthetic rating implied by interest coverage. The cost
+of debt and the coverage ratio depend on each other, so they are solved by
+fixed-point iteration over the whole grid at once. Expected distress costs
+are netted off the FCFF-based firm value.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Interest coverage -> synthetic rating -> default spread over rf and
+# cumulative default probability. Indicative values for large non-financial
+# firms (Damodaran's ratings table); override via ``rating_table``.
+RATING_TABLE = pd.DataFrame({
+    "Min_Coverage": [-np.inf, 0.20, 0.65, 0.80, 1.25, 1.50, 1.75, 2.00, 2.25, 2.50, 3.00, 4.25, 5.50, 6.50, 8.50],
+    "Rating": ["D", "C", "CC", "CCC", "B-", "B", "B+", "BB", "BB+", "BBB", "A-", "A", "A+", "AA", "AAA"],
+    "Spread": [0.1900, 0.1500, 0.1200, 0.0900, 0.0570, 0.0451, 0.0375, 0.0306, 0.0261, 0.0200,
+               0.0162, 0.0138, 0.0123, 0.0100, 0.0075],
+    "Default_Prob": [1.0000, 0.8500, 0.7000, 0.5901, 0.4500, 0.3680, 0.2500, 0.1663, 0.1200, 0.0754,
+                     0.0250, 0.0066, 0.0060, 0.0051, 0.0007],
+})
+
+
+def relever_beta(beta_a, debt_ratio, tax_rate):
+    """Hamada relevering from an asset beta at debt ratio D/V."""
+    debt_ratio = np.asarray(debt_ratio, dtype=float)
+    return beta_a * (1 + (1 - tax_rate) * debt_ratio / (1 - debt_ratio))
+
+
+def unlever_beta(beta_e, debt_ratio, tax_rate):
+    """Hamada unlevering of an equity beta observed at debt ratio D/V."""
+    debt_ratio = np.asarray(debt_ratio, dtype=float)
+    return beta_e / (1 + (1 - tax_rate) * debt_ratio / (1 - debt_ratio))
+
+
+def target_wacc(ke, debt_ratio, kd_pre_tax, tax_rate):
+    """WACC at target weights with a given pre-tax cost of debt."""
+    return (1 - debt_ratio) * ke + debt_ratio * kd_pre_tax * (1 - tax_rate)
+
+
+@dataclass(frozen=True)
+class FirmInputs:
+    """Firm-level inputs to the solver (currency amounts in INR crore)."""
+    asset_beta: float
+    rf: float
+    market_premium: float
+    tax_rate: float
+    ebit: float
+    firm_value: float
+    fcff: float
+    growth: float
+    distress_cost: float = 0.25  # fraction of firm value lost in distress
+
+
+@dataclass(frozen=True)
+class CapitalStructureResult:
+    """Solver output; every array is aligned with ``debt_ratio``."""
+    debt_ratio: np.ndarray
+    beta: np.ndarray
+    ke: np.ndarray
+    coverage: np.ndarray
+    rating: np.ndarray
+    kd_pre_tax: np.ndarray
+    wacc: np.ndarray
+    firm_value: np.ndarray
+    distress_cost: np.ndarray
+    converged: bool = True     # False if the Kd/coverage iteration hit ``max_iter``
+
+    @property
+    def min_wacc_idx(self) -> int:
+        return int(np.argmin(self.wacc))
+
+    @property
+    def max_value_idx(self) -> int:
+        return int(np.nanargmax(self.firm_value))
+
+    @property
+    def min_wacc_debt_ratio(self) -> float:
+        return float(self.debt_ratio[self.min_wacc_idx])
+
+    @property
+    def max_value_debt_ratio(self) -> float:
+        return float(self.debt_ratio[self.max_value_idx])
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Debt_Ratio": self.debt_ratio,
+            "Levered_Beta": self.beta,
+            "Cost_of_Equity": self.ke,
+            "Interest_Coverage": self.coverage,
+            "Rating": self.rating,
+            "Cost_of_Debt": self.kd_pre_tax,
+            "WACC": self.wacc,
+            "Firm_Value": self.firm_value,
+            "Expected_Distress_Cost": self.distress_cost,
+        })
+
+
+def solve_capital_structure(firm: FirmInputs, max_debt: float = 0.80, step: float = 0.001,
+                            rating_table: pd.DataFrame = RATING_TABLE,
+                            max_iter: int = 50) -> CapitalStructureResult:
+    """Evaluate WACC and firm value on a 0..``max_debt`` grid, fully vectorized.
+
+    Dollar debt at each ratio is sized off the current firm value, so interest
+    coverage falls as leverage rises and the synthetic rating deteriorates.
+    If the Kd/coverage iteration has not settled after ``max_iter`` rounds,
+    the last Kd is returned with ``converged`` False.
+    """
+    d = np.round(np.arange(0.0, max_debt + step / 2, step), 10)
+    thresholds = rating_table["Min_Coverage"].to_numpy(dtype=float)
+    spreads = rating_table["Spread"].to_numpy(dtype=float)
+    default_prob = rating_table["Default_Prob"].to_numpy(dtype=float)
+
+    beta = relever_beta(firm.asset_beta, d, firm.tax_rate)
+    ke = firm.rf + beta * firm.market_premium
+
+    # Fixed point between Kd and interest coverage
+    debt = d * firm.firm_value
+    kd = np.full_like(d, firm.rf + spreads[-1])
+    converged = False
+    with np.errstate(divide="ignore"):
+        for _ in range(max_iter):
+            coverage = np.where(debt > 0, firm.ebit / (debt * kd), np.inf)
+            notch = np.searchsorted(thresholds, coverage, side="right") - 1
+            kd_new = firm.rf + spreads[notch]
+            if np.array_equal(kd_new, kd):
+                converged = True
+                break
+            kd = kd_new
+        # Rating and distress follow the returned Kd, also when the loop ran out
+        coverage = np.where(debt > 0, firm.ebit / (debt * kd), np.inf)
+        notch = np.searchsorted(thresholds, coverage, side="right") - 1
+
+    # Tax shield is lost on interest in excess of EBIT
+    interest = debt * kd
+    shield_rate = firm.tax_rate * np.minimum(1.0, np.divide(firm.ebit, interest, out=np.ones_like(interest),
+                                                            where=interest > 0))
+    wacc = (1 - d) * ke + d * kd * (1 - shield_rate)
+
+    spread_to_g = wacc - firm.growth
+    value = np.where(spread_to_g > 0, firm.fcff * (1 + firm.growth) / np.where(spread_to_g > 0, spread_to_g, 1.0),
+                     np.nan)
+    distress = default_prob[notch] * firm.distress_cost * value
+
+    return CapitalStructureResult(
+        debt_ratio=d,
+        beta=beta,
+        ke=ke,
+        coverage=coverage,
+        rating=rating_table["Rating"].to_numpy()[notch],
+        kd_pre_tax=kd,
+        wacc=wacc,
+        firm_value=value - distress,
+        distress_cost=distress,
+        converged=converged,
+    )
@@ -0,0 +1,291 @@
+"""Opt-in compact storage for large return panels and simulation outputs.
+
+Three parts:
+
+- Returns and simulation outputs are stored as float32, half the memory of
+  float64. Storage rounding is about 6e-8 relative per value.
+- Dates live once in a shared int64 axis of epoch nanoseconds. A series
+  whose dates are a contiguous run of the axis gets a ``datetime64[ns]``
+  view onto it instead of its own copy.
+- Reductions over float32 data run in chunks and accumulate in float64. A
+  sum over millions of rows then carries only the storage rounding, not the
+  float32 accumulation error. The prefix-sum index, beta and frontier code
+  already up-cast to float64 before accumulating.
+
+Metrics computed from compact data stay within ``TOLERANCE`` (relative) of
+the float64 results; ``python -m fmwai.compact`` checks that and reports peak
+memory for both modes.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from fmwai.model import AnalysisModel, MarketSeries
+
+STORAGE_DTYPE = np.float32
+ACCUMULATOR_DTYPE = np.float64
+DEFAULT_CHUNK_ROWS = 8192
+# Relative tolerance of metrics (means, volatilities, betas, covariances) vs float64
+TOLERANCE = 1e-5
+
+
+@dataclass(frozen=True)
+class DateAxis:
+    """Sorted, unique dates as int64 epoch nanoseconds, shared by every series."""
+    epoch_ns: np.ndarray
+
+    @classmethod
+    def union(cls, *dates) -> "DateAxis":
+        parts = [np.asarray(d, dtype="datetime64[ns]").view(np.int64) for d in dates]
+        return cls(np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64))
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.epoch_ns.view("datetime64[ns]")
+
+    def share(self, dates) -> np.ndarray:
+        """``dates`` as a view onto the axis when they form a contiguous run of it, else a copy."""
+        ns = np.asarray(dates, dtype="datetime64[ns]").view(np.int64)
+        if not len(ns):
+            return ns.view("datetime64[ns]")
+        i = int(np.searchsorted(self.epoch_ns, ns[0]))
+        run = self.epoch_ns[i:i + len(ns)]
+        if len(run) == len(ns) and np.array_equal(run, ns):
+            return run.view("datetime64[ns]")
+        return ns.copy().view("datetime64[ns]")
+
+
+# -----------------------
+# Storage
+# -----------------------
+def compact_array(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=STORAGE_DTYPE)
+
+
+def compact_series(series: MarketSeries, axis: DateAxis, values: bool = True) -> MarketSeries:
+    """Series with dates shared from ``axis`` and, if ``values``, float32 data."""
+    cast = compact_array if values else np.asarray
+    return MarketSeries(axis.share(series.dates), cast(series.stock), cast(series.market))
+
+
+def compact_model(model: AnalysisModel) -> AnalysisModel:
+    """The model with float32 returns and one shared date axis.
+
+    Prices stay float64 (they are levels, not returns), but their dates are
+    shared too. The daily returns' dates are a view of the prices' dates.
+    """
+    axis = DateAxis.union(model.prices.dates, *(f.returns.dates for f in model.frequencies))
+    frequencies = {f.name.lower(): replace(f, returns=compact_series(f.returns, axis)) for f in model.frequencies}
+    return replace(model, prices=compact_series(model.prices, axis, values=False), **frequencies)
+
+
+def compact_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Float64 columns of a simulation output downcast to float32; other columns untouched."""
+    floats = frame.select_dtypes(include=[np.float64]).columns
+    return frame.astype(dict.fromkeys(floats, STORAGE_DTYPE)) if len(floats) else frame
+
+
+def memory_bytes(obj) -> int:
+    """Bytes held by the NumPy arrays reachable from a model, series or frame; shared buffers count once."""
+    seen, total = set(), 0
+
+    def visit(o):
+        nonlocal total
+        if isinstance(o, np.ndarray):
+            base = o
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            if id(base) not in seen:
+                seen.add(id(base))
+                total += base.nbytes
+        elif isinstance(o, pd.DataFrame):
+            for col in o.columns:
+                visit(o[col].to_numpy())
+            visit(np.asarray(o.index))
+        elif hasattr(o, "__dataclass_fields__"):
+            for name in o.__dataclass_fields__:
+                visit(getattr(o, name))
+
+    visit(obj)
+    return total
+
+
+# -----------------------
+# Chunked reductions
+# -----------------------
+def chunked_moments(values, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> tuple:
+    """Column count, mean and sample variance of (T,) or (T, N) data, accumulated in float64.
+
+    Chunks are up-cast one at a time and merged with Chan et al.'s pairwise
+    update, so no float64 copy of the whole array is made.
+    """
+    x = np.asarray(values)
+    shape = x.shape[1:]
+    n, mean, m2 = 0, np.zeros(shape, ACCUMULATOR_DTYPE), np.zeros(shape, ACCUMULATOR_DTYPE)
+    for start in range(0, len(x), chunk_rows):
+        chunk = x[start:start + chunk_rows].astype(ACCUMULATOR_DTYPE)
+        k = len(chunk)
+        c_mean = chunk.mean(axis=0)
+        c_m2 = ((chunk - c_mean) ** 2).sum(axis=0)
+        delta = c_mean - mean
+        total = n + k
+        mean = mean + delta * k / total
+        m2 = m2 + c_m2 + delta ** 2 * n * k / total
+        n = total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return n, mean, m2 / (n - 1)
+
+
+def chunked_cov(values, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> tuple:
+    """Mean and sample covariance of a (T, N) panel, accumulated in float64 chunk by chunk.
+
+    Sums are taken about the first row, so cancellation stays small
+    without a second pass.
+    """
+    x = np.asarray(values)
+    shift = x[0].astype(ACCUMULATOR_DTYPE)
+    s1 = np.zeros(x.shape[1], ACCUMULATOR_DTYPE)
+    s2 = np.zeros((x.shape[1], x.shape[1]), ACCUMULATOR_DTYPE)
+    for start in range(0, len(x), chunk_rows):
+        chunk = x[start:start + chunk_rows].astype(ACCUMULATOR_DTYPE) - shift
+        s1 += chunk.sum(axis=0)
+        s2 += chunk.T @ chunk
+    n = len(x)
+    mean = s1 / n
+    return mean + shift, (s2 - n * np.outer(mean, mean)) / (n - 1)
+
+
+def chunked_beta(stock, market, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    """OLS beta of each stock column on the market, from float64 chunk sums."""
+    y = np.asarray(stock)
+    y = y[:, None] if y.ndim == 1 else y
+    m = np.asarray(market)
+    panel_cov = np.zeros(y.shape[1], ACCUMULATOR_DTYPE)
+    shift_y, shift_m = y[0].astype(ACCUMULATOR_DTYPE), float(m[0])
+    sy = np.zeros(y.shape[1], ACCUMULATOR_DTYPE)
+    sm = smm = 0.0
+    for start in range(0, len(y), chunk_rows):
+        cy = y[start:start + chunk_rows].astype(ACCUMULATOR_DTYPE) - shift_y
+        cm = m[start:start + chunk_rows].astype(ACCUMULATOR_DTYPE) - shift_m
+        sy += cy.sum(axis=0)
+        sm += cm.sum()
+        smm += cm @ cm
+        panel_cov += cm @ cy
+    n = len(y)
+    cov = panel_cov - sm * sy / n
+    return cov / (smm - sm * sm / n)
+
+
+# -----------------------
+# REPORT
+# -----------------------
+def _traced(fn):
+    """``(result, peak bytes, seconds)`` of ``fn()`` under tracemalloc."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1], time.perf_counter() - started
+    finally:
+        tracemalloc.stop()
+
+
+def _relative_error(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return float(np.max(np.abs(a - b)) / max(np.max(np.abs(b)), 1e-300))
+
+
+def panel_report(tickers: int = 500, days: int = 20_000, seed: int = 0) -> tuple:
+    """``(modes, checks)``: peak memory and accuracy of panel statistics, float64 vs compact float32.
+
+    The float64 path builds the panel and reduces it with NumPy in one go.
+    The compact path stores float32 and reduces in float64 chunks. Both
+    panels come from the same float64 draw, generated in blocks so the draw
+    does not count towards either peak.
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, days)
+    loadings = rng.uniform(0.5, 1.5, tickers)
+
+    def panel(dtype):
+        out = np.empty((days, tickers), dtype=dtype)
+        for start in range(0, days, 4096):
+            block = market[start:start + 4096, None] * loadings
+            out[start:start + 4096] = block + rng.normal(0.0002, 0.015, block.shape)
+        return out
+
+    state = rng.bit_generator.state
+
+    def full():
+        x = panel(np.float64)
+        mean, var = x.mean(axis=0), x.var(axis=0, ddof=1)
+        cov = np.cov(x, rowvar=False)
+        # The demeaned market sums to zero, so x needs no demeaned copy
+        dm = market - market.mean()
+        beta = dm @ x / (dm @ dm)
+        return mean, var, cov, beta
+
+    def compact():
+        rng.bit_generator.state = state
+        x = panel(STORAGE_DTYPE)
+        _, mean, var = chunked_moments(x)
+        _, cov = chunked_cov(x)
+        beta = chunked_beta(x, compact_array(market))
+        return mean, var, cov, beta
+
+    (ref, ref_peak, ref_s), (got, peak, s) = _traced(full), _traced(compact)
+    rows = [{"metric": name, "rel_error": _relative_error(g, r)}
+            for name, g, r in zip(["mean", "variance", "covariance", "beta"], got, ref)]
+    for row in rows:
+        row["ok"] = row["rel_error"] <= TOLERANCE
+    return [{"mode": "float64", "peak_mb": ref_peak / 1e6, "seconds": ref_s},
+            {"mode": "compact", "peak_mb": peak / 1e6, "seconds": s}], rows
+
+
+def model_report(model: AnalysisModel) -> list:
+    """Range-index metrics of the workbook model vs its compact copy, per frequency."""
+    from fmwai.range_index import PrefixSumIndex
+
+    small = compact_model(model)
+    rows = []
+    for full, comp in zip(model.frequencies, small.frequencies):
+        a = PrefixSumIndex.build(full.returns, full.periods_per_year).stats()
+        b = PrefixSumIndex.build(comp.returns, comp.periods_per_year).stats()
+        for metric in ["ann_return", "ann_vol", "beta", "r_squared", "cumulative_return"]:
+            err = _relative_error(getattr(b, metric), getattr(a, metric))
+            rows.append({"frequency": full.name, "metric": metric, "rel_error": err, "ok": err <= TOLERANCE})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Peak memory and accuracy of compact (float32) mode vs float64.")
+    parser.add_argument("--workbook", default="FMWAI_Analysis.xlsx")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    from fmwai.model import load_model
+
+    model = load_model(args.workbook)
+    print(f"Workbook model arrays: {memory_bytes(model) / 1e3:.1f} kB float64, "
+          f"{memory_bytes(compact_model(model)) / 1e3:.1f} kB compact")
+    checks = model_report(model)
+    modes, panel_checks = panel_report(args.tickers, args.days)
+    print(pd.DataFrame(checks).to_string(index=False, float_format=lambda x: f"{x:.2e}"))
+    print(f"\n{args.tickers} tickers x {args.days:,} days")
+    print(pd.DataFrame(modes).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    print(pd.DataFrame(panel_checks).to_string(index=False, float_format=lambda x: f"{x:.2e}"))
+    failed = [c for c in checks + panel_checks if not c["ok"]]
+    print(f"\n{'FAIL' if failed else 'PASS'}: {len(checks + panel_checks) - len(failed)} of "
+          f"{len(checks + panel_checks)} metrics within {TOLERANCE:g} of float64")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Event study: abnormal returns around corporate events.
+
+Each event gets a market-model regression (r = alpha + beta * r_m) on its own
+estimation window before the event. The regressions come from prefix sums of
+r, r², r_m, r_m² and r·r_m per ticker, so an estimation window costs O(1)
+whatever its length. Event windows are gathered for all events at once as a
+stacked (events x days) index array. AR, CAR and CAAR and their t-statistics
+therefore come out of a handful of array operations, with no loop over
+events.
+
+Offsets are in trading days relative to day 0, the first trading day on or
+after the event date.
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fmwai.model import MarketSeries
+
+DEFAULT_ESTIMATION = (-250, -11)
+DEFAULT_WINDOW = (-5, 5)
+# Fewer estimation returns than this leave an event out
+MIN_ESTIMATION = 30
+
+
+@dataclass(frozen=True)
+class EventStudy:
+    events: pd.DataFrame     # one row per event: parameters, CAR and its t-stat
+    days: np.ndarray         # event-window offsets
+    ar: np.ndarray           # (events, days) abnormal returns; NaN rows for dropped events
+    car: np.ndarray          # (events, days) cumulative abnormal returns
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.events["Valid"].to_numpy()
+
+    def summary(self) -> pd.DataFrame:
+        """Average AR and CAAR per event day across the valid events.
+
+        ``AAR t`` and ``CAAR t`` use each event's estimation-window residual
+        variance (independent events); ``CAAR t (cross-section)`` uses the
+        dispersion of CARs across events, which is robust to event-induced
+        variance.
+        """
+        ar, car = self.ar[self.valid], self.car[self.valid]
+        sigma2 = self.events.loc[self.valid, "Residual Vol"].to_numpy() ** 2
+        n = len(ar)
+        length = np.arange(1, len(self.days) + 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aar = ar.mean(axis=0)
+            caar = car.mean(axis=0)
+            pooled = np.sqrt(sigma2.sum()) / n
+            # Undefined (NaN) for fewer than two events
+            cross = car.std(axis=0, ddof=1) / np.sqrt(n) if n > 1 else np.full(len(self.days), np.nan)
+            return pd.DataFrame({
+                "AAR": aar,
+                "AAR t": aar / pooled,
+                "CAAR": caar,
+                "CAAR t": caar / (pooled * np.sqrt(length)),
+                "CAAR t (cross-section)": caar / cross,
+                "Positive CAR %": (car > 0).mean(axis=0),
+            }, index=pd.Index(self.days, name="Day"))
+
+
+# -----------------------
+# Estimation
+# -----------------------
+def _prefix(values: np.ndarray) -> np.ndarray:
+    out = np.empty((len(values) + 1,) + values.shape[1:])
+    out[0] = 0.0
+    out[1:] = values
+    return np.add.accumulate(out, axis=0, out=out)
+
+
+def event_study(dates, stock, market, event_dates, tickers=None, estimation=DEFAULT_ESTIMATION,
+                window=DEFAULT_WINDOW) -> EventStudy:
+    """AR/CAR for every event in one pass.
+
+    ``stock`` is a return series, or an (n, k) panel of k tickers on the
+    ``dates`` axis, and ``market`` the matching market returns. ``tickers``
+    gives each event's panel column (default 0). An event whose estimation
+    or event window runs off the sample, or whose estimation window has
+    fewer than ``MIN_ESTIMATION`` returns (NaNs excluded), is kept with
+    ``Valid`` False and NaN results.
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    stock = np.asarray(stock, dtype=np.float64)
+    stock = stock[:, None] if stock.ndim == 1 else stock
+    market = np.asarray(market, dtype=np.float64)
+    event_dates = np.asarray(event_dates, dtype="datetime64[ns]")
+    tickers = np.zeros(len(event_dates), dtype=np.int64) if tickers is None else np.asarray(tickers, dtype=np.int64)
+    (e0, e1), (w0, w1) = estimation, window
+    if not e0 <= e1 < w0 <= w1:
+        raise ValueError("estimation window must end before the event window starts")
+
+    # Centre on full-sample means, as in range_index, so the variance sums stay stable.
+    # Missing returns (a ticker not yet listed) drop out of every sum and count.
+    present = ~np.isnan(stock) & ~np.isnan(market)[:, None]
+    cr = np.nanmean(np.where(present, stock, np.nan), axis=0)
+    cm = float(np.nanmean(market))
+    x = np.where(present, stock - cr, 0.0)
+    y = np.where(present, (market - cm)[:, None], 0.0)
+    S = {name: _prefix(v) for name, v in
+         {"n": present.astype(np.float64), "x": x, "y": y, "xx": x * x, "yy": y * y, "xy": x * y}.items()}
+
+    # Positions of day 0 and of the estimation windows, one row per event
+    day0 = np.searchsorted(dates, event_dates, "left")
+    lo, hi = day0 + e0, day0 + e1 + 1
+    last = day0 + w1
+    in_sample = (lo >= 0) & (last < len(dates)) & (day0 < len(dates))
+    lo_c, hi_c = np.clip(lo, 0, len(dates)), np.clip(hi, 0, len(dates))
+    d = {name: s[hi_c, tickers] - s[lo_c, tickers] for name, s in S.items()}
+    n = d["n"]
+    valid = in_sample & (n >= MIN_ESTIMATION)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x, mean_y = d["x"] / n, d["y"] / n
+        sxx = d["xx"] - d["x"] * mean_x
+        syy = d["yy"] - d["y"] * mean_y
+        sxy = d["xy"] - d["x"] * mean_y
+        beta = np.where(valid, sxy / syy, np.nan)
+        alpha = (mean_x + cr[tickers]) - beta * (mean_y + cm)
+        sigma = np.sqrt(np.maximum(sxx - beta * sxy, 0.0) / (n - 2))
+
+    # Stacked event-window gather: (events, days) positions
+    days = np.arange(w0, w1 + 1)
+    pos = np.clip(day0[:, None] + days[None, :], 0, len(dates) - 1)
+    r = stock[pos, tickers[:, None]]
+    ar = r - (alpha[:, None] + beta[:, None] * market[pos])
+    ar[~valid] = np.nan
+    car = np.cumsum(ar, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        car_t = car[:, -1] / (sigma * np.sqrt(len(days)))
+    events = pd.DataFrame({
+        "Ticker": tickers,
+        "Event Date": event_dates,
+        "Day 0": np.where(day0 < len(dates), dates[np.minimum(day0, len(dates) - 1)], np.datetime64("NaT")),
+        "Estimation N": n.astype(np.int64),
+        "Alpha": alpha,
+        "Beta": beta,
+        "Residual Vol": sigma,
+        "AR Day 0": ar[:, days.tolist().index(0)] if w0 <= 0 <= w1 else np.nan,
+        "CAR": car[:, -1],
+        "CAR t": car_t,
+        "Valid": valid,
+    })
+    return EventStudy(events, days, ar, car)
+
+
+def study_series(returns: MarketSeries, event_dates, estimation=DEFAULT_ESTIMATION,
+                 window=DEFAULT_WINDOW) -> EventStudy:
+    """Event study on one stock's ``MarketSeries`` of returns."""
+    return event_study(returns.dates, returns.stock, returns.market, event_dates, estimation=estimation,
+                       window=window)
+
+
+def parse_event_dates(text: str) -> np.ndarray:
+    """Dates from free text, one per line or comma-separated; blank entries are skipped."""
+    tokens = [t.strip() for t in text.replace(",", "\n").splitlines() if t.strip()]
+    return np.sort(pd.to_datetime(tokens).to_numpy(dtype="datetime64[ns]"))
+
+
+# -----------------------
+# BENCHMARK
+# -----------------------
+def benchmark(tickers: int = 500, days: int = 5000, events: int = 10_000, seed: int = 0) -> dict:
+    """Synthetic universe with a known day-0 jump; reports time and the recovered day-0 AAR."""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2005-01-03", "ns") + np.arange(days) * np.timedelta64(1, "D")
+    market = rng.normal(0.0004, 0.01, days)
+    betas = rng.uniform(0.5, 1.5, tickers)
+    panel = 0.0002 + betas * market[:, None] + rng.normal(0, 0.015, (days, tickers))
+    who = rng.integers(0, tickers, events)
+    when = rng.integers(300, days - 30, events)
+    panel[when, who] += 0.02  # 2% abnormal return on day 0
+    started = time.perf_counter()
+    result = event_study(dates, panel, market, dates[when], who)
+    seconds = time.perf_counter() - started
+    summary = result.summary()
+    return {"tickers": tickers, "days": days, "events": events, "seconds": seconds,
+            "aar_day0": float(summary.loc[0, "AAR"]), "aar_t_day0": float(summary.loc[0, "AAR t"]),
+            "beta_error": float(np.nanmean(np.abs(result.events["Beta"] - betas[who])))}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Abnormal returns around event dates (market-model event study).")
+    parser.add_argument("dates", nargs="*", help="event dates (YYYY-MM-DD)")
+    parser.add_argument("--workbook", default="FMWAI_Analysis.xlsx")
+    parser.add_argument("--file", help="file of event dates, one per line")
+    parser.add_argument("--estimation", type=int, nargs=2, default=DEFAULT_ESTIMATION, metavar=("FROM", "TO"))
+    parser.add_argument("--window", type=int, nargs=2, default=DEFAULT_WINDOW, metavar=("FROM", "TO"))
+    parser.add_argument("--benchmark", action="store_true", help="time 10,000 events on a 500-ticker universe")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        for key, value in benchmark().items():
+            print(f"{key:>12}: {value:,.4f}" if isinstance(value, float) else f"{key:>12}: {value:,}")
+        return
+    from fmwai.model import load_model
+
+    text = "\n".join(args.dates) + ("\n" + open(args.file).read() if args.file else "")
+    result = study_series(load_model(args.workbook).frequency("Daily").returns, parse_event_dates(text),
+                          tuple(args.estimation), tuple(args.window))
+    print(result.events.drop(columns="Ticker").to_string(index=False, float_format=lambda x: f"{x:,.4f}"))
+    print()
+    print(result.summary().to_string(float_format=lambda x: f"{x:,.4f}"))
+
+
+if __name__ == "__main__":
+    main()
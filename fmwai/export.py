@@ -0,0 +1,227 @@
+"""Streaming export of large result grids to Parquet, CSV and XLSX.
+
+Results arrive as an iterator of DataFrame chunks and are written one chunk
+at a time, so memory is bounded by the chunk size, not the export size.
+Parquet goes through Arrow's ``ParquetWriter`` (one row group per chunk;
+pyarrow is optional). CSV goes through a buffered text writer. XLSX uses
+openpyxl's write-only mode, which starts a new sheet at Excel's row limit.
+Files are written under a temporary name and moved into place once
+complete.
+"""
+import argparse
+import importlib.util
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from fmwai.sensitivity import DRIVERS, SensitivityBase, evaluate
+
+FORMATS = ("parquet", "csv", "xlsx")
+DEFAULT_CHUNK_ROWS = 100_000
+# Larger exports are not offered as browser downloads, which Streamlit holds in memory
+MAX_DOWNLOAD_BYTES = 64 * 1024 ** 2
+EXCEL_MAX_ROWS = 1_048_576
+MIME_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    path: str
+    format: str
+    rows: int
+    bytes: int
+    seconds: float
+
+
+def available_formats() -> tuple:
+    """Formats whose writer can run here; Parquet needs pyarrow."""
+    return tuple(f for f in FORMATS if f != "parquet" or importlib.util.find_spec("pyarrow") is not None)
+
+
+# -----------------------
+# Chunk sources
+# -----------------------
+def frame_chunks(frame: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    for i in range(0, len(frame), chunk_rows):
+        yield frame.iloc[i:i + chunk_rows]
+
+
+def grid_chunks(base: SensitivityBase, x_driver: str, y_driver: str, x_values, y_values,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Long-format WACC and NPV over the ``x_values`` x ``y_values`` grid, a slice at a time.
+
+    Grid cells are addressed by their flat index, so no full meshgrid or
+    design matrix is ever built; each chunk is evaluated with ``evaluate``.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    xcol, ycol = DRIVERS.index(x_driver), DRIVERS.index(y_driver)
+    x0 = base.vector()
+    total = x_values.size * y_values.size
+    for start in range(0, total, chunk_rows):
+        yi, xi = np.divmod(np.arange(start, min(start + chunk_rows, total)), x_values.size)
+        X = np.tile(x0, (len(xi), 1))
+        X[:, xcol] = x_values[xi]
+        X[:, ycol] = y_values[yi]
+        wacc, value = evaluate(base, X)
+        yield pd.DataFrame({x_driver: X[:, xcol], y_driver: X[:, ycol], "WACC": wacc, "NPV": value})
+
+
+def scenario_chunks(scenarios: list, market, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Scenario comparison (``fmwai.scenarios.compare``) evaluated and emitted a slice at a time."""
+    from fmwai.scenarios import compare
+
+    for i in range(0, len(scenarios), chunk_rows):
+        yield compare(scenarios[i:i + chunk_rows], market).reset_index()
+
+
+# -----------------------
+# Writers
+# -----------------------
+def write_parquet(chunks: Iterable[pd.DataFrame], path, compression: str = "zstd") -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow); "
+                          "or export to csv/xlsx") from e
+    rows, writer = 0, None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+def write_csv(chunks: Iterable[pd.DataFrame], path) -> int:
+    rows, header_written = 0, False
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=not header_written, index=False)
+            header_written = True
+            rows += len(chunk)
+    return rows
+
+
+def write_xlsx(chunks: Iterable[pd.DataFrame], path, sheet: str = "Results") -> int:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws, sheet_rows, rows, sheets = None, EXCEL_MAX_ROWS, 0, 0
+    for chunk in chunks:
+        # Excel has no NaN; blank cells instead
+        values = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+        for row in values:
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet(sheet if sheets == 1 else f"{sheet}_{sheets}")
+                ws.append(list(chunk.columns))
+                sheet_rows = 1
+            ws.append(row)
+            sheet_rows += 1
+        rows += len(chunk)
+    if ws is None:
+        wb.create_sheet(sheet)
+    wb.save(path)
+    return rows
+
+
+WRITERS = {"parquet": write_parquet, "csv": write_csv, "xlsx": write_xlsx}
+
+
+def export(chunks: Iterable[pd.DataFrame], path, fmt: Optional[str] = None) -> ExportResult:
+    """Stream ``chunks`` to ``path``; the format defaults to the file extension."""
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {FORMATS}")
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    started = time.perf_counter()
+    try:
+        rows = WRITERS[fmt](chunks, tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return ExportResult(str(path), fmt, rows, path.stat().st_size, time.perf_counter() - started)
+
+
+# -----------------------
+# CLI
+# -----------------------
+def _workbook_inputs(workbook: str) -> tuple:
+    """Risk-free rate, Ke and the equity beta behind it over the workbook's full period, as on the dashboard."""
+    from fmwai.model import load_model
+    from fmwai.range_index import PrefixSumIndex
+
+    model = load_model(workbook)
+    windows = [PrefixSumIndex.build(f.returns, f.periods_per_year).stats() for f in model.frequencies]
+    rf = model.cost_of_capital.rf
+    ke = float(np.nanmean([rf + w.beta * (w.market_return - rf) for w in windows]))
+    return rf, ke, float(np.nanmean([w.beta for w in windows]))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Stream sensitivity grids or saved scenarios to Parquet/CSV/XLSX.")
+    parser.add_argument("--workbook", default="FMWAI_Analysis.xlsx", help="source of rf, Ke and beta")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    commands = parser.add_subparsers(dest="command", required=True)
+    grid = commands.add_parser("grid", help="two-way WACC/NPV grid around the dashboard's base case")
+    grid.add_argument("out")
+    grid.add_argument("--x", default="debt_pct", choices=DRIVERS)
+    grid.add_argument("--y", default="ebitda_margin", choices=DRIVERS)
+    grid.add_argument("--points", type=int, default=1001, help="grid points per axis")
+    grid.add_argument("--rel", type=float, default=0.5, help="each axis spans base x (1 +/- rel)")
+    grid.add_argument("--debt-pct", type=float, default=25.0, help="base target debt %%")
+    grid.add_argument("--kd-pre-tax", type=float, default=7.5, help="base pre-tax cost of debt %%")
+    scen = commands.add_parser("scenarios", help="comparison of saved scenarios")
+    scen.add_argument("out")
+    scen.add_argument("--debt-pct", type=float, default=25.0, help="base debt %% the period beta is unlevered at")
+    scen.add_argument("--store", default="scenarios.db")
+    scen.add_argument("--tag")
+    args = parser.parse_args(argv)
+
+    rf, ke, beta = _workbook_inputs(args.workbook)
+    if args.command == "grid":
+        base = SensitivityBase.from_ke(ke=ke, beta=beta, rf=rf, kd_pre_tax=args.kd_pre_tax / 100, tax_rate=0.25,
+                                       debt_pct=args.debt_pct / 100)
+        steps = 1 + np.linspace(-args.rel, args.rel, args.points)
+        chunks = grid_chunks(base, args.x, args.y, getattr(base, args.x) * steps, getattr(base, args.y) * steps,
+                             args.chunk_rows)
+    else:
+        from fmwai.scenarios import MarketInputs, ScenarioStore
+
+        scenarios = ScenarioStore(args.store).list(tag=args.tag)
+        market = MarketInputs.from_ke(ke, beta, rf, args.debt_pct / 100, tax_rate=0.25)
+        chunks = scenario_chunks(scenarios, market, args.chunk_rows)
+    result = export(chunks, args.out)
+    print(f"{result.rows:,} rows -> {result.path} ({result.format}, {result.bytes / 1e6:.1f} MB) "
+          f"in {result.seconds:.2f}s")
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    # ru_maxrss is KiB on Linux
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Typed in-memory model of FMWAI_Analysis.xlsx.
+
+The workbook is read and validated once. Every sheet, column and row label the
+dashboard relies on is checked up front, and any drift raises ``SchemaError``
+rather than letting pages fall back to stale constants. Metrics are then plain
+attribute reads, and series are NumPy arrays.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+FREQUENCIES = ("Daily", "Weekly", "Monthly")
+PERIODS_PER_YEAR = {"Daily": 252, "Weekly": 52, "Monthly": 12}
+
+SERIES_COLUMNS = ["Stock_Close", "Market_Close"]
+
+# sheet -> (required columns, required row labels)
+SCHEMA = {
+    "Data": (SERIES_COLUMNS, []),
+    "Returns_Daily": (SERIES_COLUMNS, []),
+    "Returns_Weekly": (SERIES_COLUMNS, []),
+    "Returns_Monthly": (SERIES_COLUMNS, []),
+    "Risk_Return_Summary": (["Annualised Mean Return", "Annualised Volatility"], list(FREQUENCIES)),
+    "CAPM_Regression": (["Beta", "Alpha", "R_squared"], list(FREQUENCIES)),
+    "CAPM_Expected_Returns": (["Beta", "Market_Return", "CAPM_Expected_Return"], list(FREQUENCIES)),
+    "Capital_Structure_WACC": (["Value"], ["Risk-free rate", "Cost of Debt (Pre-tax)", "Cost of Debt (After-tax)",
+                                           "Cost of Equity", "WACC (Current)", "WACC (25%D / 75%E)"]),
+    "Beta_Adjustments": (["Equity_Beta", "Asset_Beta", "Relevered_Beta"], list(FREQUENCIES)),
+    "Project_Financials": (["Revenue", "EBITDA", "EBIT", "NOPAT", "Capex", "FCFF"], []),
+    "Project_Risk": (["Value"], ["Project Asset Beta", "Project Cost of Equity"]),
+}
+
+
+class SchemaError(ValueError):
+    """The workbook does not match the layout the dashboard expects."""
+
+
+@dataclass(frozen=True, slots=True)
+class MarketSeries:
+    """Aligned stock and market series (prices or returns) on one date axis."""
+    dates: np.ndarray   # datetime64[ns]
+    stock: np.ndarray
+    market: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def between(self, start=None, end=None) -> "MarketSeries":
+        """Observations dated within [start, end], as views of these arrays."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "ns"), "left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end, "ns"), "right")
+        return MarketSeries(self.dates[lo:hi], self.stock[lo:hi], self.market[lo:hi])
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"Stock_Close": self.stock, "Market_Close": self.market},
+                            index=pd.DatetimeIndex(self.dates, name="Date"))
+
+
+@dataclass(frozen=True, slots=True)
+class FrequencyMetrics:
+    name: str
+    periods_per_year: int
+    returns: MarketSeries
+    ann_return: float
+    ann_vol: float
+    beta: float
+    alpha: float
+    r_squared: float
+    market_return: float
+    capm_expected_return: float
+    asset_beta: float
+    relevered_beta: float
+
+
+@dataclass(frozen=True, slots=True)
+class CostOfCapital:
+    rf: float
+    kd_pre_tax: float
+    kd_after_tax: float
+    ke: float
+    wacc_current: float
+    wacc_target: float
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectSchedule:
+    years: tuple
+    revenue: np.ndarray
+    ebitda: np.ndarray
+    ebit: np.ndarray
+    nopat: np.ndarray
+    capex: np.ndarray
+    fcff: np.ndarray
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectRisk:
+    asset_beta: float
+    cost_of_equity: float
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisModel:
+    prices: MarketSeries
+    daily: FrequencyMetrics
+    weekly: FrequencyMetrics
+    monthly: FrequencyMetrics
+    cost_of_capital: CostOfCapital
+    project: ProjectSchedule
+    project_risk: ProjectRisk
+
+    @property
+    def frequencies(self) -> tuple:
+        return (self.daily, self.weekly, self.monthly)
+
+    def frequency(self, name: str) -> FrequencyMetrics:
+        if name not in FREQUENCIES:
+            raise KeyError(f"unknown frequency {name!r}; expected one of {FREQUENCIES}")
+        return getattr(self, name.lower())
+
+
+def _validate(sheets: dict) -> None:
+    problems = []
+    for sheet, (columns, rows) in SCHEMA.items():
+        if sheet not in sheets:
+            problems.append(f"missing sheet {sheet!r}")
+            continue
+        df = sheets[sheet]
+        missing_cols = [c for c in columns if c not in df.columns]
+        if missing_cols:
+            problems.append(f"{sheet}: missing columns {missing_cols}")
+        missing_rows = [r for r in rows if r not in df.index]
+        if missing_rows:
+            problems.append(f"{sheet}: missing rows {missing_rows}")
+        present = [c for c in columns if c in df.columns]
+        if df.empty or df[present].isna().any().any():
+            problems.append(f"{sheet}: empty or contains missing values")
+    if problems:
+        raise SchemaError("FMWAI_Analysis.xlsx schema mismatch: " + "; ".join(problems))
+
+
+def _series(df: pd.DataFrame) -> MarketSeries:
+    if not isinstance(df.index, pd.DatetimeIndex) or not df.index.is_monotonic_increasing:
+        raise SchemaError("series sheets must have an increasing date index")
+    return MarketSeries(
+        dates=df.index.to_numpy(dtype="datetime64[ns]"),
+        stock=df["Stock_Close"].to_numpy(dtype=np.float64),
+        market=df["Market_Close"].to_numpy(dtype=np.float64),
+    )
+
+
+def build_model(sheets: dict) -> AnalysisModel:
+    """Validate raw sheets (indexed by their first column) and build the model."""
+    _validate(sheets)
+    risk = sheets["Risk_Return_Summary"]
+    capm = sheets["CAPM_Regression"]
+    expected = sheets["CAPM_Expected_Returns"]
+    betas = sheets["Beta_Adjustments"]
+    wacc = sheets["Capital_Structure_WACC"]["Value"]
+    project = sheets["Project_Financials"]
+    project_risk = sheets["Project_Risk"]["Value"]
+
+    freqs = {
+        name: FrequencyMetrics(
+            name=name,
+            periods_per_year=PERIODS_PER_YEAR[name],
+            returns=_series(sheets[f"Returns_{name}"]),
+            ann_return=float(risk.at[name, "Annualised Mean Return"]),
+            ann_vol=float(risk.at[name, "Annualised Volatility"]),
+            beta=float(capm.at[name, "Beta"]),
+            alpha=float(capm.at[name, "Alpha"]),
+            r_squared=float(capm.at[name, "R_squared"]),
+            market_return=float(expected.at[name, "Market_Return"]),
+            capm_expected_return=float(expected.at[name, "CAPM_Expected_Return"]),
+            asset_beta=float(betas.at[name, "Asset_Beta"]),
+            relevered_beta=float(betas.at[name, "Relevered_Beta"]),
+        )
+        for name in FREQUENCIES
+    }
+    return AnalysisModel(
+        prices=_series(sheets["Data"]),
+        daily=freqs["Daily"],
+        weekly=freqs["Weekly"],
+        monthly=freqs["Monthly"],
+        cost_of_capital=CostOfCapital(
+            rf=float(wacc["Risk-free rate"]),
+            kd_pre_tax=float(wacc["Cost of Debt (Pre-tax)"]),
+            kd_after_tax=float(wacc["Cost of Debt (After-tax)"]),
+            ke=float(wacc["Cost of Equity"]),
+            wacc_current=float(wacc["WACC (Current)"]),
+            wacc_target=float(wacc["WACC (25%D / 75%E)"]),
+        ),
+        project=ProjectSchedule(
+            years=tuple(project.index),
+            **{col.lower(): project[col].to_numpy(dtype=np.float64)
+               for col in ["Revenue", "EBITDA", "EBIT", "NOPAT", "Capex", "FCFF"]},
+        ),
+        project_risk=ProjectRisk(
+            asset_beta=float(project_risk["Project Asset Beta"]),
+            cost_of_equity=float(project_risk["Project Cost of Equity"]),
+        ),
+    )
+
+
+def load_model(path: str = "FMWAI_Analysis.xlsx") -> AnalysisModel:
+    """Read every sheet once, then validate and build the model."""
+    sheets = pd.read_excel(path, sheet_name=None, index_col=0)
+    for name in ["Data", "Returns_Daily", "Returns_Weekly", "Returns_Monthly"]:
+        if name in sheets:
+            sheets[name].index = pd.to_datetime(sheets[name].index)
+    return build_model(sheets)
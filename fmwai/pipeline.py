@@ -0,0 +1,365 @@
+"""Incremental build of FMWAI_Analysis.xlsx from raw prices.
+
+The notebook's download -> clean -> returns -> annualise/CAPM -> Ke -> WACC ->
+project steps are stages of a DAG. A stage's key hashes its code, the config
+fields it reads and the content digests of its inputs, and outputs live in the
+shared ``ResultCache``, so only stages whose inputs actually changed are
+recomputed; a refreshed download that returns the same prices stops there.
+A stage's code is its own source, the factory and captured values of a
+closure, the same-module helpers it calls, and the source of every ``fmwai``
+module it calls into, so editing ``quality.py`` reruns cleaning and what
+follows but not the project build. Stages on the same level (the three
+frequencies, the project build) run in parallel.
+"""
+import argparse
+import hashlib
+import inspect
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from fmwai.cache import DEFAULT_CACHE_DIR, ResultCache, file_digest
+from fmwai.model import FREQUENCIES, PERIODS_PER_YEAR
+from fmwai.project_model import ProjectDrivers, build_financials
+from fmwai.quality import QualityConfig, clean_prices
+
+# Bump to invalidate every cached stage, e.g. after a pandas upgrade
+PIPELINE_VERSION = 1
+
+PROJECT_COLUMNS = ["Revenue", "EBITDA", "EBIT", "NOPAT", "Capex", "FCFF"]
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    stock_ticker: str = "HCLTECH.NS"
+    market_ticker: str = "^NSEI"
+    start: str = "2022-04-01"
+    end: str = "2025-03-28"
+    prices_path: Optional[str] = None    # workbook/CSV with Stock_Close, Market_Close; None downloads
+    rf: float = 0.06
+    kd_pre_tax: float = 0.075
+    tax_rate: float = 0.25
+    target_debt: float = 0.25            # D/V of the target structure
+    project_asset_beta: float = 0.849    # peer-weighted, see the notebook
+    drivers: ProjectDrivers = ProjectDrivers()
+    quality: QualityConfig = QualityConfig()
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable                       # func(config, *dependency outputs)
+    deps: tuple = ()
+    params: tuple = ()                   # PipelineConfig fields the stage reads
+
+
+# -----------------------
+# STAGES
+# -----------------------
+def load_prices(config: PipelineConfig) -> pd.DataFrame:
+    if config.prices_path:
+        if config.prices_path.endswith(".csv"):
+            prices = pd.read_csv(config.prices_path, index_col=0)
+        else:
+            prices = pd.read_excel(config.prices_path, sheet_name="Data", index_col=0)
+        prices.index = pd.to_datetime(prices.index)
+        return prices[["Stock_Close", "Market_Close"]]
+    try:
+        import yfinance as yf
+    except ImportError as e:
+        raise ImportError("downloading prices needs yfinance (pip install yfinance); "
+                          "or pass prices_path") from e
+    closes = {}
+    for column, ticker in [("Stock_Close", config.stock_ticker), ("Market_Close", config.market_ticker)]:
+        data = yf.download(ticker, start=config.start, end=config.end, auto_adjust=True, progress=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        closes[column] = data["Close"]
+    return pd.DataFrame(closes).rename_axis("Date")
+
+
+def clean(config: PipelineConfig, prices: pd.DataFrame):
+    # Without the run time, cleaning identical prices gives an identical digest
+    cleaned, report = clean_prices(prices, config.quality)
+    return cleaned, replace(report, run_at=None)
+
+
+def returns(freq: str):
+    rule = {"Daily": None, "Weekly": "W-FRI", "Monthly": "ME"}[freq]
+
+    def stage(config: PipelineConfig, cleaned) -> pd.DataFrame:
+        prices = cleaned[0]
+        if rule:
+            prices = prices.resample(rule).last()
+        return prices.pct_change().dropna()
+    return stage
+
+
+def capm(freq: str):
+    ppy = PERIODS_PER_YEAR[freq]
+
+    def stage(config: PipelineConfig, rets: pd.DataFrame) -> dict:
+        y = rets["Stock_Close"].to_numpy()
+        x = rets["Market_Close"].to_numpy()
+        cov = np.cov(x, y)
+        beta = cov[0, 1] / cov[0, 0]
+        market_return = x.mean() * ppy
+        return {
+            "ann_return": y.mean() * ppy,
+            "ann_vol": y.std(ddof=1) * np.sqrt(ppy),
+            "beta": beta,
+            "alpha": y.mean() - beta * x.mean(),
+            "r_squared": cov[0, 1] ** 2 / (cov[0, 0] * cov[1, 1]),
+            "market_return": market_return,
+            "capm_expected_return": config.rf + beta * (market_return - config.rf),
+        }
+    return stage
+
+
+def cost_of_capital(config: PipelineConfig, *frequencies) -> pd.DataFrame:
+    ke = float(np.mean([f["capm_expected_return"] for f in frequencies]))
+    kd_after_tax = config.kd_pre_tax * (1 - config.tax_rate)
+    # The firm is treated as all-equity today, so current WACC is Ke
+    wacc_target = (1 - config.target_debt) * ke + config.target_debt * kd_after_tax
+    return pd.DataFrame({"Value": [config.rf, config.kd_pre_tax, kd_after_tax, ke, ke, wacc_target]},
+                        index=["Risk-free rate", "Cost of Debt (Pre-tax)", "Cost of Debt (After-tax)",
+                               "Cost of Equity", "WACC (Current)", "WACC (25%D / 75%E)"])
+
+
+def beta_adjustments(config: PipelineConfig, *frequencies) -> pd.DataFrame:
+    equity = np.array([f["beta"] for f in frequencies])
+    lever = 1 + (1 - config.tax_rate) * config.target_debt / (1 - config.target_debt)
+    asset = equity / lever
+    return pd.DataFrame({"Equity_Beta": equity, "Asset_Beta": asset, "Relevered_Beta": asset * lever},
+                        index=list(FREQUENCIES))
+
+
+def project(config: PipelineConfig) -> pd.DataFrame:
+    return build_financials(config.drivers).to_frame()[PROJECT_COLUMNS]
+
+
+def project_risk(config: PipelineConfig, monthly: dict) -> pd.DataFrame:
+    beta = config.project_asset_beta
+    ke = config.rf + beta * (monthly["market_return"] - config.rf)
+    return pd.DataFrame({"Value": [beta, ke]}, index=["Project Asset Beta", "Project Cost of Equity"])
+
+
+def sheets(config: PipelineConfig, cleaned, daily_r, weekly_r, monthly_r, daily, weekly, monthly,
+           wacc, betas, financials, risk) -> dict:
+    stats = pd.DataFrame({f: s for f, s in zip(FREQUENCIES, (daily, weekly, monthly))}).T
+    return {
+        "Data": cleaned[0],
+        "Returns_Daily": daily_r,
+        "Returns_Weekly": weekly_r,
+        "Returns_Monthly": monthly_r,
+        "Risk_Return_Summary": stats[["ann_return", "ann_vol"]].rename(
+            columns={"ann_return": "Annualised Mean Return", "ann_vol": "Annualised Volatility"}),
+        "CAPM_Regression": stats[["beta", "alpha", "r_squared"]].rename(
+            columns={"beta": "Beta", "alpha": "Alpha", "r_squared": "R_squared"}),
+        "CAPM_Expected_Returns": stats[["beta", "market_return", "capm_expected_return"]].rename(
+            columns={"beta": "Beta", "market_return": "Market_Return",
+                     "capm_expected_return": "CAPM_Expected_Return"}),
+        "Capital_Structure_WACC": wacc,
+        "Beta_Adjustments": betas,
+        "Project_Financials": financials,
+        "Project_Risk": risk,
+    }
+
+
+CAPM_STAGES = tuple(f"capm_{f.lower()}" for f in FREQUENCIES)
+RETURN_STAGES = tuple(f"returns_{f.lower()}" for f in FREQUENCIES)
+
+STAGES = [
+    Stage("prices", load_prices, params=("stock_ticker", "market_ticker", "start", "end", "prices_path")),
+    Stage("clean", clean, ("prices",), ("quality",)),
+    *[Stage(r, returns(f), ("clean",)) for r, f in zip(RETURN_STAGES, FREQUENCIES)],
+    *[Stage(c, capm(f), (r,), ("rf",)) for c, r, f in zip(CAPM_STAGES, RETURN_STAGES, FREQUENCIES)],
+    Stage("cost_of_capital", cost_of_capital, CAPM_STAGES, ("rf", "kd_pre_tax", "tax_rate", "target_debt")),
+    Stage("beta_adjustments", beta_adjustments, CAPM_STAGES, ("tax_rate", "target_debt")),
+    Stage("project", project, params=("drivers",)),
+    Stage("project_risk", project_risk, ("capm_monthly",), ("rf", "project_asset_beta")),
+    Stage("sheets", sheets, ("clean", *RETURN_STAGES, *CAPM_STAGES, "cost_of_capital",
+                             "beta_adjustments", "project", "project_risk")),
+]
+
+
+# -----------------------
+# RUNNER
+# -----------------------
+def _levels(stages) -> list:
+    """Group stages into dependency levels; stages within a level are independent."""
+    depth = {}
+    for s in stages:
+        depth[s.name] = 1 + max((depth[d] for d in s.deps), default=-1)
+    return [[s for s in stages if depth[s.name] == k] for k in range(max(depth.values()) + 1)]
+
+
+@dataclass
+class PipelineRun:
+    digests: dict                        # stage -> content digest of its output
+    computed: list = field(default_factory=list)
+    cached: list = field(default_factory=list)
+    elapsed: float = 0.0
+    outputs: dict = field(default_factory=dict, repr=False)
+    cache: Optional[ResultCache] = field(default=None, repr=False)
+
+    def __getitem__(self, name: str):
+        """Output of a stage, loaded from the cache on first access."""
+        if name not in self.outputs:
+            self.outputs[name] = self.cache.load(self.digests[name])
+        return self.outputs[name]
+
+
+def _module_source(name: str) -> bytes:
+    with open(sys.modules[name].__file__, "rb") as f:
+        return f.read()
+
+
+def _names(code) -> set:
+    """Global names read by ``code`` and the code objects nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def _package_of(obj) -> Optional[str]:
+    name = obj.__name__ if inspect.ismodule(obj) else getattr(obj, "__module__", None)
+    return name if isinstance(name, str) and name.split(".")[0] == __package__ else None
+
+
+def code_digest(func: Callable) -> str:
+    """Hash of the code behind ``func``.
+
+    Covers its source; for a closure, the factory's source and the captured
+    values; functions and constants of its own module that it reads; and the
+    full source of every other package module it calls into, together with
+    the package modules those import.
+    """
+    h = hashlib.sha256()
+    pending, seen, modules = [func], set(), set()
+    while pending:
+        f = pending.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        h.update(inspect.getsource(f).encode())
+        factory = f.__qualname__.split(".<locals>.")[0]
+        if factory != f.__qualname__:
+            pending.append(f.__globals__[factory])
+        for cell in f.__closure__ or ():
+            value = cell.cell_contents
+            if inspect.isfunction(value):
+                pending.append(value)
+            else:
+                h.update(repr(value).encode())
+        for name in sorted(_names(f.__code__)):
+            obj = f.__globals__.get(name)
+            if isinstance(obj, (int, float, str, tuple, list, dict)):
+                h.update(f"{name}={obj!r}".encode())
+                continue
+            module = _package_of(obj) if obj is not None else None
+            if module is None:
+                continue
+            if module == f.__module__ and inspect.isfunction(obj):
+                pending.append(obj)
+            elif module != f.__module__:
+                modules.add(module)
+    # Package modules reached from those modules
+    queue = list(modules)
+    while queue:
+        for obj in vars(sys.modules[queue.pop()]).values():
+            module = _package_of(obj)
+            if module and module != __name__ and module not in modules:
+                modules.add(module)
+                queue.append(module)
+    for module in sorted(modules):
+        h.update(module.encode())
+        h.update(_module_source(module))
+    return h.hexdigest()
+
+
+def _stage_key(stage: Stage, config: PipelineConfig, dep_digests: list) -> str:
+    h = hashlib.sha256()
+    h.update(f"{PIPELINE_VERSION}:{stage.name}".encode())
+    h.update(code_digest(stage.func).encode())
+    for p in stage.params:
+        h.update(f"{p}={getattr(config, p)!r}".encode())
+    if "prices_path" in stage.params and config.prices_path:
+        h.update(file_digest(config.prices_path).encode())
+    for d in dep_digests:
+        h.update(d.encode())
+    return h.hexdigest()
+
+
+def run_pipeline(config: PipelineConfig = PipelineConfig(), cache_dir: str = DEFAULT_CACHE_DIR,
+                 force=(), max_workers: Optional[int] = None, stages=STAGES) -> PipelineRun:
+    """Bring every stage up to date; ``force`` names stages to recompute regardless."""
+    started = time.perf_counter()
+    run = PipelineRun(digests={}, cache=ResultCache(cache_dir))
+
+    def compute(stage: Stage, key: str):
+        value = stage.func(config, *[run[d] for d in stage.deps])
+        return value, run.cache.put(key, value)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level in _levels(stages):
+            dirty = {}
+            for stage in level:
+                key = _stage_key(stage, config, [run.digests[d] for d in stage.deps])
+                digest = None if stage.name in force else run.cache.ref(key)
+                if digest is None:
+                    dirty[stage.name] = pool.submit(compute, stage, key)
+                else:
+                    run.digests[stage.name] = digest
+                    run.cached.append(stage.name)
+            for name, future in dirty.items():
+                run.outputs[name], run.digests[name] = future.result()
+                run.computed.append(name)
+
+    run.elapsed = time.perf_counter() - started
+    return run
+
+
+def write_workbook(sheets: dict, path: str = "FMWAI_Analysis.xlsx") -> None:
+    tmp = f"{path}.{os.getpid()}.tmp.xlsx"
+    with pd.ExcelWriter(tmp) as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name)
+    os.replace(tmp, path)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild FMWAI_Analysis.xlsx, recomputing only stale stages.")
+    parser.add_argument("--prices", help="workbook (Data sheet) or CSV of prices; default downloads them")
+    parser.add_argument("--out", default="FMWAI_Analysis.xlsx")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--force", nargs="*", default=[], metavar="STAGE",
+                        help="stages to recompute, e.g. 'prices' to re-download")
+    parser.add_argument("--report", help="also write the data-quality report as JSON")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    run = run_pipeline(PipelineConfig(prices_path=args.prices), args.cache_dir,
+                       force=set(args.force), max_workers=args.jobs)
+    if "sheets" in run.computed or not os.path.exists(args.out):
+        write_workbook(run["sheets"], args.out)
+        print(f"wrote {args.out}")
+    if args.report:
+        report = run["clean"][1]
+        replace(report, run_at=datetime.now(timezone.utc).isoformat(timespec="seconds")).to_json(args.report)
+    print(f"computed: {', '.join(run.computed) or '-'}")
+    print(f"cached:   {', '.join(run.cached) or '-'}")
+    print(f"{run.elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
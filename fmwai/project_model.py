@@ -0,0 +1,146 @@
+"""Driver-based project model: P&L to FCFF build and NPV.
+
+Every driver may be a scalar or an array of shape ``(n,)``, one value per
+driver set, so thousands of cases are built in one pass. The revenue growth
+path may also be given per year as a 2-D array of shape ``(n or 1, years - 1)``.
+The default drivers reproduce the AIOps platform case in the notebook and the
+Project_Financials sheet.
+"""
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+LINE_ITEMS = ["Revenue", "EBITDA", "D&A", "EBIT", "Tax", "NOPAT", "Capex", "Change_NWC", "FCFF"]
+
+
+@dataclass(frozen=True)
+class ProjectDrivers:
+    revenue_year1: float = 150.0       # INR crore
+    revenue_growth: float = 0.30       # scalar, (n,), or growth path (n or 1, years - 1)
+    ebitda_margin_start: float = 0.20
+    ebitda_margin_end: float = 0.40    # linear ramp from start to end margin
+    da_pct: float = 0.05               # D&A as % of revenue
+    tax_rate: float = 0.25
+    capex_pct: float = 0.08            # capex as % of revenue
+    nwc_pct: float = 0.0               # net working capital as % of revenue
+    terminal_growth: Optional[float] = None  # Gordon growth on final FCFF; None = no terminal value
+    initial_investment: float = 18.0
+    years: int = 5
+
+
+@dataclass(frozen=True)
+class ProjectFinancials:
+    """Line items of shape (n, years), one row per driver set."""
+    Revenue: np.ndarray
+    EBITDA: np.ndarray
+    DA: np.ndarray
+    EBIT: np.ndarray
+    Tax: np.ndarray
+    NOPAT: np.ndarray
+    Capex: np.ndarray
+    Change_NWC: np.ndarray
+    FCFF: np.ndarray
+
+    def to_frame(self, i: int = 0) -> pd.DataFrame:
+        """Statements for driver set ``i`` in the Project_Financials layout."""
+        years = self.Revenue.shape[1]
+        data = {name: getattr(self, f.name)[i] for name, f in zip(LINE_ITEMS, fields(self))}
+        return pd.DataFrame(data, index=[f"Year {t + 1}" for t in range(years)])
+
+
+def _column(value) -> np.ndarray:
+    """Per-set driver as a (n, 1) column for broadcasting against years."""
+    return np.atleast_1d(np.asarray(value, dtype=float))[:, None]
+
+
+def build_financials(drivers: ProjectDrivers) -> ProjectFinancials:
+    """Generate the multi-year P&L-to-FCFF build for every driver set."""
+    T = drivers.years
+    t = np.arange(T)
+
+    growth = np.asarray(drivers.revenue_growth, dtype=float)
+    if growth.ndim == 2:
+        if growth.shape[1] != T - 1:
+            raise ValueError(f"growth path needs {T - 1} years, got {growth.shape[1]}")
+    else:
+        growth = np.broadcast_to(_column(growth), (growth.size or 1, T - 1))
+    growth_index = np.concatenate([np.ones((growth.shape[0], 1)), np.cumprod(1 + growth, axis=1)], axis=1)
+    revenue = _column(drivers.revenue_year1) * growth_index
+
+    start = _column(drivers.ebitda_margin_start)
+    end = _column(drivers.ebitda_margin_end)
+    margin = start + (end - start) * (t / max(T - 1, 1))
+
+    ebitda = revenue * margin
+    da = revenue * _column(drivers.da_pct)
+    ebit = ebitda - da
+    tax = np.maximum(0.0, ebit * _column(drivers.tax_rate))
+    nopat = ebit - tax
+    capex = revenue * _column(drivers.capex_pct)
+    nwc = revenue * _column(drivers.nwc_pct)
+    change_nwc = np.diff(nwc, axis=1, prepend=0.0)
+    fcff = nopat + da - capex - change_nwc
+
+    items = (revenue, ebitda, da, ebit, tax, nopat, capex, change_nwc, fcff)
+    shape = np.broadcast_shapes(*(a.shape for a in items))
+    return ProjectFinancials(*(np.broadcast_to(a, shape) for a in items))
+
+
+def terminal_value(fcff: np.ndarray, rate, terminal_growth) -> np.ndarray:
+    """Gordon terminal value at the final year; zero when growth is None.
+
+    NaN entries in an array of growths mark cases without a terminal value.
+    Cases where the discount rate does not exceed growth have no finite
+    value and come back as NaN rather than failing the whole batch.
+    """
+    if terminal_growth is None:
+        return np.zeros(np.broadcast_shapes(fcff.shape[:-1], np.shape(rate)))
+    rate = np.asarray(rate, dtype=float)
+    g = np.asarray(terminal_growth, dtype=float)
+    none = np.isnan(g)
+    g = np.where(none, 0.0, g)
+    spread = rate - g
+    tv = np.where(spread > 0, fcff[..., -1] * (1 + g) / np.where(spread > 0, spread, 1.0), np.nan)
+    return np.where(none, 0.0, tv)
+
+
+def npv(fcff: np.ndarray, rate, initial_investment=0.0, terminal_growth=None) -> np.ndarray:
+    """NPV of FCFF rows (years on the last axis) at one or many discount rates.
+
+    ``rate`` broadcasts against the leading axes of ``fcff``, so a
+    ``(k, 1)`` rate column against ``(n, T)`` cash flows yields ``(k, n)``.
+    """
+    rate = np.asarray(rate, dtype=float)
+    years = np.arange(1, fcff.shape[-1] + 1)
+    discount = (1 + rate[..., None]) ** -years
+    pv = (fcff * discount).sum(axis=-1)
+    tv = terminal_value(fcff, rate, terminal_growth) * discount[..., -1]
+    return pv + tv - np.asarray(initial_investment, dtype=float)
+
+
+def irr(fcff: np.ndarray, initial_investment=0.0, terminal_growth=None,
+        bounds=(-0.99, 10.0), iterations: int = 64) -> np.ndarray:
+    """Internal rate of return of every FCFF row, found by vectorized bisection.
+
+    All rows are bisected together, so each iteration is one ``npv`` call
+    over the whole batch. Rows whose NPV does not change sign within
+    ``bounds`` (no investment, or cash flows that never repay it) are NaN.
+    """
+    fcff = np.atleast_2d(np.asarray(fcff, dtype=float))
+    lo = np.full(fcff.shape[:-1], bounds[0], dtype=float)
+    hi = np.full(fcff.shape[:-1], bounds[1], dtype=float)
+
+    def value(rate):
+        # At or below terminal growth the terminal value is unbounded
+        v = npv(fcff, rate, initial_investment, terminal_growth)
+        return np.where(np.isnan(v), np.inf, v)
+
+    bracketed = (value(lo) > 0) & (value(hi) < 0)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        above = value(mid) > 0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return np.where(bracketed, (lo + hi) / 2, np.nan)
@@ -0,0 +1,272 @@
+"""Data-quality stage for aligned stock and market price series.
+
+Each check runs over the whole (dates x series) price matrix at once:
+exchange-calendar alignment, stale-price runs, robust (median/MAD) outliers
+in log returns, and split/bonus-like jumps that the market did not share.
+The default calendar is the NSE's weekday sessions less its holidays over
+the workbook's period. Gaps are then filled by a configurable policy. Every
+run produces a ``QualityReport`` that can be written out as JSON.
+"""
+import argparse
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+FILL_POLICIES = ("none", "ffill", "interpolate", "drop")
+
+# Price ratios (old / new) produced by common splits and bonus issues
+SPLIT_RATIOS = np.array([1.25, 4 / 3, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 10.0])
+
+# Scales MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+
+# Weekday NSE closures over the workbook's period, FY2022-23 to FY2024-25
+NSE_CALENDAR_SPAN = ("2022-04-01", "2025-03-31")
+NSE_HOLIDAYS = (
+    "2022-04-14", "2022-04-15", "2022-05-03", "2022-08-09", "2022-08-15", "2022-08-31", "2022-10-05",
+    "2022-10-26", "2022-11-08", "2023-01-26", "2023-03-07", "2023-03-30", "2023-04-04", "2023-04-07",
+    "2023-04-14", "2023-05-01", "2023-06-29", "2023-08-15", "2023-09-19", "2023-10-02", "2023-10-24",
+    "2023-11-14", "2023-11-27", "2023-12-25", "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25",
+    "2024-03-29", "2024-04-11", "2024-04-17", "2024-05-01", "2024-05-20", "2024-06-17", "2024-07-17",
+    "2024-08-15", "2024-10-02", "2024-11-15", "2024-11-20", "2024-12-25", "2025-02-26", "2025-03-14",
+)
+# Weekend sessions the exchange held (Union Budget day)
+NSE_SPECIAL_SESSIONS = ("2025-02-01",)
+
+
+@dataclass(frozen=True)
+class QualityConfig:
+    fill: str = "ffill"                  # one of FILL_POLICIES
+    max_gap: int = 3                     # longest run of sessions a fill may bridge
+    stale_sessions: int = 5              # unchanged price for this many sessions is stale
+    stale_as_missing: bool = True        # treat stale prints as gaps before filling
+    outlier_z: float = 6.0               # robust z-score threshold on log returns
+    mask_outliers: bool = False          # blank flagged outliers before filling
+    jump_threshold: float = 0.18         # idiosyncratic |log return| that may be a corporate action
+    split_tolerance: float = 0.05        # log distance to a known split ratio
+    adjust_corporate_actions: bool = True
+
+    def __post_init__(self):
+        if self.fill not in FILL_POLICIES:
+            raise ValueError(f"unknown fill policy {self.fill!r}; expected one of {FILL_POLICIES}")
+
+
+@dataclass(frozen=True)
+class QualityReport:
+    run_at: Optional[str]                 # None in pipeline outputs, where it would change the digest
+    config: dict
+    rows_in: int
+    rows_out: int
+    sessions: int
+    off_calendar_rows: int
+    duplicate_rows: int
+    series: dict                          # column -> {check: count}
+    corporate_actions: list = field(default_factory=list)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.series).T
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+
+def exchange_sessions(start, end, holidays=(), weekmask: str = "Mon Tue Wed Thu Fri",
+                      special_sessions=()) -> pd.DatetimeIndex:
+    """Trading sessions between ``start`` and ``end`` for a weekday/holiday calendar."""
+    sessions = pd.bdate_range(start, end, freq="C", weekmask=weekmask, holidays=list(holidays))
+    special = pd.DatetimeIndex(pd.to_datetime(list(special_sessions)))
+    return sessions.union(special[(special >= pd.Timestamp(start)) & (special <= pd.Timestamp(end))])
+
+
+def nse_sessions(dates) -> pd.DatetimeIndex:
+    """NSE sessions from the first to the last of ``dates``.
+
+    Inside ``NSE_CALENDAR_SPAN`` these come from the holiday list; outside
+    it, where no list is kept, ``dates`` themselves are taken as sessions.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if dates.empty:
+        return dates
+    lo = max(dates[0], pd.Timestamp(NSE_CALENDAR_SPAN[0]))
+    hi = min(dates[-1], pd.Timestamp(NSE_CALENDAR_SPAN[1]))
+    outside = dates[(dates < pd.Timestamp(NSE_CALENDAR_SPAN[0])) | (dates > pd.Timestamp(NSE_CALENDAR_SPAN[1]))]
+    if lo > hi:
+        return outside
+    return exchange_sessions(lo, hi, NSE_HOLIDAYS, special_sessions=NSE_SPECIAL_SESSIONS).union(outside)
+
+
+def stale_mask(prices: np.ndarray, sessions: int) -> np.ndarray:
+    """Repeat prints that belong to a run of ``sessions`` or more identical prices."""
+    n = len(prices)
+    if n < 2:
+        return np.zeros(prices.shape, dtype=bool)
+    same = np.zeros(prices.shape, dtype=bool)
+    same[1:] = prices[1:] == prices[:-1]
+    rows = np.broadcast_to(np.arange(n)[:, None], prices.shape)
+
+    # Length of the current run of repeats, then the length of the whole run
+    start = np.maximum.accumulate(np.where(same, 0, rows), axis=0)
+    run = rows - start
+    is_end = np.ones(prices.shape, dtype=bool)
+    is_end[:-1] = ~same[1:]
+    end = np.minimum.accumulate(np.where(is_end, rows, n - 1)[::-1], axis=0)[::-1]
+    total = np.take_along_axis(run, end, axis=0) + 1
+    return same & (total >= sessions)
+
+
+def robust_z(log_returns: np.ndarray) -> np.ndarray:
+    """Median/MAD z-score of each column; NaN-aware."""
+    med = np.nanmedian(log_returns, axis=0)
+    mad = np.nanmedian(np.abs(log_returns - med), axis=0)
+    mad = np.where(mad > 0, mad, np.nan)
+    return MAD_SCALE * (log_returns - med) / mad
+
+
+def corporate_action_ratios(log_returns: np.ndarray, reference: np.ndarray,
+                            threshold: float, tolerance: float) -> np.ndarray:
+    """Old/new price ratio where a jump looks like a split or bonus, else 1.
+
+    A candidate moves by more than ``threshold`` in log terms on a day the
+    reference (market) did not, the new level holds (a bad print that
+    reverts the next session is an outlier, not a split), and the price
+    ratio sits within ``tolerance`` (in logs) of a standard split ratio.
+    """
+    idio = np.abs(log_returns - reference[:, None])
+    drop = -log_returns
+    log_splits = np.log(SPLIT_RATIOS)
+    nearest = np.searchsorted((log_splits[1:] + log_splits[:-1]) / 2, drop)
+    with np.errstate(invalid="ignore"):
+        hit = (idio > threshold) & (np.abs(drop - log_splits[nearest]) <= tolerance)
+        reverted = np.zeros_like(hit)
+        pair = np.abs(log_returns[1:] + log_returns[:-1]) < threshold
+        reverted[:-1] |= pair
+        reverted[1:] |= pair
+    return np.where(hit & ~reverted, SPLIT_RATIOS[nearest], 1.0)
+
+
+def _log_returns(values: np.ndarray) -> np.ndarray:
+    """Session-to-session log returns, bridging gaps with the last print."""
+    out = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = np.diff(np.log(pd.DataFrame(values).ffill().to_numpy()), axis=0)
+    return out
+
+
+def _fill(frame: pd.DataFrame, policy: str, max_gap: int) -> pd.DataFrame:
+    if policy == "ffill":
+        frame = frame.ffill(limit=max_gap)
+    elif policy == "interpolate":
+        frame = frame.interpolate(method="time", limit=max_gap, limit_area="inside")
+    return frame if policy == "none" else frame.dropna()
+
+
+def clean_prices(prices: pd.DataFrame, config: QualityConfig = QualityConfig(),
+                 reference: str = "Market_Close",
+                 calendar: Optional[pd.DatetimeIndex] = None):
+    """Align, check and fill a date-indexed price frame.
+
+    ``calendar`` is the exchange's session list; by default the NSE sessions
+    spanning the ``reference`` series (``nse_sessions``). Prints on other
+    dates are dropped as off-calendar, and sessions on which a series did
+    not print, the reference included, are counted as missing and filled.
+    Returns the cleaned frame and its ``QualityReport``.
+    """
+    rows_in = len(prices)
+    frame = prices.sort_index()
+    duplicates = frame.index.duplicated(keep="last")
+    frame = frame[~duplicates]
+
+    # Calendar alignment: drop prints on non-sessions, insert missing sessions
+    if calendar is None:
+        calendar = nse_sessions(frame.index[frame[reference].notna().to_numpy()])
+    calendar = pd.DatetimeIndex(calendar)
+    off_calendar = int((~frame.index.isin(calendar)).sum())
+    frame = frame.reindex(calendar)
+    values = frame.to_numpy(dtype=np.float64, copy=True)
+    missing = np.isnan(values)
+
+    stale = stale_mask(values, config.stale_sessions)
+
+    # Corporate actions first, so that split days are not also counted as outliers
+    log_ret = _log_returns(values)
+    ref = log_ret[:, frame.columns.get_loc(reference)]
+    ratios = corporate_action_ratios(log_ret, np.nan_to_num(ref), config.jump_threshold,
+                                     config.split_tolerance)
+    ratios[:, frame.columns.get_loc(reference)] = 1.0
+    events = ratios != 1.0
+    if config.adjust_corporate_actions and events.any():
+        # Prices before each event are divided by that event's ratio
+        after = np.ones_like(ratios)
+        after[:-1] = np.cumprod(ratios[::-1], axis=0)[::-1][1:]
+        values /= after
+        log_ret = _log_returns(values)
+
+    with np.errstate(invalid="ignore"):
+        outliers = np.abs(robust_z(log_ret)) > config.outlier_z
+    outliers &= ~events
+
+    blank = missing.copy()
+    if config.stale_as_missing:
+        blank |= stale
+    if config.mask_outliers:
+        blank |= outliers
+    values[blank] = np.nan
+    gaps = pd.DataFrame(values, index=frame.index, columns=frame.columns)
+    cleaned = _fill(gaps, config.fill, config.max_gap)
+
+    filled = cleaned.notna().to_numpy() & np.isnan(gaps.reindex(cleaned.index).to_numpy())
+    series = {
+        col: {
+            "missing": int(missing[:, j].sum()),
+            "stale": int(stale[:, j].sum()),
+            "outliers": int(outliers[:, j].sum()),
+            "corporate_actions": int(events[:, j].sum()),
+            "filled": int(filled[:, j].sum()),
+        }
+        for j, col in enumerate(frame.columns)
+    }
+    rows, cols = np.nonzero(events)
+    report = QualityReport(
+        run_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        config=asdict(config),
+        rows_in=rows_in,
+        rows_out=len(cleaned),
+        sessions=len(calendar),
+        off_calendar_rows=off_calendar,
+        duplicate_rows=int(duplicates.sum()),
+        series=series,
+        corporate_actions=[
+            {"date": frame.index[r].date().isoformat(), "series": frame.columns[c], "ratio": float(ratios[r, c])}
+            for r, c in zip(rows, cols)
+        ],
+    )
+    return cleaned, report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the data-quality stage on the workbook price sheet.")
+    parser.add_argument("workbook", nargs="?", default="FMWAI_Analysis.xlsx")
+    parser.add_argument("--sheet", default="Data")
+    parser.add_argument("--fill", choices=FILL_POLICIES, default=QualityConfig.fill)
+    parser.add_argument("--max-gap", type=int, default=QualityConfig.max_gap)
+    parser.add_argument("--report", default="quality_report.json")
+    args = parser.parse_args(argv)
+
+    prices = pd.read_excel(args.workbook, sheet_name=args.sheet, index_col=0)
+    prices.index = pd.to_datetime(prices.index)
+    _, report = clean_prices(prices, QualityConfig(fill=args.fill, max_gap=args.max_gap))
+    report.to_json(args.report)
+    print(report.to_frame().to_string())
+    print(f"{report.rows_in} rows in, {report.rows_out} rows out; report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
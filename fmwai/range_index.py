@@ -0,0 +1,97 @@
+"""Prefix-sum index for metrics over arbitrary date ranges.
+
+Cumulative sums of r, r², r_m, r_m², r·r_m and log(1 + r) are built once per
+return series. Any [start, end] window is then a difference of two rows, so
+annualised return and volatility, beta, alpha, R², correlation and cumulative
+return cost O(1) after an O(log n) date lookup, and arrays of windows are
+evaluated in a single vectorized call. Returns are centred on their full-sample
+mean before accumulating to keep the variance sums numerically stable.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from fmwai.model import MarketSeries
+
+# Fewer observations than this give NaN rather than a meaningless regression
+MIN_OBSERVATIONS = 3
+
+# Rows of PrefixSumIndex.sums
+_X, _XX, _Y, _YY, _XY, _LX, _LY = range(7)
+
+
+@dataclass(frozen=True)
+class RangeStats:
+    """Metrics for one window, or arrays of them for vectorized queries."""
+    observations: np.ndarray
+    ann_return: np.ndarray
+    ann_vol: np.ndarray
+    market_return: np.ndarray
+    market_vol: np.ndarray
+    beta: np.ndarray
+    alpha: np.ndarray
+    r_squared: np.ndarray
+    correlation: np.ndarray
+    cumulative_return: np.ndarray
+    market_cumulative_return: np.ndarray
+
+
+@dataclass(frozen=True)
+class PrefixSumIndex:
+    dates: np.ndarray          # datetime64[ns], one per return
+    periods_per_year: int
+    center: tuple              # full-sample means of stock and market returns
+    sums: np.ndarray           # (7, n + 1) prefix sums, first column zero
+
+    @classmethod
+    def build(cls, returns: MarketSeries, periods_per_year: int) -> "PrefixSumIndex":
+        r = np.asarray(returns.stock, dtype=np.float64)
+        m = np.asarray(returns.market, dtype=np.float64)
+        cr, cm = r.mean(), m.mean()
+        x, y = r - cr, m - cm
+        terms = np.stack([x, x * x, y, y * y, x * y, np.log1p(r), np.log1p(m)])
+        sums = np.zeros((len(terms), len(r) + 1))
+        np.cumsum(terms, axis=1, out=sums[:, 1:])
+        return cls(np.asarray(returns.dates), periods_per_year, (cr, cm), sums)
+
+    def locate(self, start=None, end=None):
+        """Half-open positions ``[i, j)`` of the returns dated within [start, end]."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.asarray(start, dtype="datetime64[ns]"), "left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.asarray(end, dtype="datetime64[ns]"), "right")
+        return lo, hi
+
+    def stats(self, start=None, end=None) -> RangeStats:
+        """Metrics for the returns dated within [start, end]; arrays of dates broadcast."""
+        return self.window(*self.locate(start, end))
+
+    def window(self, i, j) -> RangeStats:
+        """Metrics for positional windows ``[i, j)``."""
+        d = self.sums[:, np.asarray(j)] - self.sums[:, np.asarray(i)]
+        n = np.asarray(j) - np.asarray(i)
+        cr, cm = self.center
+        ppy = self.periods_per_year
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            valid = n >= MIN_OBSERVATIONS
+            mean_x = d[_X] / n
+            mean_y = d[_Y] / n
+            var_x = np.where(valid, (d[_XX] - d[_X] * mean_x) / (n - 1), np.nan)
+            var_y = np.where(valid, (d[_YY] - d[_Y] * mean_y) / (n - 1), np.nan)
+            cov = (d[_XY] - d[_X] * mean_y) / (n - 1)
+            beta = cov / var_y
+            correlation = cov / np.sqrt(var_x * var_y)
+            mean_r, mean_m = mean_x + cr, mean_y + cm
+            stats = dict(
+                observations=n,
+                ann_return=np.where(valid, mean_r * ppy, np.nan),
+                ann_vol=np.sqrt(var_x * ppy),
+                market_return=np.where(valid, mean_m * ppy, np.nan),
+                market_vol=np.sqrt(var_y * ppy),
+                beta=beta,
+                alpha=mean_r - beta * mean_m,
+                r_squared=correlation ** 2,
+                correlation=correlation,
+                cumulative_return=np.expm1(d[_LX]),
+                market_cumulative_return=np.expm1(d[_LY]),
+            )
+        # ``[()]`` turns 0-d results of scalar queries into NumPy scalars
+        return RangeStats(**{k: np.asarray(v)[()] for k, v in stats.items()})
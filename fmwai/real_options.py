@@ -0,0 +1,118 @@
+"""Real options on project value: expansion, abandonment and deferral.
+
+The underlying is the present value of the project's FCFF. Options are
+valued on a recombining binomial (Cox-Ross-Rubinstein) or trinomial lattice.
+Each time step is one NumPy operation over all nodes of that step, so lattices
+with 10k+ steps run in well under a second.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def expansion_payoff(factor: float, cost: float):
+    """Scale the project up by ``factor`` of its value for ``cost``."""
+    return lambda value: np.maximum(factor * value - cost, 0.0)
+
+
+def abandonment_payoff(salvage: float):
+    """Walk away and receive ``salvage`` instead of the project value."""
+    return lambda value: np.maximum(salvage - value, 0.0)
+
+
+def call_payoff(strike: float):
+    """Invest ``strike`` to acquire the project (deferral option)."""
+    return lambda value: np.maximum(value - strike, 0.0)
+
+
+def combined_payoff(*payoffs):
+    """Mutually exclusive options: exercise the most valuable one."""
+    return lambda value: np.maximum.reduce([p(value) for p in payoffs])
+
+
+def lattice_option(value: float, sigma: float, rate: float, maturity: float, steps: int, payoff,
+                   american: bool = True, dividend_yield: float = 0.0, method: str = "binomial") -> float:
+    """Value an option on project value by backward induction.
+
+    ``rate`` and ``dividend_yield`` are continuously compounded; the yield is
+    the value the project pays out (FCFF) while the option is held.
+    """
+    if steps < 1:
+        raise ValueError("steps must be at least 1")
+    dt = maturity / steps
+    disc = np.exp(-rate * dt)
+
+    if method == "binomial":
+        u = np.exp(sigma * np.sqrt(dt))
+        d = 1 / u
+        p = (np.exp((rate - dividend_yield) * dt) - d) / (u - d)
+        if not 0.0 <= p <= 1.0:
+            raise ValueError("too few steps for these inputs: risk-neutral probability outside [0, 1]")
+        # Terminal nodes, ordered from all-down to all-up moves
+        node = value * u ** (2.0 * np.arange(steps + 1) - steps)
+        option = payoff(node)
+        for _ in range(steps):
+            option = disc * (p * option[1:] + (1 - p) * option[:-1])
+            if american:
+                node = node[:-1] * u
+                np.maximum(option, payoff(node), out=option)
+        return float(option[0])
+
+    if method == "trinomial":
+        dx = sigma * np.sqrt(3 * dt)
+        nu = rate - dividend_yield - 0.5 * sigma ** 2
+        a = (sigma ** 2 * dt + nu ** 2 * dt ** 2) / dx ** 2
+        b = nu * dt / dx
+        pu, pd = 0.5 * (a + b), 0.5 * (a - b)
+        pm = 1 - pu - pd
+        if min(pu, pm, pd) < 0:
+            raise ValueError("too few steps for these inputs: negative trinomial probability")
+        node = value * np.exp(dx * np.arange(-steps, steps + 1))
+        option = payoff(node)
+        for _ in range(steps):
+            option = disc * (pu * option[2:] + pm * option[1:-1] + pd * option[:-2])
+            if american:
+                node = node[1:-1]
+                np.maximum(option, payoff(node), out=option)
+        return float(option[0])
+
+    raise ValueError(f"unknown lattice method: {method!r}")
+
+
+@dataclass(frozen=True)
+class RealOptionsResult:
+    static_npv: float
+    expansion: float
+    abandonment: float
+    combined: float      # expansion and abandonment held together
+    deferral: float      # value of waiting over investing today
+
+    @property
+    def expanded_npv(self) -> float:
+        return self.static_npv + self.combined
+
+
+def value_real_options(project_value: float, investment: float, sigma: float, rate: float,
+                       maturity: float, expansion_factor: float, expansion_cost: float,
+                       salvage: float, dividend_yield: float = 0.0, steps: int = 1000,
+                       method: str = "binomial") -> RealOptionsResult:
+    """Static NPV plus the flexibility embedded in the project.
+
+    ``project_value`` is the PV of the project's FCFF; ``rate`` is the annual
+    risk-free rate (simple), converted to continuous compounding here.
+    """
+    r = np.log1p(rate)
+    kw = dict(sigma=sigma, rate=r, maturity=maturity, steps=steps,
+              dividend_yield=dividend_yield, method=method)
+    expand = expansion_payoff(expansion_factor, expansion_cost)
+    abandon = abandonment_payoff(salvage)
+
+    static_npv = project_value - investment
+    invest_later = lattice_option(project_value, payoff=call_payoff(investment), **kw)
+    return RealOptionsResult(
+        static_npv=static_npv,
+        expansion=lattice_option(project_value, payoff=expand, **kw),
+        abandonment=lattice_option(project_value, payoff=abandon, **kw),
+        combined=lattice_option(project_value, payoff=combined_payoff(expand, abandon), **kw),
+        deferral=max(invest_later - max(static_npv, 0.0), 0.0),
+    )
@@ -0,0 +1,325 @@
+"""Saved what-if scenarios in a local SQLite store, compared side by side.
+
+A scenario is a named, tagged set of capital-structure and project-driver
+inputs. Each one is a row of ``scenarios``, and its tags are rows of
+``scenario_tags``. The unique name index (case-insensitive, so prefix
+searches can use it), the (tag, scenario) key and an index on update time
+keep listing and filtering fast with thousands of saved cases. ``compare``
+stacks any number of scenarios into one driver set and evaluates Ke, WACC,
+NPV and IRR for all of them in a single vectorized pass.
+"""
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from fmwai.capital_structure import relever_beta, target_wacc, unlever_beta
+from fmwai.project_model import ProjectDrivers, build_financials, irr, npv
+
+DEFAULT_STORE = "scenarios.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    notes TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    debt_pct REAL NOT NULL,
+    kd_pre_tax REAL NOT NULL,
+    drivers TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_by_updated ON scenarios (updated_at);
+CREATE TABLE IF NOT EXISTS scenario_tags (
+    tag TEXT NOT NULL,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, scenario_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scenario_tags_by_scenario ON scenario_tags (scenario_id);
+"""
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """What-if inputs. Rates are decimals; ``debt_pct`` is D/V as a fraction."""
+    name: str
+    debt_pct: float
+    kd_pre_tax: float
+    drivers: ProjectDrivers = ProjectDrivers()
+    tags: tuple = ()
+    notes: str = ""
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class MarketInputs:
+    """Period-level CAPM inputs shared by every scenario in a comparison."""
+    beta: float               # asset beta, relevered at each scenario's debt ratio
+    rf: float
+    market_premium: float
+
+    @classmethod
+    def from_ke(cls, ke: float, beta: float, rf: float, debt_pct: float, tax_rate: float) -> "MarketInputs":
+        """Inputs under which a scenario at ``debt_pct`` gets back ``ke``.
+
+        ``beta`` is the equity beta behind ``ke``. It is unlevered at
+        ``debt_pct``, as in ``SensitivityBase.from_ke``, so a scenario at that
+        debt ratio is discounted exactly as on the Project Valuation page.
+        """
+        return cls(beta=float(unlever_beta(beta, debt_pct, tax_rate)), rf=rf, market_premium=(ke - rf) / beta)
+
+
+def growth_path(drivers: ProjectDrivers) -> list:
+    """Year-on-year revenue growth for years 2..T of a single driver set."""
+    growth = np.ravel(np.asarray(drivers.revenue_growth, dtype=float))
+    return np.broadcast_to(growth, (drivers.years - 1,)).tolist() if growth.size == 1 else growth.tolist()
+
+
+def _encode(drivers: ProjectDrivers) -> str:
+    values = {f.name: getattr(drivers, f.name) for f in fields(drivers)}
+    values["revenue_growth"] = growth_path(drivers)
+    return json.dumps(values)
+
+
+def _decode(text: str) -> ProjectDrivers:
+    values = json.loads(text)
+    return ProjectDrivers(**{**values, "revenue_growth": [values["revenue_growth"]]})
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class ScenarioStore:
+    """Scenarios in one SQLite file, opened per operation so threads can share it."""
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = Path(path)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            db.execute("PRAGMA foreign_keys = ON")
+            with db:
+                yield db
+
+    # -----------------------
+    # Writes
+    # -----------------------
+    def save(self, scenario: Scenario) -> Scenario:
+        """Insert, or replace the inputs, notes and tags of the scenario with this name."""
+        now = _now()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO scenarios (name, notes, created_at, updated_at, debt_pct, kd_pre_tax, drivers) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET notes = excluded.notes, updated_at = excluded.updated_at, "
+                "debt_pct = excluded.debt_pct, kd_pre_tax = excluded.kd_pre_tax, drivers = excluded.drivers",
+                (scenario.name, scenario.notes, now, now, float(scenario.debt_pct),
+                 float(scenario.kd_pre_tax), _encode(scenario.drivers)),
+            )
+            (scenario_id,) = db.execute("SELECT id FROM scenarios WHERE name = ?", (scenario.name,)).fetchone()
+            db.execute("DELETE FROM scenario_tags WHERE scenario_id = ?", (scenario_id,))
+            db.executemany("INSERT OR IGNORE INTO scenario_tags (tag, scenario_id) VALUES (?, ?)",
+                           [(t, scenario_id) for t in scenario.tags])
+        return self.load(scenario.name)
+
+    def rename(self, name: str, new_name: str) -> None:
+        with self._connect() as db:
+            if not db.execute("UPDATE scenarios SET name = ?, updated_at = ? WHERE name = ?",
+                              (new_name, _now(), name)).rowcount:
+                raise KeyError(name)
+
+    def tag(self, name: str, *tags: str) -> None:
+        with self._connect() as db:
+            db.executemany("INSERT OR IGNORE INTO scenario_tags (tag, scenario_id) "
+                           "SELECT ?, id FROM scenarios WHERE name = ?", [(t, name) for t in tags])
+
+    def untag(self, name: str, *tags: str) -> None:
+        with self._connect() as db:
+            db.executemany("DELETE FROM scenario_tags WHERE tag = ? "
+                           "AND scenario_id = (SELECT id FROM scenarios WHERE name = ?)",
+                           [(t, name) for t in tags])
+
+    def delete(self, name: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM scenarios WHERE name = ?", (name,))
+
+    # -----------------------
+    # Queries
+    # -----------------------
+    def load(self, name: str) -> Scenario:
+        found = self.list(names=[name])
+        if not found:
+            raise KeyError(name)
+        return found[0]
+
+    def list(self, tag: Optional[str] = None, prefix: Optional[str] = None,
+             names: Optional[list] = None, limit: Optional[int] = None) -> list:
+        """Scenarios, most recently updated first, optionally filtered by tag, name prefix or names."""
+        where, params = [], []
+        if tag is not None:
+            where.append("s.id IN (SELECT scenario_id FROM scenario_tags WHERE tag = ?)")
+            params.append(tag)
+        if prefix:
+            # Escaped so that % and _ in names match literally
+            escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("s.name LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        if names is not None:
+            where.append(f"s.name IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        sql = ("SELECT s.id, s.name, s.notes, s.created_at, s.updated_at, s.debt_pct, s.kd_pre_tax, s.drivers "
+               "FROM scenarios s")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY s.updated_at DESC, s.id DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as db:
+            rows = db.execute(sql, params).fetchall()
+            tags = {}
+            ids = [r[0] for r in rows]
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(ids), 900):
+                chunk = ids[i:i + 900]
+                for scenario_id, t in db.execute(
+                        f"SELECT scenario_id, tag FROM scenario_tags WHERE scenario_id IN "
+                        f"({', '.join('?' * len(chunk))}) ORDER BY tag", chunk):
+                    tags.setdefault(scenario_id, []).append(t)
+        return [
+            Scenario(name=name, debt_pct=debt, kd_pre_tax=kd, drivers=_decode(drivers),
+                     tags=tuple(tags.get(scenario_id, ())), notes=notes, created_at=created, updated_at=updated)
+            for scenario_id, name, notes, created, updated, debt, kd, drivers in rows
+        ]
+
+    def tags(self) -> dict:
+        """Tag -> number of scenarios carrying it."""
+        with self._connect() as db:
+            return dict(db.execute("SELECT tag, COUNT(*) FROM scenario_tags GROUP BY tag ORDER BY tag"))
+
+    def __len__(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+
+
+# -----------------------
+# COMPARISON
+# -----------------------
+def stack_drivers(scenarios: list) -> ProjectDrivers:
+    """One driver set whose fields are arrays, row i taken from scenario i."""
+    if len({s.drivers.years for s in scenarios}) > 1:
+        raise ValueError("scenarios with different project lives cannot be stacked")
+    first = scenarios[0].drivers
+
+    def column(name):
+        return np.array([getattr(s.drivers, name) for s in scenarios], dtype=float)
+
+    return replace(
+        first,
+        **{f.name: column(f.name) for f in fields(first) if f.name not in ("revenue_growth", "terminal_growth", "years")},
+        revenue_growth=np.array([growth_path(s.drivers) for s in scenarios]),
+        # NaN marks scenarios without a terminal value
+        terminal_growth=np.array([np.nan if s.drivers.terminal_growth is None else s.drivers.terminal_growth
+                                  for s in scenarios]),
+    )
+
+
+def compare(scenarios: list, market: MarketInputs) -> pd.DataFrame:
+    """Ke, WACC, NPV and IRR of every scenario, evaluated as one batch."""
+    columns = ["Tags", "Debt %", "Kd (pre-tax)", "Ke", "WACC", "NPV", "IRR", "Terminal Growth"]
+    if not scenarios:
+        return pd.DataFrame(columns=columns)
+    drivers = stack_drivers(scenarios)
+    debt = np.array([s.debt_pct for s in scenarios], dtype=float)
+    kd = np.array([s.kd_pre_tax for s in scenarios], dtype=float)
+    ke = market.rf + relever_beta(market.beta, debt, drivers.tax_rate) * market.market_premium
+    wacc = target_wacc(ke, debt, kd, drivers.tax_rate)
+    fcff = build_financials(drivers).FCFF
+    return pd.DataFrame({
+        "Tags": [", ".join(s.tags) for s in scenarios],
+        "Debt %": debt,
+        "Kd (pre-tax)": kd,
+        "Ke": ke,
+        "WACC": wacc,
+        "NPV": npv(fcff, wacc, drivers.initial_investment, drivers.terminal_growth),
+        "IRR": irr(fcff, drivers.initial_investment, drivers.terminal_growth),
+        "Terminal Growth": drivers.terminal_growth,
+    }, index=pd.Index([s.name for s in scenarios], name="Scenario"))
+
+
+# -----------------------
+# BENCHMARK
+# -----------------------
+def random_scenarios(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    tag_pool = np.array(["base", "bull", "bear", "levered", "board", "draft"])
+    return [
+        Scenario(
+            name=f"case-{i:06d}",
+            debt_pct=float(rng.choice(np.arange(0, 0.41, 0.05))),
+            kd_pre_tax=float(rng.uniform(0.04, 0.12)),
+            drivers=ProjectDrivers(revenue_growth=[rng.uniform(0.0, 0.6, 4).tolist()],
+                                   capex_pct=float(rng.uniform(0.0, 0.2)),
+                                   terminal_growth=None if rng.random() < 0.5 else float(rng.uniform(0, 0.05))),
+            tags=tuple(rng.choice(tag_pool, size=rng.integers(0, 3), replace=False)),
+        )
+        for i in range(n)
+    ]
+
+
+def benchmark(n: int = 5_000) -> dict:
+    """Timings for saving, listing, filtering and comparing ``n`` scenarios in a scratch store."""
+    market = MarketInputs(beta=0.85, rf=0.06, market_premium=0.06)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScenarioStore(Path(tmp) / "bench.db")
+        timings = {}
+        started = time.perf_counter()
+        for s in random_scenarios(n):
+            store.save(s)
+        timings["save_each_ms"] = (time.perf_counter() - started) / n * 1000
+        for label, query in [("list_50", dict(limit=50)), ("tag", dict(tag="board")),
+                             ("prefix", dict(prefix="case-0001")), ("all", {})]:
+            started = time.perf_counter()
+            rows = store.list(**query)
+            timings[f"{label}_ms"] = (time.perf_counter() - started) * 1000
+            timings[f"{label}_rows"] = len(rows)
+        started = time.perf_counter()
+        compare(rows, market)
+        timings["compare_all_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="List saved what-if scenarios or benchmark the store.")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--tag")
+    parser.add_argument("--prefix")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time the store with N random scenarios")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        for name, value in benchmark(args.benchmark).items():
+            print(f"{name:<16} {value:>10.3f}" if isinstance(value, float) else f"{name:<16} {value:>10}")
+        return
+    store = ScenarioStore(args.store)
+    for s in store.list(tag=args.tag, prefix=args.prefix):
+        print(f"{s.name:<30} debt {s.debt_pct*100:5.1f}%  Kd {s.kd_pre_tax*100:5.2f}%  "
+              f"[{', '.join(s.tags)}]  {s.updated_at}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Tornado, spider and two-way sensitivity of WACC and project NPV.
+
+Every perturbation is a row of a design matrix over ``DRIVERS``; the whole
+matrix is evaluated in one vectorized call. Large grids are split into
+chunks and spread across a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import repeat
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from fmwai.capital_structure import relever_beta, target_wacc, unlever_beta
+from fmwai.project_model import ProjectDrivers, build_financials, npv
+
+DRIVERS = ["kd_pre_tax", "tax_rate", "debt_pct", "beta", "rf", "market_premium",
+           "growth", "ebitda_margin", "capex_pct"]
+
+DRIVER_LABELS = {
+    "kd_pre_tax": "Cost of Debt (pre-tax)",
+    "tax_rate": "Tax Rate",
+    "debt_pct": "Debt %",
+    "beta": "Asset Beta",
+    "rf": "Risk-free Rate",
+    "market_premium": "Market Premium",
+    "growth": "Revenue Growth",
+    "ebitda_margin": "EBITDA Margin",
+    "capex_pct": "Capex Intensity",
+}
+
+# Above this many rows, evaluate() fans chunks out to worker processes
+PARALLEL_THRESHOLD = 250_000
+
+
+@dataclass(frozen=True)
+class SensitivityBase:
+    """Base case. Rates are decimals; ``debt_pct`` is D/V as a fraction."""
+    kd_pre_tax: float
+    tax_rate: float
+    debt_pct: float
+    beta: float
+    rf: float
+    market_premium: float
+    drivers: ProjectDrivers = ProjectDrivers()
+
+    @property
+    def growth(self) -> float:
+        return float(np.mean(self.drivers.revenue_growth))
+
+    @property
+    def ebitda_margin(self) -> float:
+        return float(self.drivers.ebitda_margin_end)
+
+    @property
+    def capex_pct(self) -> float:
+        return float(self.drivers.capex_pct)
+
+    def vector(self) -> np.ndarray:
+        return np.array([getattr(self, name) for name in DRIVERS], dtype=float)
+
+    @classmethod
+    def from_ke(cls, ke: float, beta: float, rf: float, kd_pre_tax: float, tax_rate: float, debt_pct: float,
+                drivers: ProjectDrivers = ProjectDrivers()) -> "SensitivityBase":
+        """Base case whose design row reproduces ``target_wacc(ke, debt_pct, ...)``.
+
+        The dashboard discounts at a WACC built from an unrelevered CAPM Ke.
+        ``beta`` is the equity beta behind ``ke``; the market premium is the
+        one that gives back ``ke`` from it, and the asset beta is unlevered at
+        ``debt_pct`` so that relevering at the base debt ratio returns ``beta``.
+        """
+        return cls(kd_pre_tax=kd_pre_tax, tax_rate=tax_rate, debt_pct=debt_pct,
+                   beta=float(unlever_beta(beta, debt_pct, tax_rate)), rf=rf,
+                   market_premium=(ke - rf) / beta, drivers=drivers)
+
+
+def _evaluate(base: SensitivityBase, X: np.ndarray):
+    col = dict(zip(DRIVERS, X.T))
+    ke = col["rf"] + relever_beta(col["beta"], col["debt_pct"], col["tax_rate"]) * col["market_premium"]
+    wacc = target_wacc(ke, col["debt_pct"], col["kd_pre_tax"], col["tax_rate"])
+
+    # Growth and margin perturbations shift the base path/ramp in parallel
+    d = base.drivers
+    growth_path = np.atleast_2d(np.asarray(d.revenue_growth, dtype=float))
+    if growth_path.shape[1] != d.years - 1:
+        growth_path = np.broadcast_to(growth_path.reshape(-1, 1), (growth_path.size, d.years - 1))
+    margin_shift = col["ebitda_margin"] - base.ebitda_margin
+    fin = build_financials(replace(
+        d,
+        revenue_growth=growth_path + (col["growth"] - base.growth)[:, None],
+        ebitda_margin_start=d.ebitda_margin_start + margin_shift,
+        ebitda_margin_end=d.ebitda_margin_end + margin_shift,
+        tax_rate=col["tax_rate"],
+        capex_pct=col["capex_pct"],
+    ))
+    value = npv(fin.FCFF, wacc, d.initial_investment, d.terminal_growth)
+    return wacc, value
+
+
+def evaluate(base: SensitivityBase, X: np.ndarray, chunk_size: int = 50_000,
+             processes: Optional[int] = None):
+    """WACC and NPV for every row of ``X`` (columns ordered as ``DRIVERS``)."""
+    X = np.asarray(X, dtype=float)
+    if len(X) <= PARALLEL_THRESHOLD:
+        return _evaluate(base, X)
+    chunks = [X[i:i + chunk_size] for i in range(0, len(X), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        parts = list(pool.map(_evaluate, repeat(base), chunks))
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def tornado(base: SensitivityBase, rel: float = 0.20) -> pd.DataFrame:
+    """Each driver moved to (1 - rel) and (1 + rel) of base, one at a time."""
+    k = len(DRIVERS)
+    x0 = base.vector()
+    X = np.tile(x0, (2 * k + 1, 1))
+    idx = np.arange(k)
+    X[1 + idx, idx] *= 1 - rel
+    X[1 + k + idx, idx] *= 1 + rel
+    wacc, value = evaluate(base, X)
+    out = pd.DataFrame({
+        "Driver": [DRIVER_LABELS[d] for d in DRIVERS],
+        "Base": x0,
+        "Low": X[1 + idx, idx],
+        "High": X[1 + k + idx, idx],
+        "WACC_Low": wacc[1 + idx],
+        "WACC_High": wacc[1 + k + idx],
+        "NPV_Low": value[1 + idx],
+        "NPV_High": value[1 + k + idx],
+    })
+    out.attrs["base_wacc"] = float(wacc[0])
+    out.attrs["base_npv"] = float(value[0])
+    out["NPV_Swing"] = (out["NPV_High"] - out["NPV_Low"]).abs()
+    out["WACC_Swing"] = (out["WACC_High"] - out["WACC_Low"]).abs()
+    return out
+
+
+def spider(base: SensitivityBase, changes=None) -> pd.DataFrame:
+    """Long table of WACC/NPV as each driver moves by each relative change (default -30%..+30%)."""
+    changes = np.linspace(-0.30, 0.30, 13) if changes is None else np.asarray(changes, dtype=float)
+    k, m = len(DRIVERS), len(changes)
+    X = np.tile(base.vector(), (k * m, 1))
+    rows = np.arange(k * m)
+    drivers = np.repeat(np.arange(k), m)
+    X[rows, drivers] *= 1 + np.tile(changes, k)
+    wacc, value = evaluate(base, X)
+    return pd.DataFrame({
+        "Driver": np.array([DRIVER_LABELS[d] for d in DRIVERS])[drivers],
+        "Change": np.tile(changes, k),
+        "WACC": wacc,
+        "NPV": value,
+    })
+
+
+def two_way(base: SensitivityBase, x_driver: str, y_driver: str, x_values, y_values,
+            processes: Optional[int] = None):
+    """WACC and NPV grids of shape (len(y_values), len(x_values))."""
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    gx, gy = np.meshgrid(x_values, y_values)
+    X = np.tile(base.vector(), (gx.size, 1))
+    X[:, DRIVERS.index(x_driver)] = gx.ravel()
+    X[:, DRIVERS.index(y_driver)] = gy.ravel()
+    wacc, value = evaluate(base, X, processes=processes)
+    return wacc.reshape(gx.shape), value.reshape(gx.shape)
@@ -0,0 +1,219 @@
+"""Stress tests of share price, WACC and project NPV.
+
+A stress scenario is a set of shocks: a cumulative market move, a rate spike
+(rf, and the pre-tax cost of debt through rf plus a credit spread), a
+volatility regime (scaling the market premium and the beta), and operating
+shocks to revenue growth and EBITDA margin. Scenarios are either user
+defined or replayed from history. A replay takes a window of the market
+series, such as the worst N-day stretches in the sample or a named episode
+when the loaded history covers it, and reads its market move, volatility and
+beta off the prefix-sum index.
+
+All scenarios, together with an unshocked base row, become rows of one
+``fmwai.sensitivity`` design matrix and are evaluated in a single
+broadcasted call through the same relevering, Ke, WACC and FCFF discounting
+as the driver sensitivity. Each shock moves only some outputs (``SHOCK_SCOPE``):
+the market move reprices the shares but leaves WACC and NPV alone.
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fmwai.capital_structure import relever_beta
+from fmwai.model import MarketSeries
+from fmwai.range_index import PrefixSumIndex
+from fmwai.sensitivity import DRIVERS, SensitivityBase, evaluate
+
+# Named market episodes, replayed when the loaded history covers them
+EPISODES = {
+    "2008 Global Financial Crisis": ("2008-01-08", "2008-10-27"),
+    "March 2020 COVID Crash": ("2020-01-14", "2020-03-23"),
+}
+
+
+# What each shock moves
+SHOCK_SCOPE = {
+    "market_move": "Share price only, through the equity beta; WACC and NPV are unchanged",
+    "rf_shift": "rf and pre-tax Kd, so Ke, WACC and NPV; not the share price",
+    "credit_spread": "Pre-tax Kd, so WACC and NPV",
+    "vol_multiplier": "Market premium, so Ke, WACC and NPV",
+    "beta_multiplier": "Asset beta, so Ke, WACC, NPV and the share price's response to the market move",
+    "growth_shift": "Revenue growth in every year, so FCFF and NPV",
+    "margin_shift": "EBITDA margin ramp, so FCFF and NPV",
+}
+
+
+@dataclass(frozen=True)
+class StressScenario:
+    """Shocks relative to the base case; rates and moves are decimals."""
+    name: str
+    market_move: float = 0.0       # cumulative market return over the shock
+    rf_shift: float = 0.0          # change in the risk-free rate
+    credit_spread: float = 0.0     # change in pre-tax Kd over and above rf_shift
+    vol_multiplier: float = 1.0    # market volatility regime; the market premium scales with it
+    beta_multiplier: float = 1.0   # scales the asset beta (the ``beta`` driver)
+    growth_shift: float = 0.0      # added to every year's revenue growth
+    margin_shift: float = 0.0      # added to the EBITDA margin ramp
+    kind: str = "hypothetical"
+
+
+# Shapes of the two large NIFTY 50 drawdowns (about -60% in 2008, -38% in early 2020).
+# The rate and operating shocks are illustrative; replace them with a replay when the
+# loaded history reaches back to the episode.
+PRESETS = (
+    StressScenario("Market -20%", market_move=-0.20),
+    StressScenario("Rate spike +200bp", rf_shift=0.02, credit_spread=0.01),
+    StressScenario("High-volatility regime", vol_multiplier=2.0, beta_multiplier=1.2),
+    StressScenario("Demand shock", growth_shift=-0.15, margin_shift=-0.05),
+    StressScenario("2008-style crisis", market_move=-0.60, rf_shift=0.01, credit_spread=0.03, vol_multiplier=2.5,
+                   beta_multiplier=1.1, growth_shift=-0.15, margin_shift=-0.05),
+    StressScenario("March-2020-style crash", market_move=-0.38, rf_shift=-0.01, credit_spread=0.02,
+                   vol_multiplier=3.0, beta_multiplier=1.1, growth_shift=-0.10, margin_shift=-0.03),
+)
+
+
+# -----------------------
+# Historical replay
+# -----------------------
+def _replay(index: PrefixSumIndex, name: str, i, j) -> list:
+    full = index.window(0, len(index.dates))
+    w = index.window(np.asarray(i), np.asarray(j))
+    return [StressScenario(
+        name=str(n),
+        market_move=float(m),
+        vol_multiplier=float(v / full.market_vol),
+        beta_multiplier=float(b / full.beta) if np.isfinite(b) and b > 0 else 1.0,
+        kind="historical",
+    ) for n, m, v, b in zip(np.atleast_1d(name), np.atleast_1d(w.market_cumulative_return),
+                            np.atleast_1d(w.market_vol), np.atleast_1d(w.beta))]
+
+
+def worst_windows(returns: MarketSeries, periods_per_year: int, length: int = 21, count: int = 3) -> list:
+    """The ``count`` worst non-overlapping ``length``-period market moves in ``returns``, as scenarios.
+
+    Every window's cumulative market return is read off the prefix sums in
+    one vectorized call.
+    """
+    index = PrefixSumIndex.build(returns, periods_per_year)
+    n = len(index.dates)
+    if n < length:
+        return []
+    starts = np.arange(n - length + 1)
+    moves = index.window(starts, starts + length).market_cumulative_return
+    picked = []
+    for s in starts[np.argsort(moves, kind="stable")]:
+        if all(abs(s - p) >= length for p in picked):
+            picked.append(s)
+            if len(picked) == count:
+                break
+    picked = np.array(picked, dtype=np.int64)
+    dates = pd.DatetimeIndex(index.dates)
+    names = [f"Worst {length}-day: {dates[s]:%d %b %Y} – {dates[s + length - 1]:%d %b %Y}" for s in picked]
+    return _replay(index, names, picked, picked + length)
+
+
+def episode_scenarios(returns: MarketSeries, periods_per_year: int, episodes: dict = EPISODES) -> list:
+    """Replays of the named episodes that fall inside ``returns``."""
+    index = PrefixSumIndex.build(returns, periods_per_year)
+    out = []
+    for name, (start, end) in episodes.items():
+        if np.datetime64(start, "ns") < index.dates[0] or np.datetime64(end, "ns") > index.dates[-1]:
+            continue
+        i, j = index.locate(start, end)
+        out += _replay(index, name, i, j)
+    return out
+
+
+# -----------------------
+# Batch evaluation
+# -----------------------
+def design_matrix(base: SensitivityBase, scenarios) -> np.ndarray:
+    """One ``sensitivity.DRIVERS`` row per scenario, with the base case as row 0."""
+    col = {name: i for i, name in enumerate(DRIVERS)}
+    shocks = pd.DataFrame([s.__dict__ for s in scenarios], columns=list(StressScenario.__dataclass_fields__))
+    X = np.tile(base.vector(), (len(scenarios) + 1, 1))
+    X[1:, col["rf"]] += shocks["rf_shift"].to_numpy(float)
+    X[1:, col["kd_pre_tax"]] += (shocks["rf_shift"] + shocks["credit_spread"]).to_numpy(float)
+    X[1:, col["market_premium"]] *= shocks["vol_multiplier"].to_numpy(float)
+    X[1:, col["beta"]] *= shocks["beta_multiplier"].to_numpy(float)
+    X[1:, col["growth"]] += shocks["growth_shift"].to_numpy(float)
+    X[1:, col["ebitda_margin"]] += shocks["margin_shift"].to_numpy(float)
+    return X
+
+
+def run_stress(base: SensitivityBase, price: float, scenarios) -> pd.DataFrame:
+    """Stressed share price, Ke, WACC and NPV for every scenario, plus the base case.
+
+    ``beta_multiplier`` scales the asset beta, which is relevered at the
+    scenario's debt ratio into the equity beta behind Ke. The stressed price
+    moves with the market move through that equity beta, floored at zero.
+    The market move affects the price alone; see ``SHOCK_SCOPE``.
+    """
+    scenarios = list(scenarios)
+    X = design_matrix(base, scenarios)
+    c = {name: X[:, i] for i, name in enumerate(DRIVERS)}
+    wacc, value = evaluate(base, X)
+    equity_beta = relever_beta(c["beta"], c["debt_pct"], c["tax_rate"])
+    ke = c["rf"] + equity_beta * c["market_premium"]
+    move = np.array([0.0] + [s.market_move for s in scenarios])
+    stressed_price = price * np.maximum(1 + equity_beta * move, 0.0)
+    out = pd.DataFrame({
+        "Kind": ["base"] + [s.kind for s in scenarios],
+        "Market Move": move,
+        "Price": stressed_price,
+        "Price Change": stressed_price / price - 1,
+        "Ke": ke,
+        "WACC": wacc,
+        "WACC Change": wacc - wacc[0],
+        "NPV": value,
+        "NPV Change": value - value[0],
+    }, index=pd.Index(["Base case"] + [s.name for s in scenarios], name="Scenario"))
+    return out
+
+
+# -----------------------
+# CLI
+# -----------------------
+def _workbook_base(workbook: str):
+    from fmwai.model import load_model
+
+    model = load_model(workbook)
+    # Ke and its beta averaged over the frequencies, as on the dashboard
+    windows = [PrefixSumIndex.build(f.returns, f.periods_per_year).stats() for f in model.frequencies]
+    rf = model.cost_of_capital.rf
+    ke = float(np.nanmean([rf + w.beta * (w.market_return - rf) for w in windows]))
+    base = SensitivityBase.from_ke(ke=ke, beta=float(np.nanmean([w.beta for w in windows])), rf=rf,
+                                   kd_pre_tax=0.075, tax_rate=0.25, debt_pct=0.25)
+    return base, float(model.prices.stock[-1]), model.frequency("Daily")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Stress share price, WACC and AIOps NPV under market shocks.")
+    parser.add_argument("--workbook", default="FMWAI_Analysis.xlsx")
+    parser.add_argument("--window", type=int, default=21, help="length of the worst historical windows (days)")
+    parser.add_argument("--worst", type=int, default=3, help="how many worst windows to replay")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time N random hypothetical scenarios")
+    args = parser.parse_args(argv)
+
+    base, price, daily = _workbook_base(args.workbook)
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        scenarios = [StressScenario(f"s{i}", market_move=m, rf_shift=r, vol_multiplier=v)
+                     for i, (m, r, v) in enumerate(zip(rng.uniform(-0.6, 0.2, args.benchmark),
+                                                       rng.uniform(-0.02, 0.03, args.benchmark),
+                                                       rng.uniform(0.8, 3.0, args.benchmark)))]
+        started = time.perf_counter()
+        run_stress(base, price, scenarios)
+        print(f"{args.benchmark:,} scenarios in {time.perf_counter() - started:.3f}s")
+        return
+    scenarios = [*PRESETS, *episode_scenarios(daily.returns, daily.periods_per_year),
+                 *worst_windows(daily.returns, daily.periods_per_year, args.window, args.worst)]
+    table = run_stress(base, price, scenarios)
+    print(table.to_string(float_format=lambda x: f"{x:,.4f}"))
+
+
+if __name__ == "__main__":
+    main()
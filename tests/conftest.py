@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def result_cache_dir(tmp_path_factory):
+    """Keep the dashboard's result cache out of the repository while AppTest runs app.py."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("FMWAI_CACHE_DIR", str(tmp_path_factory.mktemp("fmwai_cache")))
+        yield
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from fmwai.api import ApiServer, MetricsService
+from fmwai.cache import ResultCache
+from fmwai.model import load_model
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    return MetricsService(load_model(str(ROOT / "FMWAI_Analysis.xlsx")),
+                          ResultCache(str(tmp_path_factory.mktemp("cache"))))
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"debt_pct": "35", "kd_pre_tax": "9", "terminal_growth": "3"},
+    {"start": "2023-01-01", "end": "2024-06-30", "debt_pct": "10"},
+])
+def test_sensitivity_base_matches_wacc_and_project(service, query):
+    sens = service.sensitivity(query)
+    assert sens["base_wacc"] == pytest.approx(service.wacc(query)["wacc_target"], rel=1e-12)
+    assert sens["base_npv"] == pytest.approx(service.project(query)["npv_net"], rel=1e-12)
+
+
+async def _exchange(server: ApiServer, *requests: bytes) -> list:
+    """Raw requests over one connection to the real handler; ``(status, headers, body)`` per response."""
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        try:
+            for request in requests:
+                writer.write(request)
+                await writer.drain()
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                headers = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+                body = await reader.readexactly(int(headers.get("Content-Length", 0)))
+                responses.append((int(head[0].split(" ")[1]), headers, body))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+    return responses
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1.5"])
+def test_malformed_content_length_is_a_400(service, length):
+    request = f"GET /risk HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode()
+    ((status, headers, body),) = asyncio.run(_exchange(ApiServer(service), request))
+    assert status == 400
+    assert headers["Connection"] == "close"
+    assert "Content-Length" in json.loads(body)["error"]
+
+
+def test_etag_revalidation_over_the_socket(service):
+    async def run():
+        server = ApiServer(service)
+        (status, headers, body), = await _exchange(server, b"GET /wacc?debt_pct=30 HTTP/1.1\r\nHost: x\r\n\r\n")
+        etag = headers["ETag"]
+        revalidated = await _exchange(
+            server,
+            f"GET /wacc?debt_pct=30 HTTP/1.1\r\nIf-None-Match: {etag}\r\n\r\n".encode(),
+            b'GET /wacc?debt_pct=30 HTTP/1.1\r\nIf-None-Match: "stale"\r\n\r\n',
+            # A drained request body keeps the next request on the connection in sync
+            b"GET /wacc?debt_pct=30 HTTP/1.1\r\nContent-Length: 4\r\n\r\nbody",
+        )
+        return status, body, etag, revalidated
+
+    status, body, etag, revalidated = asyncio.run(run())
+    assert status == 200 and json.loads(body)["wacc_target"] > 0
+    (s304, h304, b304), (s_stale, h_stale, b_stale), (s_body, _, b_body) = revalidated
+    assert (s304, b304, h304["ETag"]) == (304, b"", etag)
+    assert "Content-Length" not in h304
+    assert (s_stale, h_stale["ETag"], b_stale) == (200, etag, body)
+    assert (s_body, b_body) == (200, body)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from fmwai.beta import lagged_design, nonsync_betas
+
+
+def _series(n=2000, lag_loading=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0005, 0.01, n + 1)
+    # The stock reacts to the market partly one period late
+    stock = 0.8 * market[1:] + lag_loading * market[:-1] + rng.normal(0, 0.01, n)
+    return stock, market[1:]
+
+
+def test_lagged_design_is_a_view_of_shifted_market():
+    market = np.arange(10.0)
+    X = lagged_design(market, lags=2)
+    assert np.shares_memory(X, market)
+    np.testing.assert_array_equal(X[:, 2], market[2:8])
+    np.testing.assert_array_equal(X[:, 0], market[:6])
+    np.testing.assert_array_equal(X[:, 4], market[4:])
+
+
+@pytest.mark.parametrize("lags", [1, 2, 3])
+def test_betas_match_direct_regressions(lags):
+    stock, market = _series()
+    out = nonsync_betas(stock, market, lags)
+    X = lagged_design(market, lags)
+    y = stock[lags:len(X) + lags]
+    assert out["Observations"] == len(y)
+
+    slope, _ = np.polyfit(X[:, lags], y, 1)
+    assert out["OLS_Beta"] == pytest.approx(slope, rel=1e-10)
+    assert out["R_squared"] == pytest.approx(np.corrcoef(X[:, lags], y)[0, 1] ** 2, rel=1e-10)
+
+    coef = np.linalg.lstsq(np.column_stack([np.ones(len(y)), X]), y, rcond=None)[0]
+    assert out["Dimson_Beta"] == pytest.approx(coef[1:].sum(), rel=1e-10)
+
+    slopes = [np.polyfit(X[:, lags + k], y, 1)[0] for k in (-1, 0, 1)]
+    rho = np.corrcoef(X[:, lags - 1], X[:, lags])[0, 1]
+    assert out["Scholes_Williams_Beta"] == pytest.approx(sum(slopes) / (1 + 2 * rho), rel=1e-10)
+
+
+def test_corrections_recover_the_lagged_response():
+    stock, market = _series(n=20_000)
+    out = nonsync_betas(stock, market, lags=1)
+    assert out["OLS_Beta"] == pytest.approx(0.8, abs=0.03)
+    assert out["Dimson_Beta"] == pytest.approx(1.1, abs=0.03)
+    assert out["Scholes_Williams_Beta"] == pytest.approx(1.1, abs=0.03)
+
+
+def test_rejects_bad_inputs():
+    stock, market = _series(n=10)
+    with pytest.raises(ValueError):
+        nonsync_betas(stock, market, lags=0)
+    with pytest.raises(ValueError):
+        nonsync_betas(stock[:4], market[:4], lags=1)
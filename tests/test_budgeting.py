@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from fmwai.budgeting import (evaluate_candidates, knapsack_branch_and_bound, knapsack_dp, sample_candidates,
+                             select_projects)
+
+
+def _brute_force(values, costs, budgets) -> float:
+    n = len(values)
+    masks = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(float)
+    fits = (masks @ costs <= budgets + 1e-9).all(axis=1)
+    return float((masks @ values)[fits].max())
+
+
+def _instances(count, budgets, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(1, 13))
+        values = rng.integers(-20, 100, n).astype(float)
+        costs = rng.integers(0, 40, (n, budgets)).astype(float)
+        limit = np.floor(costs.sum(axis=0) * rng.uniform(0.1, 0.9, budgets))
+        yield values, costs, limit
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_dp_matches_brute_force(seed):
+    for values, costs, budgets in _instances(100, 1, seed):
+        chosen = knapsack_dp(values, costs[:, 0], budgets[0], resolution=1.0)
+        assert costs[chosen, 0].sum() <= budgets[0]
+        assert values[chosen].sum() == pytest.approx(_brute_force(values, costs, budgets))
+
+
+@pytest.mark.parametrize("periods", [1, 2, 3])
+def test_branch_and_bound_matches_brute_force(periods):
+    for values, costs, budgets in _instances(100, periods, periods):
+        chosen, optimal, _ = knapsack_branch_and_bound(values, costs, budgets)
+        assert optimal
+        assert (costs[chosen].sum(axis=0) <= budgets + 1e-9).all()
+        assert values[chosen].sum() == pytest.approx(_brute_force(values, costs, budgets))
+
+
+def test_dp_selection_fits_with_coarse_resolution():
+    rng = np.random.default_rng(7)
+    values, costs = rng.uniform(1, 50, 200), rng.uniform(0.1, 30, 200)
+    chosen = knapsack_dp(values, costs, 500.0)
+    assert costs[chosen].sum() <= 500.0
+
+
+def test_node_limit_returns_a_feasible_unproven_selection():
+    rng = np.random.default_rng(3)
+    values, costs = rng.uniform(1, 50, 60), rng.uniform(1, 30, (60, 3))
+    budgets = costs.sum(axis=0) * 0.4
+    chosen, optimal, nodes = knapsack_branch_and_bound(values, costs, budgets, max_nodes=50)
+    assert not optimal and nodes <= 50
+    assert (costs[chosen].sum(axis=0) <= budgets + 1e-9).all()
+
+
+def test_select_projects_beats_greedy_on_sample():
+    candidates = sample_candidates(24)
+    npv = evaluate_candidates(candidates, 0.0893)["NPV"].to_numpy()
+    budgets = candidates.outlays(2).sum(axis=0) * 0.4
+    exact = select_projects(candidates, npv, budgets)
+    greedy = select_projects(candidates, npv, budgets, method="greedy")
+    assert exact.optimal
+    assert exact.value >= greedy.value - 1e-9
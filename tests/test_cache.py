@@ -0,0 +1,68 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from fmwai.cache import ResultCache
+
+
+def _age(cache, object_digest, seconds):
+    path = cache.root / "objects" / object_digest
+    t = os.stat(path).st_mtime - seconds
+    os.utime(path, (t, t))
+
+
+def test_put_of_stored_object_keeps_it_through_eviction(tmp_path):
+    value = np.arange(1000.0)
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ResultCache(str(tmp_path), max_bytes=2 * size + 100)
+    shared = cache.put("a", value)
+    _age(cache, shared, 3600)
+    other = cache.put("b", np.arange(1000.0) + 1)
+    _age(cache, other, 60)
+
+    # Same object under a new key: it becomes the most recently used
+    assert cache.put("c", value) == shared
+    cache.put("d", np.arange(1000.0) + 2)
+
+    assert cache.get("c") is not None
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.stats().evictions == 1
+
+
+def test_put_only_scans_when_over_budget(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    calls = []
+    monkeypatch.setattr(cache, "evict", lambda: calls.append(1) or 0)
+    for i in range(50):
+        cache.put(f"k{i}", np.full(100, i))
+    assert calls == []
+
+    cache.max_bytes = 1
+    cache.put("over", np.zeros(100))
+    assert calls == [1]
+
+
+def test_running_counts_match_disk_after_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=20_000)
+    for i in range(20):
+        cache.put(f"k{i}", np.full(500, float(i)))
+    cache.put("again", np.full(500, 19.0))
+    stats = cache.stats()
+    on_disk = cache._entries()
+    assert stats.bytes <= 20_000
+    assert stats.bytes == sum(size for _, size, _ in on_disk)
+    assert stats.entries == len(on_disk)
+    reopened = ResultCache(str(tmp_path)).stats()
+    assert (reopened.entries, reopened.bytes) == (stats.entries, stats.bytes)
+    cache.clear()
+    assert (cache.stats().entries, cache.stats().bytes) == (0, 0)
+
+
+def test_stats_does_not_scan_the_directory(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", np.arange(10))
+    monkeypatch.setattr(cache, "_entries", lambda: pytest.fail("stats() scanned the cache directory"))
+    assert cache.stats().entries == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from fmwai.capital_structure import (RATING_TABLE, FirmInputs, relever_beta, solve_capital_structure, target_wacc,
+                                     unlever_beta)
+
+FIRM = FirmInputs(asset_beta=0.9, rf=0.07, market_premium=0.06, tax_rate=0.25, ebit=500.0,
+                  firm_value=4000.0, fcff=250.0, growth=0.03)
+
+
+def _scalar_point(firm, d):
+    """One grid point solved directly: iterate Kd from AAA until the rating stops moving."""
+    beta = firm.asset_beta * (1 + (1 - firm.tax_rate) * d / (1 - d))
+    ke = firm.rf + beta * firm.market_premium
+    debt = d * firm.firm_value
+    kd = firm.rf + RATING_TABLE["Spread"].iloc[-1]
+    for _ in range(50):
+        coverage = firm.ebit / (debt * kd) if debt > 0 else np.inf
+        row = RATING_TABLE[RATING_TABLE["Min_Coverage"] <= coverage].iloc[-1]
+        if firm.rf + row["Spread"] == kd:
+            break
+        kd = firm.rf + row["Spread"]
+    shield = firm.tax_rate * min(1.0, firm.ebit / (debt * kd)) if debt > 0 else firm.tax_rate
+    wacc = (1 - d) * ke + d * kd * (1 - shield)
+    value = firm.fcff * (1 + firm.growth) / (wacc - firm.growth)
+    return kd, row["Rating"], wacc, value * (1 - row["Default_Prob"] * firm.distress_cost)
+
+
+def test_hamada_round_trip():
+    d = np.linspace(0, 0.9, 10)
+    np.testing.assert_allclose(unlever_beta(relever_beta(0.8, d, 0.25), d, 0.25), 0.8)
+    assert relever_beta(0.8, 0.5, 0.25) == pytest.approx(0.8 * 1.75)
+
+
+def test_target_wacc_weights():
+    assert target_wacc(0.12, 0.3, 0.08, 0.25) == pytest.approx(0.7 * 0.12 + 0.3 * 0.06)
+
+
+def test_grid_matches_pointwise_fixed_point():
+    result = solve_capital_structure(FIRM, max_debt=0.8, step=0.01)
+    assert result.converged
+    assert result.debt_ratio[0] == 0.0 and result.debt_ratio[-1] == pytest.approx(0.8)
+    assert result.wacc[0] == pytest.approx(FIRM.rf + FIRM.asset_beta * FIRM.market_premium)
+    for i in range(1, len(result.debt_ratio), 7):
+        kd, rating, wacc, value = _scalar_point(FIRM, result.debt_ratio[i])
+        assert result.kd_pre_tax[i] == pytest.approx(kd)
+        assert result.rating[i] == rating
+        assert result.wacc[i] == pytest.approx(wacc)
+        assert result.firm_value[i] == pytest.approx(value)
+
+
+def test_rating_is_consistent_with_returned_kd():
+    result = solve_capital_structure(FIRM)
+    frame = result.to_frame()
+    implied = np.searchsorted(RATING_TABLE["Min_Coverage"], frame["Interest_Coverage"], side="right") - 1
+    np.testing.assert_array_equal(RATING_TABLE["Rating"].to_numpy()[implied], frame["Rating"])
+    assert result.min_wacc_debt_ratio == frame["Debt_Ratio"][frame["WACC"].idxmin()]
+
+
+def test_reports_non_convergence():
+    assert not solve_capital_structure(FIRM, max_iter=1).converged
@@ -0,0 +1,49 @@
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from fmwai.charts import scatter, typed_array
+
+
+def _decode(spec):
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<" + spec["dtype"])
+
+
+@pytest.mark.parametrize("values,dtype", [
+    (np.linspace(-1, 1, 101), "f8"),
+    (np.arange(50, dtype=np.int32), "i4"),
+    (np.arange(50, dtype=np.uint8), "u1"),
+    (np.arange(50, dtype=np.int64), "f8"),     # no 64-bit integer arrays in plotly.js
+    (np.array([True, False, True]), "f8"),
+])
+def test_typed_array_round_trip(values, dtype):
+    spec = typed_array(values)
+    assert spec["dtype"] == dtype
+    np.testing.assert_array_equal(_decode(spec), values.astype(_decode(spec).dtype))
+
+
+def test_dates_become_epoch_milliseconds():
+    dates = np.array(["1970-01-01T00:00:00.001", "2024-03-15T12:30:00"], dtype="datetime64[ns]")
+    decoded = _decode(typed_array(dates))
+    np.testing.assert_array_equal(decoded.astype(np.int64).astype("datetime64[ms]"), dates.astype("datetime64[ms]"))
+    assert decoded[0] == 1.0
+
+
+def test_float32_payload_is_half_the_size():
+    y = np.random.default_rng(0).normal(size=1000)
+    full, half = typed_array(y), typed_array(y, np.float32)
+    assert half["dtype"] == "f4"
+    assert len(base64.b64decode(half["bdata"])) * 2 == len(base64.b64decode(full["bdata"]))
+    np.testing.assert_allclose(_decode(half), y, rtol=1e-7)
+
+
+def test_scatter_switches_to_webgl_above_threshold():
+    x = np.arange(20)
+    assert isinstance(scatter(x, x, threshold=20), go.Scatter)
+    trace = scatter(x, x, threshold=19, mode="lines")
+    assert isinstance(trace, go.Scattergl)
+    payload = json.loads(go.Figure(trace).to_json())["data"][0]
+    np.testing.assert_array_equal(_decode(payload["y"]), x)
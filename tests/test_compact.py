@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from fmwai.compact import TOLERANCE, model_report, panel_report
+from fmwai.model import load_model
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_model_metrics_within_tolerance():
+    rows = model_report(load_model(str(ROOT / "FMWAI_Analysis.xlsx")))
+    assert rows
+    assert all(r["rel_error"] <= TOLERANCE for r in rows)
+
+
+def test_panel_metrics_within_tolerance_at_lower_peak():
+    modes, checks = panel_report(tickers=20, days=50_000)
+    assert {c["metric"] for c in checks} == {"mean", "variance", "covariance", "beta"}
+    assert all(c["rel_error"] <= TOLERANCE for c in checks)
+    peak = {m["mode"]: m["peak_mb"] for m in modes}
+    assert peak["compact"] < peak["float64"]
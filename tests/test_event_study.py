@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from fmwai.event_study import MIN_ESTIMATION, benchmark, event_study, parse_event_dates
+
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(1)
+    days, tickers = 800, 20
+    dates = np.datetime64("2020-01-01", "ns") + np.arange(days) * np.timedelta64(1, "D")
+    market = rng.normal(0.0004, 0.01, days)
+    panel = 0.0002 + rng.uniform(0.5, 1.5, tickers) * market[:, None] + rng.normal(0, 0.015, (days, tickers))
+    return dates, panel, market
+
+
+def test_planted_day0_jump_is_recovered():
+    result = benchmark(tickers=100, days=2000, events=2000)
+    assert result["aar_day0"] == pytest.approx(0.02, abs=0.002)
+    assert result["aar_t_day0"] > 10
+    assert result["beta_error"] < 0.1  # sampling error of a 240-day regression is about 0.1
+
+
+def test_matches_per_event_regression(universe):
+    dates, panel, market = universe
+    rng = np.random.default_rng(2)
+    who = rng.integers(0, panel.shape[1], 25)
+    when = rng.integers(300, 780, 25)
+    result = event_study(dates, panel, market, dates[when], who, estimation=(-250, -11), window=(-5, 5))
+    for k, (t, d) in enumerate(zip(who, when)):
+        est = slice(d - 250, d - 10)
+        beta, alpha = np.polyfit(market[est], panel[est, t], 1)
+        resid = panel[est, t] - (alpha + beta * market[est])
+        ar = panel[d - 5:d + 6, t] - (alpha + beta * market[d - 5:d + 6])
+        row = result.events.iloc[k]
+        assert row["Beta"] == pytest.approx(beta, rel=1e-9)
+        assert row["Alpha"] == pytest.approx(alpha, abs=1e-12)
+        assert row["Residual Vol"] == pytest.approx(resid.std(ddof=2), rel=1e-9)
+        np.testing.assert_allclose(result.ar[k], ar, atol=1e-12)
+        np.testing.assert_allclose(result.car[k], np.cumsum(ar), atol=1e-12)
+
+
+def test_events_off_the_sample_or_short_of_data_are_invalid(universe):
+    dates, panel, market = universe
+    panel = panel.copy()
+    panel[:400, 3] = np.nan  # ticker 3 listed on day 400
+    events = dates[[100, 798, 420, 600]]
+    result = event_study(dates, panel, market, events, [0, 0, 3, 3])
+    assert result.valid.tolist() == [False, False, False, True]
+    assert result.events.loc[2, "Estimation N"] < MIN_ESTIMATION
+    assert np.isnan(result.ar[~result.valid]).all()
+    summary = result.summary()
+    assert np.isfinite(summary["CAAR"]).all()
+    assert summary["CAAR t (cross-section)"].isna().all()  # one valid event
+
+
+def test_overlapping_windows_are_rejected(universe):
+    dates, panel, market = universe
+    with pytest.raises(ValueError):
+        event_study(dates, panel, market, dates[[500]], estimation=(-100, 0), window=(-5, 5))
+
+
+def test_parse_event_dates_accepts_lines_and_commas():
+    parsed = parse_event_dates("2024-03-01, 2023-07-14\n\n 2024-01-02 ")
+    assert parsed.astype("datetime64[D]").astype(str).tolist() == ["2023-07-14", "2024-01-02", "2024-03-01"]
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from fmwai import export as export_module
+from fmwai.export import available_formats, export, frame_chunks
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_streamed_export_round_trips(tmp_path, fmt):
+    frame = pd.DataFrame({"x": np.arange(2500.0), "y": np.sqrt(np.arange(2500.0))})
+    result = export(frame_chunks(frame, 1000), tmp_path / f"out.{fmt}")
+    back = pd.read_csv(result.path) if fmt == "csv" else pd.read_excel(result.path)
+    assert result.rows == len(frame)
+    pd.testing.assert_frame_equal(back, frame, check_dtype=False)
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_empty_leading_chunk_writes_one_header(tmp_path, fmt):
+    frame = pd.DataFrame({"x": np.arange(10.0), "y": np.arange(10.0) * 2})
+    chunks = [frame.iloc[:0], frame.iloc[:4], frame.iloc[4:4], frame.iloc[4:]]
+    result = export(iter(chunks), tmp_path / f"out.{fmt}")
+    back = {"csv": pd.read_csv, "xlsx": pd.read_excel, "parquet": pd.read_parquet}[fmt](result.path)
+    assert result.rows == len(frame)
+    pd.testing.assert_frame_equal(back, frame, check_dtype=False)
+
+
+def _build_grid_export(at):
+    at.sidebar.radio[0].set_value("🚀 Project Valuation").run()
+    at.button(key="grid_build").click().run()
+    assert not at.exception
+
+
+def test_large_export_is_not_offered_as_a_download(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(export_module, "MAX_DOWNLOAD_BYTES", 1000)
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    at.run()
+    _build_grid_export(at)
+    assert not at.get("download_button")
+    (command,) = [c.value for c in at.code if c.value.startswith("python -m fmwai.export grid")]
+    assert "--points 101" in command and "--debt-pct 25" in command
+    path = at.session_state["grid_export"][1].path
+    assert os.path.exists(path)
+
+    # One directory per session, removed with the session
+    directory = at.session_state["export_dir"]
+    assert os.path.dirname(path) == directory.name
+    _build_grid_export(at)
+    assert at.session_state["export_dir"] is directory
+    assert os.listdir(directory.name) == [os.path.basename(path)]
+    directory.cleanup()
+    assert not os.path.exists(directory.name)
+
+
+def test_small_export_is_offered_as_a_download(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    at.run()
+    _build_grid_export(at)
+    assert len(at.get("download_button")) == 1
+    at.session_state["export_dir"].cleanup()
@@ -0,0 +1,88 @@
+"""Figures re-emitted per widget interaction, counted through ``st.plotly_chart``."""
+from functools import partial
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    emitted = []
+    plotly_chart = st.plotly_chart
+
+    def counting(figure, *args, **kwargs):
+        emitted.append(figure.layout.title.text)
+        return plotly_chart(figure, *args, **kwargs)
+    monkeypatch.setattr(st, "plotly_chart", counting)
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at, emitted
+
+
+def _interact(at, emitted, widget, value) -> list:
+    """Full-script rerun, as for a widget outside any fragment."""
+    emitted.clear()
+    widget.set_value(value).run()
+    assert not at.exception
+    return list(emitted)
+
+
+def _interact_in_fragment(at, emitted, widget, value, monkeypatch) -> list:
+    """Rerun scoped to the page's fragment, as the browser sends it for a widget inside one.
+
+    AppTest always reruns the whole script, so the fragment id (each page
+    has a single what-if fragment) is put on the rerun request. This goes
+    through AppTest internals, which is why requirements.txt pins Streamlit
+    to the minor release it was checked against.
+    """
+    (fragment_id,) = at._fragment_storage._fragments
+    emitted.clear()
+    with monkeypatch.context() as m:
+        m.setattr(local_script_runner, "RerunData", partial(RerunData, fragment_id_queue=[fragment_id]))
+        widget.set_value(value).run()
+    assert not at.exception
+    return list(emitted)
+
+
+@pytest.mark.parametrize("page, full, per_slider", [
+    ("💰 Capital Structure", 4, 4),      # every chart on the page depends on debt % or Kd
+    ("🚀 Project Valuation", 10, 5),     # revenue, FCFF, margin and capex charts are not rebuilt
+])
+def test_what_if_sliders_rebuild_only_their_fragment(app, monkeypatch, page, full, per_slider):
+    at, emitted = app
+    assert len(_interact(at, emitted, at.sidebar.radio[0], page)) == full
+    assert len(_interact_in_fragment(at, emitted, at.slider(key="debt_pct"), 30, monkeypatch)) == per_slider
+    assert len(_interact_in_fragment(at, emitted, at.slider(key="kd_pre_tax"), 8.5, monkeypatch)) == per_slider
+
+
+def test_fragment_rerun_updates_the_valuation(app, monkeypatch):
+    at, emitted = app
+    _interact(at, emitted, at.sidebar.radio[0], "🚀 Project Valuation")
+    before = at.metric[0].value
+    rebuilt = _interact_in_fragment(at, emitted, at.slider(key="debt_pct"), 35, monkeypatch)
+    assert "NPV Waterfall: Present Value Buildup" in rebuilt
+    assert "Revenue Growth Trajectory" not in rebuilt
+    assert at.metric[0].label == "Discount Rate (WACC)"
+    assert at.metric[0].value != before
+
+
+def test_driver_inputs_outside_the_fragment_rebuild_the_page(app):
+    at, emitted = app
+    _interact(at, emitted, at.sidebar.radio[0], "🚀 Project Valuation")
+    assert len(_interact(at, emitted, at.sidebar.number_input(key="initial_investment"), 25.0)) == 10
+
+
+def test_what_if_selection_survives_page_switches(app, monkeypatch):
+    at, emitted = app
+    _interact(at, emitted, at.sidebar.radio[0], "💰 Capital Structure")
+    _interact_in_fragment(at, emitted, at.slider(key="debt_pct"), 35, monkeypatch)
+    at.run()
+    _interact(at, emitted, at.sidebar.radio[0], "🚀 Project Valuation")
+    assert at.slider(key="debt_pct").value == 35
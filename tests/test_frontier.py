@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from fmwai.frontier import closed_form, efficient_frontier, ledoit_wolf, long_only, project_simplex
+
+
+def _panel(observations=120, assets=8, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0005, 0.01, observations)
+    return market[:, None] * rng.normal(1.0, 0.3, assets) + rng.normal(0.0002, 0.015, (observations, assets))
+
+
+def _slsqp(objective, n, constraints=(), bounds=None):
+    res = minimize(objective, np.full(n, 1.0 / n), method="SLSQP", bounds=bounds,
+                   constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1.0}, *constraints],
+                   options={"ftol": 1e-12, "maxiter": 1000})
+    assert res.success
+    return res.x
+
+
+@pytest.mark.parametrize("shape", [(120, 8), (30, 60)])
+def test_ledoit_wolf_is_a_convex_combination_of_target_and_sample(shape):
+    X = _panel(*shape)
+    cov, shrinkage = ledoit_wolf(X)
+    S = np.cov(X, rowvar=False, bias=True)
+    mu = np.trace(S) / shape[1]
+    assert 0.0 <= shrinkage <= 1.0
+    np.testing.assert_allclose(cov, shrinkage * mu * np.eye(shape[1]) + (1 - shrinkage) * S, atol=1e-15)
+    assert np.linalg.eigvalsh(cov)[0] > 0
+
+
+def test_ledoit_wolf_stacked_panels_match_one_at_a_time():
+    panels = np.stack([_panel(seed=s) for s in range(4)])
+    cov, shrinkage = ledoit_wolf(panels)
+    for i, X in enumerate(panels):
+        c, s = ledoit_wolf(X)
+        np.testing.assert_allclose(cov[i], c)
+        assert shrinkage[i] == pytest.approx(s)
+
+
+def test_project_simplex_matches_slsqp():
+    V = np.random.default_rng(1).normal(0, 1, (20, 6))
+    P = project_simplex(V)
+    np.testing.assert_allclose(P.sum(axis=1), 1.0)
+    assert (P >= 0).all()
+    for v, p in zip(V, P):
+        ref = _slsqp(lambda w: ((w - v) ** 2).sum(), len(v), bounds=[(0, None)] * len(v))
+        np.testing.assert_allclose(p, ref, atol=1e-6)
+
+
+def test_closed_form_solves_the_kkt_system():
+    X = _panel()
+    mean, cov = X.mean(axis=0) * 252, ledoit_wolf(X)[0] * 252
+    f = closed_form(mean, cov, rf=0.02, points=5)
+    np.testing.assert_allclose(f["weights"].sum(axis=1), 1.0)
+    np.testing.assert_allclose(f["weights"] @ mean, f["returns"])
+    n = len(mean)
+    kkt = np.block([[2 * cov, np.ones((n, 1)), mean[:, None]],
+                    [np.ones((1, n)), np.zeros((1, 2))],
+                    [mean[None, :], np.zeros((1, 2))]])
+    for target, w, vol in zip(f["returns"], f["weights"], f["vols"]):
+        ref = np.linalg.solve(kkt, np.concatenate([np.zeros(n), [1.0, target]]))[:n]
+        np.testing.assert_allclose(w, ref, atol=1e-9)
+        assert vol == pytest.approx(np.sqrt(w @ cov @ w))
+    # The Sharpe ratio is flat at its maximum, so compare values rather than weights
+    ref = _slsqp(lambda w: -(w @ mean - 0.02) / np.sqrt(w @ cov @ w), len(mean))
+    sharpe = lambda w: (w @ mean - 0.02) / np.sqrt(w @ cov @ w)
+    assert sharpe(f["max_sharpe"]) >= sharpe(ref) - 1e-9
+
+
+def test_long_only_matches_slsqp():
+    X = _panel()
+    mean, cov = X.mean(axis=0) * 252, ledoit_wolf(X)[0] * 252
+    tau = np.array([0.0, 0.01, 0.05, 0.2])
+    W = long_only(mean, cov, tau)
+    np.testing.assert_allclose(W.sum(axis=1), 1.0)
+    assert (W >= 0).all()
+    for t, w in zip(tau, W):
+        objective = lambda w: 0.5 * w @ cov @ w - t * mean @ w
+        ref = _slsqp(objective, len(mean), bounds=[(0, None)] * len(mean))
+        assert objective(w) <= objective(ref) + 1e-12
+        np.testing.assert_allclose(w, ref, atol=1e-5)
+
+
+@pytest.mark.parametrize("allow_short", [True, False])
+def test_singular_sample_covariance(allow_short):
+    # More assets than observations: the unshrunk covariance has rank < N
+    f = efficient_frontier(_panel(observations=20, assets=40), 252, shrink=False, allow_short=allow_short)
+    assert f.shrinkage == 0.0
+    assert np.isfinite(f.vols).all() and np.isfinite(f.weights).all()
+    np.testing.assert_allclose(f.min_variance.sum(), 1.0)
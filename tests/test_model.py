@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fmwai.model import FREQUENCIES, SchemaError, build_model
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def sheets():
+    raw = pd.read_excel(ROOT / "FMWAI_Analysis.xlsx", sheet_name=None, index_col=0)
+    for name in ["Data", "Returns_Daily", "Returns_Weekly", "Returns_Monthly"]:
+        raw[name].index = pd.to_datetime(raw[name].index)
+    return raw
+
+
+def _with(sheets, name, frame):
+    return {**sheets, name: frame}
+
+
+def test_model_reads_the_workbook(sheets):
+    model = build_model(sheets)
+    for f in model.frequencies:
+        assert f.beta == sheets["CAPM_Regression"].at[f.name, "Beta"]
+        assert len(f.returns) == len(sheets[f"Returns_{f.name}"])
+        assert f.returns.stock.dtype == np.float64
+    assert model.cost_of_capital.rf == sheets["Capital_Structure_WACC"].at["Risk-free rate", "Value"]
+    np.testing.assert_array_equal(model.project.fcff, sheets["Project_Financials"]["FCFF"])
+    assert model.frequency("Weekly") is model.weekly
+    with pytest.raises(KeyError):
+        model.frequency("Hourly")
+
+
+def test_between_returns_views(sheets):
+    prices = build_model(sheets).prices
+    window = prices.between("2023-01-01", "2023-12-31")
+    assert np.shares_memory(window.stock, prices.stock)
+    assert window.dates.min() >= np.datetime64("2023-01-01")
+    assert window.dates.max() <= np.datetime64("2023-12-31")
+
+
+@pytest.mark.parametrize("sheet,column", [("CAPM_Regression", "Beta"), ("Data", "Market_Close"),
+                                          ("Capital_Structure_WACC", "Value")])
+def test_dropped_column_raises(sheets, sheet, column):
+    with pytest.raises(SchemaError, match=f"{sheet}: missing columns"):
+        build_model(_with(sheets, sheet, sheets[sheet].drop(columns=column)))
+
+
+def test_missing_sheet_row_and_values_raise(sheets):
+    with pytest.raises(SchemaError, match="missing sheet 'Project_Risk'"):
+        build_model({k: v for k, v in sheets.items() if k != "Project_Risk"})
+    with pytest.raises(SchemaError, match="missing rows \\['Weekly'\\]"):
+        build_model(_with(sheets, "CAPM_Regression", sheets["CAPM_Regression"].drop(index="Weekly")))
+    gap = sheets["CAPM_Regression"].copy()
+    gap.loc[FREQUENCIES[0], "Beta"] = np.nan
+    with pytest.raises(SchemaError, match="missing values"):
+        build_model(_with(sheets, "CAPM_Regression", gap))
+
+
+def test_unsorted_dates_raise(sheets):
+    with pytest.raises(SchemaError, match="increasing date index"):
+        build_model(_with(sheets, "Data", sheets["Data"].iloc[::-1]))
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fmwai import pipeline, quality
+from fmwai.pipeline import PipelineConfig, capm, code_digest, returns, run_pipeline
+
+
+@pytest.fixture
+def config(tmp_path):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2022-04-01", periods=500, name="Date")
+    market = 17000 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, len(dates))))
+    stock = 1000 * np.exp(np.cumsum(rng.normal(0.0005, 0.014, len(dates))))
+    path = tmp_path / "prices.csv"
+    pd.DataFrame({"Stock_Close": stock, "Market_Close": market}, index=dates).to_csv(path)
+    return PipelineConfig(prices_path=str(path))
+
+
+def _edited(module):
+    source = pipeline._module_source
+
+    def patched(name):
+        return source(name) + (b"\n# edited\n" if name == module else b"")
+    return patched
+
+
+def test_unchanged_rerun_is_fully_cached(config, tmp_path):
+    first = run_pipeline(config, str(tmp_path / "cache"))
+    second = run_pipeline(config, str(tmp_path / "cache"))
+    assert len(first.computed) == len(pipeline.STAGES)
+    assert second.computed == []
+    assert second.digests == first.digests
+
+
+def test_editing_a_helper_module_invalidates_dependent_stages(config, tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    run_pipeline(config, cache)
+
+    monkeypatch.setattr(pipeline, "_module_source", _edited("fmwai.quality"))
+    run = run_pipeline(config, cache)
+    assert "clean" in run.computed
+    assert "project" in run.cached
+    assert "prices" in run.cached
+
+    monkeypatch.setattr(pipeline, "_module_source", _edited("fmwai.project_model"))
+    run = run_pipeline(config, cache)
+    assert "project" in run.computed
+    assert "clean" in run.cached
+
+
+def test_closure_values_are_part_of_the_key():
+    assert code_digest(returns("Weekly")) != code_digest(returns("Monthly"))
+    assert code_digest(capm("Daily")) != code_digest(capm("Monthly"))
+    assert code_digest(returns("Weekly")) == code_digest(returns("Weekly"))
+
+
+def test_recomputed_stage_with_same_output_keeps_downstream_cached(config, tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    first = run_pipeline(config, cache)
+    # The quality report is stamped with its run time; a later run must not change the digest
+    later = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(quality, "datetime", type("Later", (), {"now": staticmethod(lambda tz=None: later)}))
+    run = run_pipeline(config, cache, force={"clean"})
+    assert run.computed == ["clean"]
+    assert run.digests == first.digests
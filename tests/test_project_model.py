@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fmwai.project_model import ProjectDrivers, build_financials, irr, npv, terminal_value
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_default_drivers_reproduce_the_workbook():
+    sheet = pd.read_excel(ROOT / "FMWAI_Analysis.xlsx", sheet_name="Project_Financials", index_col=0)
+    frame = build_financials(ProjectDrivers()).to_frame()
+    for item in sheet.columns:
+        np.testing.assert_allclose(frame[item], sheet[item], atol=0.006)
+
+
+def test_batched_drivers_match_one_at_a_time():
+    growth = np.array([0.1, 0.3, 0.5])
+    margin = np.array([0.3, 0.4, 0.5])
+    batch = build_financials(ProjectDrivers(revenue_growth=growth, ebitda_margin_end=margin))
+    for i in range(3):
+        one = build_financials(ProjectDrivers(revenue_growth=growth[i], ebitda_margin_end=margin[i]))
+        np.testing.assert_allclose(batch.FCFF[i], one.FCFF[0])
+
+
+def test_npv_matches_discounting_loop():
+    fcff = build_financials(ProjectDrivers()).FCFF[0]
+    rate, g = 0.11, 0.04
+    expected = sum(cf / 1.11 ** (t + 1) for t, cf in enumerate(fcff)) - 18.0
+    assert npv(fcff, rate, 18.0) == pytest.approx(expected)
+    tv = fcff[-1] * (1 + g) / (rate - g) / 1.11 ** len(fcff)
+    assert npv(fcff, rate, 18.0, g) == pytest.approx(expected + tv)
+    rates = np.array([[0.08], [0.11]])
+    np.testing.assert_allclose(npv(fcff[None, :], rates, 18.0)[1], expected)
+
+
+def test_terminal_value_edge_cases():
+    fcff = np.array([[10.0, 20.0]])
+    assert terminal_value(fcff, 0.1, None) == 0.0
+    assert np.isnan(terminal_value(fcff, 0.03, 0.05)).all()
+    np.testing.assert_allclose(terminal_value(fcff, 0.1, np.array([np.nan, 0.02])), [0.0, 20 * 1.02 / 0.08])
+
+
+def test_irr_zeroes_npv():
+    fcff = build_financials(ProjectDrivers(revenue_growth=np.array([0.1, 0.3]))).FCFF
+    rates = irr(fcff, initial_investment=200.0)
+    assert np.isfinite(rates).all()
+    np.testing.assert_allclose(npv(fcff, rates, 200.0), 0.0, atol=1e-9)
+    assert np.isnan(irr(np.array([-1.0, -1.0]), initial_investment=100.0)).all()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fmwai.quality import (NSE_HOLIDAYS, NSE_SPECIAL_SESSIONS, QualityConfig, clean_prices, corporate_action_ratios,
+                           exchange_sessions, nse_sessions, robust_z, stale_mask)
+
+
+def _prices(n=300, seed=0, start="2023-01-02"):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, n)
+    stock = 1.1 * market + rng.normal(0, 0.012, n)
+    dates = exchange_sessions(start, "2025-03-31", NSE_HOLIDAYS, special_sessions=NSE_SPECIAL_SESSIONS)[:n]
+    return pd.DataFrame({"Stock_Close": 500 * np.exp(np.cumsum(stock)),
+                         "Market_Close": 18000 * np.exp(np.cumsum(market))}, index=dates)
+
+
+def test_stale_mask_flags_only_long_runs():
+    prices = np.array([[1.0, 5.0], [1.0, 5.0], [1.0, 6.0], [2.0, 6.0], [2.0, 6.0], [3.0, 6.0]])
+    mask = stale_mask(prices, sessions=3)
+    # First column: a run of three 1.0s (repeats flagged), then a run of two 2.0s (not stale)
+    np.testing.assert_array_equal(mask[:, 0], [False, True, True, False, False, False])
+    # Second column: two 5.0s, then four 6.0s
+    np.testing.assert_array_equal(mask[:, 1], [False, False, False, True, True, True])
+
+
+def test_robust_z_flags_spike_not_noise():
+    r = np.random.default_rng(1).normal(0, 0.01, (500, 2))
+    r[250, 0] = 0.2
+    z = robust_z(r)
+    assert abs(z[250, 0]) > 6
+    assert (np.abs(np.delete(z[:, 0], 250)) < 6).all()
+    assert np.isnan(robust_z(np.zeros((10, 1)))).all()
+
+
+def test_corporate_action_ratio_matches_split_and_ignores_reverting_print():
+    log_ret = np.zeros((6, 2))
+    log_ret[2, 0] = -np.log(2.0)                      # 2:1 split, level holds
+    log_ret[4, 1], log_ret[5, 1] = -0.7, 0.7          # bad print that reverts
+    ratios = corporate_action_ratios(log_ret, np.zeros(6), threshold=0.18, tolerance=0.05)
+    assert ratios[2, 0] == 2.0
+    assert (np.delete(ratios.ravel(), 2 * 2) == 1.0).all()
+
+
+def test_split_is_detected_and_adjusted():
+    prices = _prices()
+    prices.iloc[150:, 0] /= 3.0
+    cleaned, report = clean_prices(prices)
+    assert report.corporate_actions == [{"date": prices.index[150].date().isoformat(), "series": "Stock_Close",
+                                         "ratio": 3.0}]
+    assert report.series["Stock_Close"]["outliers"] == 0
+    np.testing.assert_allclose(cleaned["Stock_Close"].iloc[150:], prices["Stock_Close"].iloc[150:])
+    np.testing.assert_allclose(cleaned["Stock_Close"].iloc[:150], prices["Stock_Close"].iloc[:150] / 3.0)
+
+    _, unadjusted = clean_prices(prices, QualityConfig(adjust_corporate_actions=False))
+    assert unadjusted.series["Stock_Close"]["corporate_actions"] == 1
+
+
+def test_outlier_is_counted_and_optionally_masked():
+    prices = _prices()
+    prices.iloc[100, 0] *= 1.6
+    _, report = clean_prices(prices)
+    assert report.series["Stock_Close"]["outliers"] == 2      # the jump up and the jump back
+    cleaned, _ = clean_prices(prices, QualityConfig(mask_outliers=True))
+    assert cleaned["Stock_Close"].iloc[100] == prices["Stock_Close"].iloc[99]
+
+
+@pytest.mark.parametrize("policy,rows,value", [
+    ("none", 300, np.nan),
+    ("ffill", 300, "prev"),
+    ("interpolate", 300, "mid"),
+    ("drop", 298, None),
+])
+def test_fill_policies(policy, rows, value):
+    prices = _prices()
+    prices.iloc[[50, 51], 0] = np.nan
+    cleaned, report = clean_prices(prices, QualityConfig(fill=policy))
+    assert len(cleaned) == rows
+    assert report.series["Stock_Close"]["missing"] == 2
+    if value is None:
+        assert prices.index[50] not in cleaned.index
+    elif value == "prev":
+        assert cleaned["Stock_Close"].iloc[51] == prices["Stock_Close"].iloc[49]
+        assert report.series["Stock_Close"]["filled"] == 2
+    elif value == "mid":
+        assert prices["Stock_Close"].iloc[[49, 52]].min() <= cleaned["Stock_Close"].iloc[50] \
+            <= prices["Stock_Close"].iloc[[49, 52]].max()
+    else:
+        assert np.isnan(cleaned["Stock_Close"].iloc[50])
+
+
+def test_fill_respects_max_gap():
+    prices = _prices()
+    prices.iloc[50:55, 0] = np.nan
+    cleaned, _ = clean_prices(prices, QualityConfig(fill="ffill", max_gap=3))
+    assert len(cleaned) == 300 - 2
+
+
+def test_nse_calendar_flags_sessions_both_series_missed():
+    dates = nse_sessions(pd.DatetimeIndex(["2024-01-15", "2024-02-15"]))
+    assert pd.Timestamp("2024-01-22") not in dates and pd.Timestamp("2024-01-26") not in dates
+    assert pd.Timestamp("2024-01-23") in dates and pd.Timestamp("2024-01-20") not in dates
+    assert pd.Timestamp("2025-02-01") in nse_sessions(pd.DatetimeIndex(["2025-01-15", "2025-02-15"]))
+
+    prices = _prices(n=len(dates), start="2024-01-15")
+    prices.index = dates
+    # A session dropped from both series and a weekend print
+    gappy = prices.drop(index=pd.Timestamp("2024-02-01"))
+    gappy.loc[pd.Timestamp("2024-01-27")] = gappy.iloc[0]
+    cleaned, report = clean_prices(gappy.sort_index(), QualityConfig(fill="none"))
+    assert report.off_calendar_rows == 1
+    assert report.series["Market_Close"]["missing"] == 1
+    assert report.series["Stock_Close"]["missing"] == 1
+    assert cleaned.index.equals(dates)
+
+
+def test_calendar_outside_holiday_list_follows_the_reference():
+    dates = pd.DatetimeIndex(["2019-01-01", "2019-01-03", "2019-01-04"])
+    assert nse_sessions(dates).equals(dates)
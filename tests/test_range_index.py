@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fmwai.model import MarketSeries
+from fmwai.range_index import PrefixSumIndex
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(0)
+    n = 1500
+    market = rng.normal(0.0005, 0.01, n)
+    stock = 0.002 + 1.2 * market + rng.normal(0, 0.012, n)
+    dates = pd.bdate_range("2019-01-01", periods=n).to_numpy(dtype="datetime64[ns]")
+    return MarketSeries(dates, stock, market)
+
+
+def _reference(r, m, ppy):
+    beta, alpha = np.polyfit(m, r, 1)
+    return {
+        "observations": len(r),
+        "ann_return": np.mean(r) * ppy,
+        "ann_vol": np.std(r, ddof=1) * np.sqrt(ppy),
+        "market_return": np.mean(m) * ppy,
+        "market_vol": np.std(m, ddof=1) * np.sqrt(ppy),
+        "beta": beta,
+        "alpha": alpha,
+        "correlation": np.corrcoef(r, m)[0, 1],
+        "r_squared": np.corrcoef(r, m)[0, 1] ** 2,
+        "cumulative_return": np.prod(1 + r) - 1,
+        "market_cumulative_return": np.prod(1 + m) - 1,
+    }
+
+
+@pytest.mark.parametrize("i,j", [(0, 1500), (0, 3), (250, 260), (1000, 1500), (37, 1201)])
+def test_window_matches_direct_statistics(series, i, j):
+    stats = PrefixSumIndex.build(series, 252).window(i, j)
+    for name, expected in _reference(series.stock[i:j], series.market[i:j], 252).items():
+        assert getattr(stats, name) == pytest.approx(expected, rel=1e-9, abs=1e-15), name
+
+
+def test_dates_are_inclusive_and_arrays_broadcast(series):
+    index = PrefixSumIndex.build(series, 252)
+    start, end = series.dates[100], series.dates[199]
+    assert index.locate(start, end) == (100, 200)
+    one = index.stats(start, end)
+    assert one.observations == 100
+    many = index.stats(series.dates[[0, 100]], series.dates[[99, 199]])
+    np.testing.assert_array_equal(many.observations, [100, 100])
+    assert many.beta[1] == pytest.approx(float(one.beta))
+
+
+def test_short_windows_are_nan(series):
+    stats = PrefixSumIndex.build(series, 252).window(np.array([10, 10]), np.array([12, 13]))
+    assert np.isnan(stats.beta[0]) and np.isnan(stats.ann_return[0])
+    assert np.isfinite(stats.beta[1])
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from fmwai.real_options import (abandonment_payoff, call_payoff, combined_payoff, expansion_payoff, lattice_option,
+                                value_real_options)
+
+
+def _black_scholes(s, k, sigma, r, t, q=0.0, call=True):
+    d1 = (np.log(s / k) + (r - q + 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
+    d2 = d1 - sigma * np.sqrt(t)
+    if call:
+        return s * np.exp(-q * t) * norm.cdf(d1) - k * np.exp(-r * t) * norm.cdf(d2)
+    return k * np.exp(-r * t) * norm.cdf(-d2) - s * np.exp(-q * t) * norm.cdf(-d1)
+
+
+@pytest.mark.parametrize("method", ["binomial", "trinomial"])
+@pytest.mark.parametrize("q", [0.0, 0.03])
+def test_european_lattice_converges_to_black_scholes(method, q):
+    kw = dict(value=100.0, sigma=0.3, rate=0.07, maturity=2.0, steps=4000, american=False, dividend_yield=q,
+              method=method)
+    assert lattice_option(payoff=call_payoff(100.0), **kw) == pytest.approx(
+        _black_scholes(100, 100, 0.3, 0.07, 2.0, q), abs=5e-3)
+    assert lattice_option(payoff=abandonment_payoff(100.0), **kw) == pytest.approx(
+        _black_scholes(100, 100, 0.3, 0.07, 2.0, q, call=False), abs=5e-3)
+
+
+def test_american_call_without_payout_equals_european():
+    kw = dict(value=100.0, sigma=0.25, rate=0.05, maturity=1.0, steps=500, payoff=call_payoff(95.0))
+    assert lattice_option(american=True, **kw) == pytest.approx(lattice_option(american=False, **kw), rel=1e-12)
+
+
+def test_american_put_carries_early_exercise_premium():
+    kw = dict(value=100.0, sigma=0.25, rate=0.05, maturity=1.0, steps=500, payoff=abandonment_payoff(110.0))
+    assert lattice_option(american=True, **kw) > lattice_option(american=False, **kw)
+
+
+def test_payoffs():
+    v = np.array([50.0, 100.0, 150.0])
+    np.testing.assert_allclose(expansion_payoff(0.5, 40.0)(v), [0.0, 10.0, 35.0])
+    np.testing.assert_allclose(abandonment_payoff(80.0)(v), [30.0, 0.0, 0.0])
+    np.testing.assert_allclose(combined_payoff(expansion_payoff(0.5, 40.0), abandonment_payoff(80.0))(v),
+                               [30.0, 10.0, 35.0])
+
+
+def test_real_options_bounds():
+    res = value_real_options(project_value=200.0, investment=180.0, sigma=0.35, rate=0.07, maturity=3.0,
+                             expansion_factor=0.3, expansion_cost=50.0, salvage=120.0, steps=800)
+    assert res.static_npv == pytest.approx(20.0)
+    # Holding both options is worth at least either alone and at most both
+    assert max(res.expansion, res.abandonment) <= res.combined <= res.expansion + res.abandonment + 1e-9
+    assert res.deferral >= 0
+    assert res.expanded_npv == pytest.approx(res.static_npv + res.combined)
+
+
+def test_rejects_bad_lattices():
+    with pytest.raises(ValueError):
+        lattice_option(100.0, 0.3, 0.05, 1.0, 0, call_payoff(100.0))
+    with pytest.raises(ValueError):
+        lattice_option(100.0, 0.3, 0.05, 1.0, 10, call_payoff(100.0), method="quadrinomial")
+    with pytest.raises(ValueError):
+        lattice_option(100.0, 0.01, 0.5, 10.0, 1, call_payoff(100.0))
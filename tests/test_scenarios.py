@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fmwai.capital_structure import target_wacc
+from fmwai.export import _workbook_inputs
+from fmwai.project_model import ProjectDrivers, build_financials, npv
+from fmwai.scenarios import MarketInputs, Scenario, ScenarioStore, compare, random_scenarios
+
+ROOT = Path(__file__).resolve().parents[1]
+TAX = 0.25
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScenarioStore(str(tmp_path / "scenarios.db"))
+
+
+def test_save_round_trips_and_replaces_by_name(store):
+    drivers = ProjectDrivers(revenue_growth=[[0.3, 0.25, 0.2, 0.15]], terminal_growth=0.03, capex_pct=0.1)
+    saved = store.save(Scenario("Base", 0.25, 0.075, drivers, tags=("board", "base"), notes="first"))
+    assert saved.tags == ("base", "board")
+    assert saved.created_at == saved.updated_at
+    np.testing.assert_allclose(build_financials(saved.drivers).FCFF, build_financials(drivers).FCFF)
+
+    again = store.save(Scenario("base", 0.30, 0.08, tags=("draft",)))    # names are case-insensitive
+    assert len(store) == 1
+    assert (again.debt_pct, again.tags, again.created_at) == (0.30, ("draft",), saved.created_at)
+    assert again.updated_at > saved.updated_at
+
+
+def test_list_filters_and_orders(store):
+    for s in random_scenarios(200):
+        store.save(s)
+    store.save(Scenario("under_score", 0.1, 0.07, tags=("board",)))
+    everything = store.list()
+    assert len(everything) == 201
+    assert everything[0].name == "under_score"
+    assert [s.updated_at for s in everything] == sorted((s.updated_at for s in everything), reverse=True)
+
+    board = store.list(tag="board")
+    assert len(board) == store.tags()["board"]
+    assert all("board" in s.tags for s in board)
+    assert {s.name for s in store.list(prefix="case-00001")} == {f"case-{i:06d}" for i in range(10, 20)}
+    assert [s.name for s in store.list(prefix="under_")] == ["under_score"]
+    assert store.list(prefix="under%") == []
+    assert len(store.list(limit=7)) == 7
+    assert [s.name for s in store.list(names=["case-000003", "nope"])] == ["case-000003"]
+
+
+def test_rename_tag_and_delete(store):
+    store.save(Scenario("a", 0.2, 0.07))
+    store.rename("a", "b")
+    store.tag("b", "x", "y")
+    store.untag("b", "x")
+    assert store.load("b").tags == ("y",)
+    store.delete("b")
+    assert len(store) == 0 and store.tags() == {}
+    with pytest.raises(KeyError):
+        store.load("b")
+    with pytest.raises(KeyError):
+        store.rename("b", "c")
+
+
+def test_base_scenario_reproduces_the_valuation_page():
+    rf, ke, beta = _workbook_inputs(str(ROOT / "FMWAI_Analysis.xlsx"))
+    market = MarketInputs.from_ke(ke, beta, rf, debt_pct=0.25, tax_rate=TAX)
+    drivers = ProjectDrivers(terminal_growth=0.03)
+    base = Scenario("Base", 0.25, 0.075, drivers)
+    out = compare([base, Scenario("Levered", 0.40, 0.075, drivers)], market)
+
+    # The valuation page discounts at target_wacc(ke, ...) with Ke from the period's CAPM
+    wacc = target_wacc(ke, 0.25, 0.075, TAX)
+    assert out.at["Base", "Ke"] == pytest.approx(ke, rel=1e-12)
+    assert out.at["Base", "WACC"] == pytest.approx(wacc, rel=1e-12)
+    assert out.at["Base", "NPV"] == pytest.approx(float(npv(build_financials(drivers).FCFF, wacc, 18.0, 0.03)[0]),
+                                                  rel=1e-12)
+    # Away from the base ratio Ke follows the relevered beta
+    assert out.at["Levered", "Ke"] > ke
+
+
+def test_compare_matches_one_at_a_time():
+    market = MarketInputs(beta=0.8, rf=0.06, market_premium=0.07)
+    scenarios = random_scenarios(50, seed=1)
+    batch = compare(scenarios, market)
+    for s in scenarios[:10]:
+        one = compare([s], market)
+        np.testing.assert_allclose(batch.loc[[s.name], ["Ke", "WACC", "NPV", "IRR"]].to_numpy(),
+                                   one[["Ke", "WACC", "NPV", "IRR"]].to_numpy(), rtol=1e-12)
+    assert compare([], market).empty
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from fmwai.capital_structure import target_wacc
+from fmwai.project_model import ProjectDrivers, build_financials, npv
+from fmwai.sensitivity import SensitivityBase, evaluate, spider, tornado
+
+
+@pytest.fixture
+def base():
+    return SensitivityBase.from_ke(ke=0.1004, beta=0.80, rf=0.065, kd_pre_tax=0.075, tax_rate=0.25,
+                                   debt_pct=0.25, drivers=ProjectDrivers())
+
+
+def test_base_row_reproduces_page_discount_rate_and_npv(base):
+    rate = target_wacc(0.1004, 0.25, 0.075, 0.25)
+    wacc, value = evaluate(base, base.vector()[None, :])
+    d = ProjectDrivers()
+    assert wacc[0] == pytest.approx(rate, rel=1e-12)
+    assert value[0] == pytest.approx(npv(build_financials(d).FCFF, rate, d.initial_investment,
+                                         d.terminal_growth)[0], rel=1e-12)
+    tor = tornado(base)
+    assert tor.attrs["base_wacc"] == pytest.approx(rate, rel=1e-12)
+
+
+def test_spider_default_changes_are_not_shared(base):
+    first = spider(base)
+    assert len(first) == 13 * len(base.vector())
+    assert np.allclose(np.unique(first["Change"]), np.linspace(-0.30, 0.30, 13))
+    assert spider(base)["Change"].equals(first["Change"])
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from fmwai.capital_structure import target_wacc
+from fmwai.sensitivity import SensitivityBase
+from fmwai.stress import StressScenario, run_stress
+
+
+@pytest.fixture
+def base():
+    return SensitivityBase.from_ke(ke=0.10, beta=0.85, rf=0.065, kd_pre_tax=0.075, tax_rate=0.25, debt_pct=0.25)
+
+
+def test_base_row_is_the_valuation_base_case(base):
+    table = run_stress(base, 1500.0, [])
+    assert table.loc["Base case", "WACC"] == pytest.approx(target_wacc(0.10, 0.25, 0.075, 0.25), rel=1e-12)
+    assert table.loc["Base case", "Ke"] == pytest.approx(0.10, rel=1e-12)
+
+
+def test_market_move_reprices_through_the_equity_beta_only(base):
+    table = run_stress(base, 1500.0, [StressScenario("drop", market_move=-0.20)])
+    row, base_row = table.loc["drop"], table.loc["Base case"]
+    assert row["Price"] == pytest.approx(1500.0 * (1 - 0.85 * 0.20))
+    assert row["WACC"] == base_row["WACC"] and row["NPV"] == base_row["NPV"]
+
+
+def test_rate_and_operating_shocks_leave_the_price(base):
+    table = run_stress(base, 1500.0, [StressScenario("rates", rf_shift=0.02, credit_spread=0.01),
+                                      StressScenario("demand", growth_shift=-0.1, margin_shift=-0.05)])
+    assert np.allclose(table["Price"], 1500.0)
+    assert table.loc["rates", "WACC Change"] > 0
+    assert table.loc["demand", "WACC Change"] == 0
+    assert table.loc["demand", "NPV Change"] < 0